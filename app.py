@@ -13,6 +13,21 @@ from src.config import HybridConfig, ACOConfig, GAConfig, TabuConfig
 from src.utils.plotting import plot_solution, plot_convergence, plot_gantt
 
 from src.utils.solomon_loader import instance_from_solomon
+from src.utils.instance_cache import file_digest
+from src.utils.instance_generator import generate_instance
+from src.utils.logger import setup_logger
+from src.utils.results_store import ResultsStore
+from src.solvers.jobs import InstanceSpec, JobManager
+
+setup_logger()
+
+# Random-instance generators: the legacy uniform one, or a Solomon-style layout
+INSTANCE_KINDS = {
+    "Random (legacy)": None,
+    "Clustered (C)": "c",
+    "Random (R)": "r",
+    "Mixed (RC)": "rc",
+}
 
 
 # -----------------------------
@@ -36,52 +51,82 @@ def list_solomon_files() -> list[str]:
     return sorted([p.name for p in folder.iterdir() if p.is_file() and p.suffix.lower() == ".txt"])
 
 
-def run_solver(instance: CVRPTWInstance, n_ants: int, n_gens: int, tabu_steps: int):
-    config = HybridConfig(
+def make_config(n_ants: int, n_gens: int, tabu_steps: int) -> HybridConfig:
+    return HybridConfig(
         aco=ACOConfig(n_ants=n_ants, iterations=5),
         ga=GAConfig(population_size=50, generations=n_gens),
         tabu=TabuConfig(max_steps=tabu_steps),
     )
+
+
+def run_solver(instance: CVRPTWInstance, n_ants: int, n_gens: int, tabu_steps: int, seed=None):
+    config = make_config(n_ants, n_gens, tabu_steps)
     solver = HybridSolver(instance, config)
     t0 = time.time()
-    sol = solver.solve()
+    sol = solver.solve(seed=seed)
     t1 = time.time()
     return sol, (t1 - t0)
 
 
-# -----------------------------
-# UI
-# -----------------------------
-st.set_page_config(page_title="Hybrid CVRPTW Solver", layout="wide")
+# Solves run in a process pool shared by all sessions of this server, so the
+# script thread never blocks and benchmarks use every core.
+@st.cache_resource
+def job_manager() -> JobManager:
+    return JobManager(progress_interval=0.5)
+
+
+# Parsed instances are kept across reruns, keyed by file content
+@st.cache_resource(max_entries=32)
+def _load_instance(path: str, digest: str) -> CVRPTWInstance:
+    return instance_from_solomon(path, use_cache=True)
 
-st.title("🚛 Hybrid CVRPTW Solver (Professional Edition)")
-st.markdown(
-    """
-**Capacitated Vehicle Routing Problem with Time Windows**
-Solved using a hybrid pipeline: **ACO (Ant Colony) → GA (Genetic Algo) → Tabu Search**.
-"""
-)
 
-# ✅ 2 pages (Solver / Benchmarks)
-page = st.sidebar.radio("Navigation", ["Solver (Random/Solomon - single run)", "Benchmarks (Solomon - batch)"])
+def load_instance(path: Path) -> CVRPTWInstance:
+    return _load_instance(str(path), file_digest(path))
 
-# Shared algorithm params
-st.sidebar.header("Algorithm Parameters")
-n_ants = st.sidebar.slider("ACO Ants", 5, 50, 10)
-n_gens = st.sidebar.slider("GA Generations", 10, 200, 50)
-tabu_steps = st.sidebar.slider("Tabu Steps", 10, 200, 50)
+
+def stage_plan(config: HybridConfig) -> list:
+    """(stage, number of steps) in pipeline order, for progress estimates."""
+    plan = [("ACO", config.aco.iterations), ("GA", config.ga.generations)]
+    if config.route_min.enabled:
+        plan.append(("RouteMin", 1))
+    for stage in config.improvement.split("+"):
+        plan.append(("Tabu", config.tabu.max_steps) if stage == "tabu" else ("ALNS", config.alns.iterations))
+    return plan
+
+
+def job_fraction(job, config: HybridConfig) -> float:
+    if job.finished:
+        return 1.0
+    plan = stage_plan(config)
+    for i, (stage, steps) in enumerate(plan):
+        if stage == job.stage:
+            return min(1.0, (i + min(job.step + 1, steps) / max(steps, 1)) / len(plan))
+    return 0.0
+
+
+def refresh_while(running: bool, interval: float = 1.0):
+    """Reruns the script periodically while background jobs are running."""
+    if running:
+        time.sleep(interval)
+        st.rerun()
 
 
  # =========================================
 # PAGE 1: Solver (Random - single run)
 # =========================================
-if page.startswith("Solver"):
+def solver_page(n_ants: int, n_gens: int, tabu_steps: int):
     st.subheader("🧩 Problem Configuration (Random Instance)")
 
     st.sidebar.header("Instance Settings")
-    n_customers = st.sidebar.slider("Number of Customers", 10, 100, 25)
+    kind = st.sidebar.selectbox("Instance Type", list(INSTANCE_KINDS), index=0)
+    if INSTANCE_KINDS[kind] is None:
+        n_customers = st.sidebar.slider("Number of Customers", 10, 100, 25)
+        grid_size = st.sidebar.number_input("Grid Size", 50, 500, 100)
+    else:
+        # Solomon-style layouts; the grid grows with the number of customers
+        n_customers = st.sidebar.number_input("Number of Customers", 10, 2000, 100, step=10)
     capacity = st.sidebar.number_input("Vehicle Capacity", 50, 500, 100)
-    grid_size = st.sidebar.number_input("Grid Size", 50, 500, 100)
     tw_width = st.sidebar.slider(
         "Time Window Width Ratio",
         0.10,
@@ -90,30 +135,53 @@ if page.startswith("Solver"):
         help="Larger = looser constraints (wider time windows)",
     )
 
-    if st.button("Generate Instance & Solve"):
-        with st.spinner("Generating random instance..."):
+    jm = job_manager()
+    job_id = st.session_state.get("job_id")
+    job = jm.status(job_id) if job_id is not None else None
+    running = job is not None and not job.finished
+
+    if st.button("Generate Instance & Solve", disabled=running):
+        if INSTANCE_KINDS[kind] is None:
             instance = CVRPTWInstance(
                 num_customers=n_customers,
                 vehicle_capacity=capacity,
                 grid_size=grid_size,
                 tw_width_ratio=tw_width,
             )
-            st.session_state["instance"] = instance
-
-        with st.spinner("Running Hybrid Solver..."):
-            solution, solve_time = run_solver(
-                instance,
-                n_ants=n_ants,
-                n_gens=n_gens,
-                tabu_steps=tabu_steps,
-            )
-            st.session_state["solution"] = solution
-            st.session_state["solve_time"] = solve_time
+        else:
+            instance = generate_instance(int(n_customers), INSTANCE_KINDS[kind], vehicle_capacity=capacity,
+                                         tw_width=tw_width)
+        config = make_config(n_ants, n_gens, tabu_steps)
+        st.session_state["instance"] = instance
+        st.session_state["job_config"] = config
+        st.session_state["job_id"] = jm.submit(instance, config, label="random")
+        st.session_state.pop("solution", None)
+        st.rerun()
+
+    if running:
+        inst = st.session_state["instance"]
+        config = st.session_state["job_config"]
+        c1, c2 = st.columns([4, 1])
+        c1.progress(job_fraction(job, config),
+                    text=f"{job.stage or 'starting'} · step {job.step} · best {job.best:.2f}")
+        if c2.button("Cancel"):
+            jm.cancel(job_id)
+        if job.incumbent is not None:
+            st.subheader("Current Best (preview)")
+            st.pyplot(plot_solution(inst, jm.solution(job_id, inst)))
+    elif job is not None and "solution" not in st.session_state:
+        if job.state == "failed":
+            st.error(f"Solver failed: {job.error}")
+        else:
+            st.session_state["solution"] = jm.solution(job_id, st.session_state["instance"])
+            st.session_state["solve_time"] = job.solve_time
 
     # Display results
-    if "solution" in st.session_state:
+    if "solution" in st.session_state and not running:
         sol = st.session_state["solution"]
         inst = st.session_state["instance"]
+        if job is not None and job.state == "cancelled":
+            st.warning("Solve cancelled: showing the best solution found so far.")
 
         c1, c2, c3, c4 = st.columns(4)
         c1.metric("Total Distance", f"{sol.total_distance:.2f}")
@@ -127,7 +195,7 @@ if page.startswith("Solver"):
             st.subheader("Route Visualization")
             st.pyplot(plot_solution(inst, sol))
 
-            if hasattr(sol, "history"):
+            if sol.history:
                 st.subheader("Convergence Analysis")
                 st.pyplot(plot_convergence(sol.history))
 
@@ -153,14 +221,16 @@ if page.startswith("Solver"):
                         }
                     )
             st.dataframe(pd.DataFrame(schedule_data), height=600)
-    else:
+    elif not running:
         st.info("Adjust settings and click 'Generate Instance & Solve' to start.")
 
+    refresh_while(running)
+
 
 # =========================================
 # PAGE 2: Benchmarks (Solomon batch runs)
 # =========================================
-else:
+def benchmarks_page(n_ants: int, n_gens: int, tabu_steps: int):
     st.subheader("📊 Benchmarks (Solomon) — batch evaluation")
 
     files = list_solomon_files()
@@ -178,54 +248,97 @@ else:
         chosen_files = files
 
     runs_per_instance = st.number_input("Runs per instance (to average randomness)", min_value=1, max_value=50, value=5)
+    reuse_cached = st.checkbox(
+        "Reuse stored results (same instance, parameters, seed and code version)",
+        value=True,
+        help="Runs use seeds 0..N-1; identical runs are read back from the local results store.",
+    )
 
-    if st.button("Run Benchmarks"):
-        rows = []
-        progress = st.progress(0)
-        total_jobs = len(chosen_files) * int(runs_per_instance)
-        done = 0
+    jm = job_manager()
+    bench = st.session_state.get("bench")
+    bench_running = bench is not None and any(not j.finished for j in jm.statuses(list(bench["jobs"])))
 
+    if st.button("Run Benchmarks", disabled=bench_running):
+        store = ResultsStore()
+        config = make_config(n_ants, n_gens, tabu_steps)
+        bench = {"config": config, "params": (n_ants, n_gens, tabu_steps), "jobs": {}, "runs": {}, "hits": 0,
+                 "total": len(chosen_files) * int(runs_per_instance)}
         for fname in chosen_files:
-            path = solomon_dir() / fname
-            # Load once
-            instance = instance_from_solomon(str(path))
-
-            costs = []
-            times = []
-            vehicles = []
-            infeasible = 0
-
+            # Load once per file content (binary cache: parsing + distance matrix only on first use)
+            instance = load_instance(solomon_dir() / fname)
+            # Jobs carry only the nodes; workers build (and keep) the instance once per digest
+            spec = InstanceSpec.of(instance)
             for r in range(int(runs_per_instance)):
-                sol, dt = run_solver(instance, n_ants=n_ants, n_gens=n_gens, tabu_steps=tabu_steps)
-
-                cost = sol.fitness()  # distance si faisable, inf sinon
-                costs.append(cost)
-                times.append(dt)
-                vehicles.append(len(sol.routes))
-                if cost == float("inf") or (hasattr(sol, "is_feasible") and not sol.is_feasible):
-                    infeasible += 1
-
-                done += 1
-                progress.progress(min(1.0, done / total_jobs))
+                hit = store.get(instance, config, r) if reuse_cached else None
+                if hit is not None:
+                    bench["runs"][(fname, r)] = hit.solution, hit.solve_time
+                    bench["hits"] += 1
+                else:
+                    # Every file x run is an independent job on the pool
+                    job_id = jm.submit(spec, config, seed=r, label=f"{fname} #{r}")
+                    bench["jobs"][job_id] = (fname, r)
+        store.close()
+        st.session_state["bench"] = bench
+        st.rerun()
+
+    if bench is not None:
+        jobs = jm.statuses(list(bench["jobs"]))
+        # Collect finished jobs once and store them for later reruns / sessions
+        new_runs = [j for j in jobs if j.finished and j.state != "failed" and bench["jobs"][j.job_id] not in bench["runs"]]
+        if new_runs:
+            store = ResultsStore()
+            for j in new_runs:
+                fname, r = bench["jobs"][j.job_id]
+                instance = load_instance(solomon_dir() / fname)
+                sol = jm.solution(j.job_id, instance)
+                bench["runs"][(fname, r)] = sol, j.solve_time
+                if j.state == "done":
+                    store.put(instance, bench["config"], r, sol, j.solve_time, instance_name=fname)
+            store.close()
+        failed = [j for j in jobs if j.state == "failed"]
+        finished = sum(1 for j in jobs if j.finished) + bench["hits"]
+
+        if bench_running:
+            c1, c2 = st.columns([4, 1])
+            c1.progress(finished / max(1, bench["total"]), text=f"{finished}/{bench['total']} runs finished")
+            if c2.button("Cancel all"):
+                for j in jobs:
+                    jm.cancel(j.job_id)
+            running_jobs = [j for j in jobs if j.state == "running"]
+            if running_jobs:
+                st.dataframe(pd.DataFrame([{"run": j.label, "stage": j.stage, "step": j.step, "best": j.best}
+                                           for j in running_jobs]), use_container_width=True)
+        for j in failed:
+            st.error(f"{j.label} failed: {j.error}")
+
+        bench_ants, bench_gens, bench_steps = bench["params"]
+        rows = []
+        for fname in sorted({f for f, _ in bench["runs"]}):
+            runs = [v for (f, _), v in bench["runs"].items() if f == fname]
+            costs = [sol.fitness() for sol, _ in runs]  # distance si faisable, inf sinon
+            times = [dt for _, dt in runs]
+            vehicles = [sol.num_vehicles for sol, _ in runs]
+            infeasible = sum(1 for sol, _ in runs if sol.fitness() == float("inf") or not sol.is_feasible)
 
             # Aggregate
             costs_finite = [c for c in costs if c != float("inf")]
             row = {
                 "instance": fname,
-                "runs": int(runs_per_instance),
+                "runs": len(runs),
                 "best_cost": min(costs_finite) if costs_finite else float("inf"),
                 "avg_cost": (sum(costs_finite) / len(costs_finite)) if costs_finite else float("inf"),
                 "avg_time_s": sum(times) / len(times) if times else 0.0,
                 "avg_vehicles": sum(vehicles) / len(vehicles) if vehicles else 0.0,
                 "infeasible_runs": infeasible,
-                "aco_ants": n_ants,
-                "ga_gens": n_gens,
-                "tabu_steps": tabu_steps,
+                "aco_ants": bench_ants,
+                "ga_gens": bench_gens,
+                "tabu_steps": bench_steps,
             }
             rows.append(row)
 
+    if bench is not None and not bench_running and rows:
         df = pd.DataFrame(rows).sort_values(["avg_cost", "best_cost"], ascending=True)
-        st.success("Benchmarks finished ✅")
+        st.success(f"Benchmarks finished ✅ ({bench['hits']}/{bench['total']} runs reused from the results store)")
         st.dataframe(df, use_container_width=True)
 
         # download csv
@@ -245,3 +358,40 @@ else:
 - Run multiple times because ACO/GA are stochastic (random).
 """
         )
+
+    refresh_while(bench_running)
+
+
+# -----------------------------
+# UI
+# -----------------------------
+def main():
+    st.set_page_config(page_title="Hybrid CVRPTW Solver", layout="wide")
+
+    st.title("🚛 Hybrid CVRPTW Solver (Professional Edition)")
+    st.markdown(
+        """
+**Capacitated Vehicle Routing Problem with Time Windows**
+Solved using a hybrid pipeline: **ACO (Ant Colony) → GA (Genetic Algo) → Tabu Search**.
+"""
+    )
+
+    # ✅ 2 pages (Solver / Benchmarks)
+    page = st.sidebar.radio("Navigation", ["Solver (Random/Solomon - single run)", "Benchmarks (Solomon - batch)"])
+
+    # Shared algorithm params
+    st.sidebar.header("Algorithm Parameters")
+    n_ants = st.sidebar.slider("ACO Ants", 5, 50, 10)
+    n_gens = st.sidebar.slider("GA Generations", 10, 200, 50)
+    tabu_steps = st.sidebar.slider("Tabu Steps", 10, 200, 50)
+
+    if page.startswith("Solver"):
+        solver_page(n_ants, n_gens, tabu_steps)
+    else:
+        benchmarks_page(n_ants, n_gens, tabu_steps)
+
+
+# Streamlit runs the script as __main__. Job workers ("spawn") re-run it as __mp_main__
+# and must neither build the UI nor start another JobManager.
+if __name__ == "__main__":
+    main()
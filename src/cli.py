@@ -1,42 +1,164 @@
 import argparse
+import dataclasses
 import time
+from contextlib import nullcontext
 from src.core.models import CVRPTWInstance
 from src.solvers.hybrid import HybridSolver
-from src.config import HybridConfig, ACOConfig, GAConfig, TabuConfig
-from src.utils.logger import logger
+from src.config import (HybridConfig, ACOConfig, GAConfig, TabuConfig, ALNSConfig, RouteMinConfig,
+                        InstrumentationConfig, ConvergenceConfig)
+from src.utils.logger import logger, setup_logger
+from src.utils import trace
+from src.utils.solomon_loader import load_solomon_txt, build_instance, instance_from_solomon
 
 def main():
     parser = argparse.ArgumentParser(description="Hybrid CVRPTW Solver CLI")
     parser.add_argument("--customers", type=int, default=25, help="Number of customers")
+    parser.add_argument("--solomon", type=str, default=None,
+                        help="Load a Solomon/Gehring-Homberger instance file instead of a random instance")
+    parser.add_argument("--instance-cache", action="store_true",
+                        help="Load --solomon files through the binary instance cache")
+    parser.add_argument("--distance-matrix", type=str, default=None,
+                        help="Memory-map a precomputed (possibly asymmetric) .npy matrix for --solomon nodes")
+    parser.add_argument("--seed", type=int, default=None, help="Master seed (instance generation and solver streams)")
     parser.add_argument("--capacity", type=int, default=100, help="Vehicle capacity")
+    parser.add_argument("--kind", choices=("c", "r", "rc"), default=None,
+                        help="Generate a Solomon-style clustered / random / mixed instance (needs NumPy)")
+    parser.add_argument("--tw-width", type=float, default=0.1,
+                        help="Time-window width as a fraction of the horizon (--kind instances)")
     parser.add_argument("--ants", type=int, default=10, help="Number of ACO ants")
     parser.add_argument("--gens", type=int, default=50, help="Number of GA generations")
+    parser.add_argument("--education", action="store_true",
+                        help="Improve every GA child with a granular local search (memetic GA)")
+    parser.add_argument("--education-moves", type=int, default=1000,
+                        help="Moves evaluated per GA child by --education")
     parser.add_argument("--steps", type=int, default=50, help="Number of Tabu steps")
+    parser.add_argument("--tabu-infeasible", action="store_true",
+                        help="Let Tabu search through infeasible solutions with adaptive penalties")
+    parser.add_argument("--improvement", choices=("tabu", "alns", "tabu+alns"), default="tabu",
+                        help="Improvement stage(s) run after the GA")
+    parser.add_argument("--alns-iters", type=int, default=200, help="Number of ALNS iterations")
+    parser.add_argument("--route-min", action="store_true", help="Run the route elimination stage after the GA")
+    parser.add_argument("--objective", choices=("distance", "vehicles"), default="distance",
+                        help="'vehicles' minimises the fleet size first, then distance")
+    parser.add_argument("--preset", type=str, default=None,
+                        help="HybridConfig JSON preset (e.g. from src.utils.tuning); replaces the stage options above")
+    parser.add_argument("--time-limit", type=float, default=None, help="Wall-clock budget of the solve in seconds")
+    parser.add_argument("--target-gap", type=float, default=None,
+                        help="Stop once the cost is within this relative gap of the lower bound (e.g. 0.05)")
+    parser.add_argument("--patience", type=int, default=None,
+                        help="Stop a stage after this many iterations without a new best")
+    parser.add_argument("--min-rate", type=float, default=None,
+                        help="Stop a stage when its relative improvement per second falls below this")
+    parser.add_argument("--min-diversity", type=float, default=None,
+                        help="Stop the GA when distinct costs / population size falls below this")
+    parser.add_argument("--log-file", type=str, default="solver.log", help="Log file ('' to disable)")
+    parser.add_argument("--metrics", action="store_true", help="Collect and print per-stage metrics")
+    parser.add_argument("--metrics-file", type=str, default=None,
+                        help="Write per-stage metrics to this OpenMetrics text file (implies --metrics)")
+    parser.add_argument("--trace-memory", action="store_true", help="Track peak allocations with tracemalloc")
+    parser.add_argument("--trace", type=str, default=None, help="Write a JSONL solver event trace to this file")
+    parser.add_argument("--trace-sample", type=int, default=1,
+                        help="Emit iteration events every N iterations (incumbent changes are always traced)")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=("cprofile", "sampling"), default=None,
+                        help="Profile loading, matrix construction and each solver stage separately")
+    parser.add_argument("--profile-dir", type=str, default="profiles",
+                        help="Directory for per-stage .pstats and .collapsed files")
+    parser.add_argument("--profile-interval", type=float, default=0.005,
+                        help="Sampling interval in seconds (sampling mode)")
+    parser.add_argument("--profile-top", type=int, default=10, help="Number of hot functions to print per stage")
     
     args = parser.parse_args()
+    setup_logger(log_file=args.log_file)
     
     logger.info("Starting Solver via CLI")
+
+    profiler = None
+    if args.profile:
+        from src.utils.profiling import StageProfiler
+        profiler = StageProfiler(args.profile, out_dir=args.profile_dir, interval=args.profile_interval)
+
+    def profiled(name):
+        return profiler.stage(name) if profiler is not None else nullcontext()
+
+    if args.solomon and args.instance_cache:
+        with profiled("load"):
+            instance = instance_from_solomon(args.solomon, use_cache=True)
+    elif args.solomon:
+        with profiled("load"):
+            nodes, capacity = load_solomon_txt(args.solomon)
+        with profiled("matrix"):
+            matrix = None
+            if args.distance_matrix:
+                from src.utils.shared_matrix import MappedMatrix
+                matrix = MappedMatrix(args.distance_matrix, expected_size=len(nodes))
+            instance = build_instance(nodes, capacity, distance_matrix=matrix)
+    elif args.kind:
+        from src.utils.instance_generator import generate_instance
+        with profiled("generate"):
+            instance = generate_instance(args.customers, args.kind, seed=args.seed,
+                                         vehicle_capacity=args.capacity, tw_width=args.tw_width)
+    else:
+        with profiled("generate"):
+            instance = CVRPTWInstance(
+                num_customers=args.customers,
+                vehicle_capacity=args.capacity,
+                seed=args.seed,
+            )
     
-    instance = CVRPTWInstance(
-        num_customers=args.customers,
-        vehicle_capacity=args.capacity
-    )
-    
-    config = HybridConfig(
-        aco=ACOConfig(n_ants=args.ants),
-        ga=GAConfig(generations=args.gens),
-        tabu=TabuConfig(max_steps=args.steps)
+    instrumentation = InstrumentationConfig(
+        enabled=args.metrics or args.metrics_file is not None,
+        trace_memory=args.trace_memory,
+        openmetrics_path=args.metrics_file,
     )
+    conv = ConvergenceConfig(patience=args.patience, min_rate=args.min_rate)
+    if args.preset:
+        from src.utils.tuning import load_preset
+        config = dataclasses.replace(load_preset(args.preset), seed=args.seed, instrumentation=instrumentation)
+    else:
+        config = HybridConfig(
+            aco=ACOConfig(n_ants=args.ants, convergence=conv),
+            ga=GAConfig(generations=args.gens, convergence=conv, min_diversity=args.min_diversity,
+                        education=args.education, education_moves=args.education_moves),
+            tabu=TabuConfig(max_steps=args.steps, allow_infeasible=args.tabu_infeasible, convergence=conv),
+            alns=ALNSConfig(iterations=args.alns_iters, convergence=conv),
+            improvement=args.improvement,
+            route_min=RouteMinConfig(enabled=args.route_min),
+            objective=args.objective,
+            seed=args.seed,
+            instrumentation=instrumentation,
+        )
+    if args.time_limit is not None:
+        config.time_limit = args.time_limit
+    if args.target_gap is not None:
+        config.target_gap = args.target_gap
+    if config.target_gap is not None and config.objective != "distance":
+        parser.error("--target-gap needs the distance objective (its lower bound is on distance)")
     
-    solver = HybridSolver(instance, config)
+    solver = HybridSolver(instance, config, profiler=profiler)
     
+    # Decomposition workers write to the same trace through a process queue
+    multiprocess = solver.decompose and config.decomposition.max_workers != 0
+    writer = trace.start(args.trace, sample_every=args.trace_sample, multiprocess=multiprocess) if args.trace else None
     start_time = time.time()
-    solution = solver.solve()
+    try:
+        solution = solver.solve()
+    finally:
+        if writer is not None:
+            trace.stop(writer)
     end_time = time.time()
     
     logger.info(f"Solved in {end_time - start_time:.2f}s")
     logger.info(f"Total Distance: {solution.total_distance:.2f}")
+    logger.info(f"Vehicles: {solution.num_vehicles}")
     logger.info(f"Feasible: {solution.is_feasible}")
+    logger.info(f"Seed: {solution.seed}")
+    if solution.lower_bound:
+        logger.info(f"Lower bound: {solution.lower_bound:.2f} (gap {solution.fitness() / solution.lower_bound - 1:.1%})")
+    if solution.metrics is not None:
+        logger.info("Stage metrics:\n" + solution.metrics.summary())
+    if profiler is not None:
+        print(profiler.summary(args.profile_top))
+        logger.info(f"Profiles written to {args.profile_dir}")
 
 if __name__ == "__main__":
     main()
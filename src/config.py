@@ -1,4 +1,12 @@
-from dataclasses import dataclass, field
+from dataclasses import MISSING, dataclass, field, fields, is_dataclass
+from typing import Dict, Optional
+
+@dataclass
+class ConvergenceConfig:
+    """Early stop of an iterative stage; every criterion is off when None."""
+    patience: Optional[int] = None  # iterations without a new best
+    min_rate: Optional[float] = None  # relative improvement per second, measured over rate_window
+    rate_window: float = 2.0  # seconds
 
 @dataclass
 class ACOConfig:
@@ -7,6 +15,7 @@ class ACOConfig:
     beta: float = 2.0
     rho: float = 0.1
     iterations: int = 5
+    convergence: ConvergenceConfig = field(default_factory=ConvergenceConfig)
 
 @dataclass
 class GAConfig:
@@ -14,15 +23,105 @@ class GAConfig:
     generations: int = 50
     mutation_rate: float = 0.1
     elitism_size: int = 1
+    convergence: ConvergenceConfig = field(default_factory=ConvergenceConfig)
+    # Stop when distinct costs / population size falls below this (None: off)
+    min_diversity: Optional[float] = None
+    # Improve every child with a granular local search (src.solvers.education) of at most
+    # education_moves evaluated moves towards each customer's education_neighbors nearest
+    # customers; children that duplicate an individual are then skipped
+    education: bool = False
+    education_neighbors: int = 10
+    education_moves: int = 1000
 
 @dataclass
 class TabuConfig:
     max_steps: int = 50
     tabu_tenure: int = 10
     neighborhood_size: int = 50
+    # Search through infeasible solutions with penalised capacity excess and time warp
+    allow_infeasible: bool = False
+    penalty_capacity: float = 10.0  # initial weights, adapted during the search
+    penalty_time_warp: float = 10.0
+    target_feasible: float = 0.5  # share of steps the current solution should satisfy each constraint
+    penalty_interval: int = 10  # steps between weight updates
+    convergence: ConvergenceConfig = field(default_factory=ConvergenceConfig)
+
+@dataclass
+class ALNSConfig:
+    iterations: int = 200
+    min_removal: int = 5
+    max_removal_ratio: float = 0.2  # at most this fraction of customers removed per iteration
+    regret_k: int = 3
+    segment_length: int = 50  # iterations between operator weight updates
+    reaction: float = 0.1
+    start_temperature_ratio: float = 0.05  # a solution this much worse starts at 50% acceptance
+    cooling_rate: float = 0.995
+    convergence: ConvergenceConfig = field(default_factory=ConvergenceConfig)
+
+@dataclass
+class RouteMinConfig:
+    enabled: bool = False
+    max_iterations: int = 1000  # ejection-pool iterations allowed per eliminated route
+    max_ejected: int = 2  # customers an ejection insertion may remove (1 or 2)
+
+@dataclass
+class InstrumentationConfig:
+    enabled: bool = False
+    trace_memory: bool = False  # tracemalloc peaks; noticeably slower than RSS only
+    openmetrics_path: Optional[str] = None
+
+@dataclass
+class DecompositionConfig:
+    enabled: bool = False
+    method: str = "polar"  # initial partition: "polar" | "cluster"; later rounds regroup whole routes
+    target_size: int = 100  # customers per subproblem; smaller instances are solved directly
+    rounds: int = 2  # re-partition / re-solve rounds after the initial merge
+    max_workers: Optional[int] = None  # 0 solves subproblems in-process
+    time_weight: float = 1.0  # weight of time-window centres vs. coordinates ("cluster")
 
 @dataclass
 class HybridConfig:
     aco: ACOConfig = field(default_factory=ACOConfig)
     ga: GAConfig = field(default_factory=GAConfig)
     tabu: TabuConfig = field(default_factory=TabuConfig)
+    alns: ALNSConfig = field(default_factory=ALNSConfig)
+    # Route elimination between GA and the improvement stage(s)
+    route_min: RouteMinConfig = field(default_factory=RouteMinConfig)
+    # Improvement stages after GA: "tabu", "alns" or "tabu+alns"
+    improvement: str = "tabu"
+    # "distance", or "vehicles": fewest vehicles first, then distance
+    objective: str = "distance"
+    instrumentation: InstrumentationConfig = field(default_factory=InstrumentationConfig)
+    decomposition: DecompositionConfig = field(default_factory=DecompositionConfig)
+    # Master seed; every stage derives its own stream from it. None draws one from `random`.
+    seed: Optional[int] = None
+    # Wall-clock budget of a solve in seconds (None: iteration counts only). Each stage
+    # gets its time_shares part of the time still left when it starts, so time a stage
+    # does not use (early convergence) goes to the stages after it.
+    time_limit: Optional[float] = None
+    time_shares: Dict[str, float] = field(default_factory=lambda: {
+        "ACO": 1.0, "GA": 2.0, "RouteMin": 1.0, "Tabu": 3.0, "ALNS": 3.0})
+    # Stop as soon as the incumbent is within this relative gap of the instance's
+    # lower bound (src.core.bounds), e.g. 0.05; None runs the full budget.
+    target_gap: Optional[float] = None
+
+
+def config_from_dict(data: dict, cls=HybridConfig):
+    """
+    Builds a config from a (possibly partial, nested) dict such as a JSON
+    request body; missing fields keep their defaults. Unknown keys and non-object
+    values for nested configs raise ValueError.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"{cls.__name__} must be an object, got {type(data).__name__}")
+    known = {f.name: f for f in fields(cls)}
+    unknown = set(data) - set(known)
+    if unknown:
+        raise ValueError(f"Unknown {cls.__name__} field(s): {', '.join(sorted(unknown))}")
+    kwargs = {}
+    for name, value in data.items():
+        default = known[name].default_factory if known[name].default_factory is not MISSING else None
+        if default is not None and is_dataclass(default):
+            value = config_from_dict(value, default)
+        kwargs[name] = value
+    return cls(**kwargs)
@@ -0,0 +1,243 @@
+"""
+Cheap lower bounds on the number of vehicles and the cost of any feasible
+solution, so a run can stop once its incumbent is provably close to optimal.
+
+Vehicles: the largest of
+  - ceil(total demand / capacity),
+  - the number of customers heavier than half a vehicle (no two share a route),
+  - a clique in the conflict graph, where two customers conflict when their
+    demands exceed the capacity together or neither visiting order meets
+    both time windows and the return to the depot (greedy, so a valid but
+    not necessarily maximum clique). Visiting orders are timed with
+    straight-line distances, and only when the matrix never undercuts them.
+Distance, for each possible route count K, the largest of
+  - a K-forest relaxation (a 1-tree with K depot edges): the customer-only
+    parts of K routes form a spanning forest with K components, so they cost
+    at least the MST minus its K-1 longest edges; the routes add K edges out
+    of and K edges into the depot, at least the K shortest of each;
+  - the assignment relaxation (each customer has one successor and one
+    predecessor, the depot K of each), bounded by its row-then-column and
+    column-then-row reduction duals.
+Only the distance matrix is used (read [from][to], asymmetric allowed; the
+forest uses min(d_ij, d_ji)). The quadratic parts are skipped above
+_MAX_QUADRATIC customers, leaving the demand bounds and row minima.
+
+The result is cached on the instance, like its digest.
+"""
+import math
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from src.core.models import CVRPTWInstance, matrix_row
+
+INF = float("inf")
+# Customers above which the O(n^2) Python loops (forest, column reduction, conflicts) are skipped
+_MAX_QUADRATIC = 1000
+# Start vertices tried by the greedy clique search
+_CLIQUE_STARTS = 30
+_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class LowerBounds:
+    vehicles: int
+    # Distance bound for each feasible route count K = vehicles .. num_customers
+    by_vehicles: Tuple[float, ...]
+
+    @property
+    def distance(self) -> float:
+        return min(self.by_vehicles, default=0.0)
+
+    def cost(self, vehicle_cost: float = 0.0) -> float:
+        """Bound on Solution.fitness() for a fixed cost per vehicle."""
+        if not self.by_vehicles:
+            return 0.0
+        return min(d + vehicle_cost * k for k, d in enumerate(self.by_vehicles, start=self.vehicles))
+
+    def gap(self, cost: float, vehicle_cost: float = 0.0) -> float:
+        """Relative gap of a solution cost to the bound (inf if the bound is 0)."""
+        lb = self.cost(vehicle_cost)
+        return (cost - lb) / lb if lb > 0 else INF
+
+
+def lower_bounds(instance: CVRPTWInstance) -> LowerBounds:
+    cached = getattr(instance, "_bounds", None)
+    if cached is not None:
+        return cached
+    n = instance.num_customers
+    dm = instance.distance_matrix
+    quadratic = n <= _MAX_QUADRATIC
+    vehicles = vehicle_bound(instance, conflicts=quadratic)
+    ks = range(vehicles, n + 1)
+    curves = [_row_minima_bound(dm, n)]
+    if quadratic and n > 0:
+        curves.append(_column_reduction_bound(dm, n))
+        curves.append(_forest_bound(dm, n))
+    by_vehicles = tuple(max(curve(k) for curve in curves) for k in ks)
+    instance._bounds = LowerBounds(vehicles, by_vehicles)
+    return instance._bounds
+
+
+# --- Vehicles -----------------------------------------------------------------
+
+def vehicle_bound(instance: CVRPTWInstance, conflicts: bool = True) -> int:
+    customers = instance.get_customers()
+    if not customers:
+        return 0
+    q = instance.vehicle_capacity
+    bound = max(math.ceil(sum(c.demand for c in customers) / q - _EPS),
+                sum(1 for c in customers if c.demand > q / 2))
+    if conflicts:
+        bound = max(bound, len(greedy_clique(conflict_graph(instance))))
+    return max(bound, 1)
+
+
+def conflict_graph(instance: CVRPTWInstance) -> List[set]:
+    """
+    adj[i] (customer ids, index 0 unused): customers that can never share a route with i.
+    Time-window conflicts need travel times that no detour can beat, which a matrix without
+    the triangle inequality does not give; straight-line distances do whenever no arc of the
+    matrix is shorter than its straight line. Otherwise only capacity conflicts are used.
+    """
+    nodes = instance.nodes
+    n = len(nodes) - 1
+    q = instance.vehicle_capacity
+    depot_due = nodes[0].due_date
+    demand = [nd.demand for nd in nodes]
+    ready = [nd.ready_time for nd in nodes]
+    due = [nd.due_date for nd in nodes]
+    service = [nd.service_time for nd in nodes]
+    xs = [nd.x for nd in nodes]
+    ys = [nd.y for nd in nodes]
+    timed = _dominates_euclidean(instance)
+    # Travel time from / to the depot and earliest departure from i as the first customer of a route
+    from_depot = [math.hypot(xs[i] - xs[0], ys[i] - ys[0]) for i in range(n + 1)]
+    leave = [max(from_depot[i], ready[i]) + service[i] for i in range(n + 1)]
+    adj = [set() for _ in range(n + 1)]
+
+    def order_ok(i, j, dij):
+        t = max(leave[i] + dij, ready[j])
+        return t <= due[j] + _EPS and t + service[j] + from_depot[j] <= depot_due + _EPS
+
+    for i in range(1, n + 1):
+        xi, yi = xs[i], ys[i]
+        for j in range(i + 1, n + 1):
+            if demand[i] + demand[j] > q + _EPS:
+                conflict = True
+            elif timed:
+                dij = math.hypot(xs[j] - xi, ys[j] - yi)
+                conflict = not (order_ok(i, j, dij) or order_ok(j, i, dij))
+            else:
+                continue
+            if conflict:
+                adj[i].add(j)
+                adj[j].add(i)
+    return adj
+
+
+def _dominates_euclidean(instance: CVRPTWInstance) -> bool:
+    """True if no arc of the distance matrix is shorter than the straight line between its nodes."""
+    nodes = instance.nodes
+    xs = [nd.x for nd in nodes]
+    ys = [nd.y for nd in nodes]
+    for i in range(len(nodes)):
+        row = matrix_row(instance.distance_matrix, i)
+        xi, yi = xs[i], ys[i]
+        for j in range(len(nodes)):
+            e = math.hypot(xs[j] - xi, ys[j] - yi)
+            if row[j] < e - _EPS * (1.0 + e):
+                return False
+    return True
+
+
+def greedy_clique(adj: List[set]) -> List[int]:
+    """Largest of the cliques grown greedily (highest-degree candidate first) from the top-degree vertices."""
+    order = sorted(range(1, len(adj)), key=lambda v: len(adj[v]), reverse=True)
+    best: List[int] = order[:1]
+    for v in order[:_CLIQUE_STARTS]:
+        if len(adj[v]) + 1 <= len(best):
+            break
+        clique = [v]
+        cand = set(adj[v])
+        while cand:
+            u = max(cand, key=lambda w: len(adj[w]))
+            clique.append(u)
+            cand &= adj[u]
+        if len(clique) > len(best):
+            best = clique
+    return best
+
+
+# --- Distance (each returns a function of the route count K) -------------------
+
+def _smallest_sums(values: List[float]) -> List[float]:
+    """prefix[k] = sum of the k smallest values."""
+    prefix = [0.0]
+    for v in sorted(values):
+        prefix.append(prefix[-1] + v)
+    return prefix
+
+
+def _row_minima_bound(dm, n: int):
+    """Each customer leaves along its cheapest arc; the depot K times along its cheapest ones."""
+    out0 = matrix_row(dm, 0)
+    total = 0.0
+    for i in range(1, n + 1):
+        row = matrix_row(dm, i)
+        total += min(min(row[:i]), min(row[i + 1:], default=INF))
+    depot = _smallest_sums(out0[1:])
+    return lambda k: total + depot[k]
+
+
+def _column_reduction_bound(dm, n: int):
+    """
+    Dual bounds of the assignment relaxation (depot with multiplicity K, no
+    depot-to-depot arc): reduce rows then columns, and columns then rows.
+    Both are linear in K.
+    """
+    rows = [matrix_row(dm, i) for i in range(n + 1)]
+    m = n + 1
+
+    def reduce(cost):
+        # u_i = min_j cost(i, j); v_j = min_i cost(i, j) - u_i; bound = K(u_0 + v_0) + sum of the rest
+        u = [min(cost(i, j) for j in range(m) if j != i) for i in range(m)]
+        v = [min(cost(i, j) - u[i] for i in range(m) if i != j) for j in range(m)]
+        return u[0] + v[0], sum(u[1:]) + sum(v[1:])
+
+    rc = reduce(lambda i, j: rows[i][j])
+    cr = reduce(lambda i, j: rows[j][i])
+    return lambda k: max(rc[0] * k + rc[1], cr[0] * k + cr[1])
+
+
+def _forest_bound(dm, n: int):
+    """K-forest bound: MST over customers minus its K-1 longest edges, plus K depot arcs each way."""
+    best = [INF] * (n + 1)
+    in_tree = [False] * (n + 1)
+    edges = []
+    u = 1
+    in_tree[1] = True
+    for _ in range(n - 1):
+        row = matrix_row(dm, u)
+        nxt, nxt_w = 0, INF
+        for v in range(2, n + 1):
+            if in_tree[v]:
+                continue
+            w = row[v]
+            back = dm[v][u]
+            if back < w:
+                w = back
+            if w < best[v]:
+                best[v] = w
+            if best[v] < nxt_w:
+                nxt, nxt_w = v, best[v]
+        in_tree[nxt] = True
+        edges.append(float(nxt_w))
+        u = nxt
+    mst = sum(edges)
+    longest = [0.0]
+    for w in sorted(edges, reverse=True):
+        longest.append(longest[-1] + w)
+    out0 = _smallest_sums(matrix_row(dm, 0)[1:])
+    in0 = _smallest_sums([float(dm[i][0]) for i in range(1, n + 1)])
+    return lambda k: mst - longest[k - 1] + out0[k] + in0[k]
+
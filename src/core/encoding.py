@@ -0,0 +1,199 @@
+"""
+Compact, instance-free solution encodings.
+
+A Solution references its CVRPTWInstance and every Route holds Node objects and
+a schedule, so pickling one drags the whole instance (distance matrix included)
+along. CompactSolution keeps only customer-id sequences plus the cached
+objective values; the receiver rebuilds the Solution against its own copy of
+the instance.
+
+Stable export formats (for storing solutions):
+- JSON: {"format": "cvrptw-solution", "version": 1, "routes": [[ids...], ...], ...}
+- binary: little-endian header followed by uint32 route lengths and customer ids
+"""
+import hashlib
+import json
+import struct
+from array import array
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from src.core.models import CVRPTWInstance, Route
+from src.core.solution import Solution
+
+FORMAT_NAME = "cvrptw-solution"
+FORMAT_VERSION = 1
+_MAGIC = b"CVRS"
+# magic, version, n_routes, n_ids, total_distance, total_wait, is_feasible
+_HEADER = struct.Struct("<4sHIIddB")
+
+
+@dataclass(frozen=True)
+class CompactSolution:
+    """Route customer ids (depots omitted) plus cached objective values. Cheap to pickle."""
+    routes: Tuple[Tuple[int, ...], ...]
+    total_distance: float
+    total_wait: float
+    is_feasible: bool
+
+    @property
+    def num_vehicles(self) -> int:
+        return sum(1 for r in self.routes if r)
+
+
+def encode_solution(solution: Solution) -> CompactSolution:
+    return CompactSolution(
+        routes=tuple(tuple(n.id for n in r.nodes if n.id != 0) for r in solution.routes),
+        total_distance=float(solution.total_distance),
+        total_wait=float(solution.total_wait),
+        is_feasible=bool(solution.is_feasible),
+    )
+
+
+def decode_solution(compact: CompactSolution, instance: CVRPTWInstance, verify: bool = False) -> Solution:
+    """
+    Rebuilds a Solution against an instance the receiver already holds.
+    Schedules are recomputed (O(n)); feasibility and objective values are taken from
+    the encoding unless verify=True, which re-evaluates the solution from scratch.
+    """
+    nodes = instance.nodes
+    depot = nodes[0]
+    routes = [Route(nodes=[depot] + [nodes[i] for i in ids] + [depot]) for ids in compact.routes]
+    if verify:
+        return Solution(routes, instance)
+
+    return Solution.from_metrics(routes, instance, compact.total_distance, compact.total_wait,
+                                 compact.is_feasible, compact.num_vehicles)
+
+
+def _nodes_hash(nodes, vehicle_capacity: float):
+    h = hashlib.sha256()
+    h.update(struct.pack("<d", float(vehicle_capacity)))
+    packer = struct.Struct("<i6d")
+    for n in nodes:
+        h.update(packer.pack(n.id, n.x, n.y, n.demand, n.ready_time, n.due_date, n.service_time))
+    return h
+
+
+def nodes_digest(nodes, vehicle_capacity: float) -> str:
+    """instance_digest of a Euclidean instance from its nodes alone (no distance matrix needed)."""
+    return _nodes_hash(nodes, vehicle_capacity).hexdigest()
+
+
+def _matrix_hash(h, matrix):
+    if hasattr(matrix, "flags"):
+        # NumPy array or memory map: hashed in place when contiguous
+        h.update(matrix if matrix.flags.c_contiguous else matrix.tobytes())
+    else:
+        # Same bytes as a float64 array of the same values
+        for row in matrix:
+            h.update(array("d", row))
+
+
+def instance_digest(instance: CVRPTWInstance) -> str:
+    """
+    Content hash of an instance (nodes, capacity and, unless it is the Euclidean one
+    of the nodes, the distance matrix). Cached on the instance; used to check a
+    solution belongs to it.
+    """
+    cached = getattr(instance, "_digest", None)
+    if cached is not None:
+        return cached
+    h = _nodes_hash(instance.nodes, instance.vehicle_capacity)
+    if getattr(instance, "matrix_handle", None) is not None:
+        h.update(instance.matrix_handle.array.tobytes())
+    elif not getattr(instance, "euclidean", False):
+        _matrix_hash(h, instance.distance_matrix)
+    instance._digest = h.hexdigest()
+    return instance._digest
+
+
+def solution_to_dict(solution: Solution) -> dict:
+    return compact_to_dict(encode_solution(solution), instance_digest(solution.instance))
+
+
+def compact_to_dict(compact: CompactSolution, digest: Optional[str]) -> dict:
+    """Same export as solution_to_dict, from an encoded solution and its instance digest."""
+    return {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "instance": digest,
+        "total_distance": compact.total_distance,
+        "total_wait": compact.total_wait,
+        "is_feasible": compact.is_feasible,
+        "vehicles": compact.num_vehicles,
+        "routes": [list(r) for r in compact.routes],
+    }
+
+
+def solution_from_dict(data: dict, instance: CVRPTWInstance, verify: bool = False) -> Solution:
+    if data.get("format") != FORMAT_NAME or data.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported solution format {data.get('format')!r} v{data.get('version')!r}")
+    digest = data.get("instance")
+    if digest is not None and digest != instance_digest(instance):
+        raise ValueError("Solution was computed for a different instance")
+    compact = CompactSolution(
+        routes=tuple(tuple(int(i) for i in r) for r in data["routes"]),
+        total_distance=float(data["total_distance"]),
+        total_wait=float(data["total_wait"]),
+        is_feasible=bool(data["is_feasible"]),
+    )
+    return decode_solution(compact, instance, verify=verify)
+
+
+def solution_to_json(solution: Solution) -> str:
+    return json.dumps(solution_to_dict(solution), separators=(",", ":"))
+
+
+def solution_from_json(text: str, instance: CVRPTWInstance, verify: bool = False) -> Solution:
+    return solution_from_dict(json.loads(text), instance, verify=verify)
+
+
+def compact_to_bytes(compact: CompactSolution) -> bytes:
+    lengths = array("I", (len(r) for r in compact.routes))
+    ids = array("I", (i for r in compact.routes for i in r))
+    if struct.pack("=I", 1) != struct.pack("<I", 1):  # keep the payload little-endian
+        lengths.byteswap()
+        ids.byteswap()
+    header = _HEADER.pack(_MAGIC, FORMAT_VERSION, len(lengths), len(ids),
+                          compact.total_distance, compact.total_wait, int(compact.is_feasible))
+    return header + lengths.tobytes() + ids.tobytes()
+
+
+def compact_from_bytes(data: bytes) -> CompactSolution:
+    magic, version, n_routes, n_ids, dist, wait, feasible = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Not a cvrptw binary solution (or unsupported version)")
+    offset = _HEADER.size
+    lengths = array("I")
+    lengths.frombytes(data[offset:offset + 4 * n_routes])
+    offset += 4 * n_routes
+    ids = array("I")
+    ids.frombytes(data[offset:offset + 4 * n_ids])
+    if struct.pack("=I", 1) != struct.pack("<I", 1):
+        lengths.byteswap()
+        ids.byteswap()
+    routes = []
+    pos = 0
+    for length in lengths:
+        routes.append(tuple(ids[pos:pos + length]))
+        pos += length
+    return CompactSolution(tuple(routes), dist, wait, bool(feasible))
+
+
+def save_solution(solution: Solution, path: str):
+    """Writes JSON for *.json paths, the binary format otherwise."""
+    if str(path).endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(solution_to_json(solution))
+    else:
+        with open(path, "wb") as f:
+            f.write(compact_to_bytes(encode_solution(solution)))
+
+
+def load_solution(path: str, instance: CVRPTWInstance, verify: bool = False) -> Solution:
+    if str(path).endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return solution_from_json(f.read(), instance, verify=verify)
+    with open(path, "rb") as f:
+        return decode_solution(compact_from_bytes(f.read()), instance, verify=verify)
@@ -1,7 +1,11 @@
+import copy
 import math
 import random
 from dataclasses import dataclass, field
-from typing import List, Tuple, Optional
+from typing import Callable, List, Tuple, Optional, Sequence
+from src.utils import instrumentation
+from src.utils.instance_from_nodes import build_distance_matrix
+from src.utils.shared_matrix import MatrixHandle, SharedMatrix
 
 @dataclass(frozen=True)
 class Node:
@@ -38,6 +42,10 @@ class Route:
         if not self.nodes:
             return True
 
+        stats = instrumentation.active
+        if stats is not None:
+            stats.feasibility_checks += 1
+
         # 1. Check Capacity
         if sum(node.demand for node in self.nodes) > capacity:
             return False
@@ -54,11 +62,16 @@ class Route:
         # If it doesn't, we can't check feasibility correctly without knowing the depot.
         # For this implementation, we will ensure Route objects always include Depots at start/end.
         
+        # NumPy matrices: one .item() lookup returns a plain float ([i][j] builds a row view, then a scalar)
+        item = getattr(distance_matrix, "item", None)
         for i in range(len(self.nodes) - 1):
             curr_node = self.nodes[i]
             next_node = self.nodes[i+1]
             
-            dist = distance_matrix[curr_node.id][next_node.id]
+            if item is None:
+                dist = distance_matrix[curr_node.id][next_node.id]
+            else:
+                dist = item(curr_node.id, next_node.id)
             arrival_time = current_time + dist
             
             # Wait if early
@@ -93,11 +106,15 @@ class Route:
         # Actually, depot might have a window, but usually we start at 0.
         self.schedule.append((0.0, 0.0, 0.0, 0.0)) 
         
+        item = getattr(distance_matrix, "item", None)  # see is_feasible
         for i in range(len(self.nodes) - 1):
             curr_node = self.nodes[i]
             next_node = self.nodes[i+1]
             
-            dist = distance_matrix[curr_node.id][next_node.id]
+            if item is None:
+                dist = distance_matrix[curr_node.id][next_node.id]
+            else:
+                dist = item(curr_node.id, next_node.id)
             self.total_distance += dist
             
             arrival_time = self.schedule[-1][3] + dist # Depart of prev + dist
@@ -109,6 +126,11 @@ class Route:
             self.schedule.append((arrival_time, wait_time, start_service, departure_time))
             self.total_load += next_node.demand
 
+def matrix_row(distance_matrix, i: int) -> List[float]:
+    """Row i as plain floats: list rows as they are, NumPy rows converted in one call."""
+    row = distance_matrix[i]
+    return row if isinstance(row, list) else row.tolist()
+
 class CVRPTWInstance:
     """
     Manages the problem instance: nodes, constraints, and distance matrix.
@@ -116,15 +138,69 @@ class CVRPTWInstance:
     def __init__(self, num_customers: int, vehicle_capacity: float, 
                  min_demand: int = 1, max_demand: int = 10,
                  grid_size: int = 100, time_horizon: int = 200,
-                 tw_width_ratio: float = 0.2):
+                 tw_width_ratio: float = 0.2, seed: Optional[int] = None):
+        self._init_fields(num_customers, vehicle_capacity, [], [], euclidean=True)
+        
+        # Dedicated generator when seeded; otherwise the global `random` module as before
+        rng = random.Random(seed) if seed is not None else random
+        self._generate_random_instance(min_demand, max_demand, grid_size, time_horizon, tw_width_ratio, rng)
+
+    @classmethod
+    def from_nodes(cls, nodes: List[Node], vehicle_capacity: float,
+                   distance_matrix=None,
+                   matrix_builder: Callable[[List[Node]], List[List[float]]] = build_distance_matrix,
+                   euclidean: Optional[bool] = None) -> 'CVRPTWInstance':
+        """
+        Builds an instance from existing nodes (depot first, ids 0..n).
+        The distance matrix is taken as given when provided (cached, external or
+        asymmetric matrices, indexed [from][to]); otherwise it is built once with
+        matrix_builder. A MatrixHandle (MappedMatrix / SharedMatrix) is used
+        zero-copy and only the handle is pickled when the instance is sent to workers.
+        euclidean says whether the matrix is the Euclidean distances of the nodes;
+        None means only when built here by build_distance_matrix.
+        """
+        if not nodes or nodes[0].id != 0:
+            raise ValueError("nodes must start with the depot (id 0)")
+        nodes = list(nodes)
+        handle = None
+        if euclidean is None:
+            euclidean = distance_matrix is None and matrix_builder is build_distance_matrix
+        if isinstance(distance_matrix, MatrixHandle):
+            handle = distance_matrix
+            distance_matrix = distance_matrix.array
+        if distance_matrix is None:
+            distance_matrix = matrix_builder(nodes)
+        elif len(distance_matrix) != len(nodes):
+            raise ValueError(f"distance matrix has {len(distance_matrix)} rows for {len(nodes)} nodes")
+        inst = cls.__new__(cls)
+        inst._init_fields(len(nodes) - 1, vehicle_capacity, nodes, distance_matrix, handle, euclidean)
+        return inst
+
+    def _init_fields(self, num_customers: int, vehicle_capacity: float, nodes: List[Node],
+                     distance_matrix, matrix_handle: Optional[MatrixHandle] = None, euclidean: bool = False):
+        """Every instance attribute, set in one place for __init__ and the factories."""
         self.num_customers = num_customers
         self.vehicle_capacity = vehicle_capacity
-        self.nodes: List[Node] = []
-        self.distance_matrix: List[List[float]] = []
-        
-        self._generate_random_instance(min_demand, max_demand, grid_size, time_horizon, tw_width_ratio)
+        self.nodes: List[Node] = nodes
+        self.distance_matrix: List[List[float]] = distance_matrix
+        # Set when distance_matrix is a view on a memory-mapped file or shared memory
+        self.matrix_handle: Optional[MatrixHandle] = matrix_handle
+        # True when distance_matrix holds the Euclidean distances of the nodes, which
+        # then identify the instance on their own (see src.core.encoding.instance_digest)
+        self.euclidean = euclidean
+        # Fixed cost per used vehicle, added to the objective (Solution.fitness)
+        self.vehicle_cost = 0.0
+
+    @classmethod
+    def from_arrays(cls, xs: Sequence[float], ys: Sequence[float], demands: Sequence[float],
+                    ready_times: Sequence[float], due_dates: Sequence[float], service_times: Sequence[float],
+                    vehicle_capacity: float, distance_matrix=None) -> 'CVRPTWInstance':
+        """Same as from_nodes, from column arrays (index 0 is the depot)."""
+        nodes = [Node(i, float(x), float(y), float(d), float(r), float(due), float(st))
+                 for i, (x, y, d, r, due, st) in enumerate(zip(xs, ys, demands, ready_times, due_dates, service_times))]
+        return cls.from_nodes(nodes, vehicle_capacity, distance_matrix=distance_matrix)
 
-    def _generate_random_instance(self, min_d, max_d, grid, horizon, tw_ratio):
+    def _generate_random_instance(self, min_d, max_d, grid, horizon, tw_ratio, rng=random):
         # 1. Create Depot
         depot = Node(id=0, x=grid/2, y=grid/2, demand=0, 
                      ready_time=0, due_date=horizon, service_time=0)
@@ -132,10 +208,10 @@ class CVRPTWInstance:
         
         # 2. Create Customers
         for i in range(1, self.num_customers + 1):
-            x = random.uniform(0, grid)
-            y = random.uniform(0, grid)
-            demand = random.randint(min_d, max_d)
-            service_time = random.randint(1, 5)
+            x = rng.uniform(0, grid)
+            y = rng.uniform(0, grid)
+            demand = rng.randint(min_d, max_d)
+            service_time = rng.randint(1, 5)
             
             # Generate feasible time windows based on distance from depot
             dist_from_depot = depot.distance_to(Node(0, x, y, 0, 0, 0, 0))
@@ -147,7 +223,7 @@ class CVRPTWInstance:
                 min_arrival = 0
                 max_arrival = horizon
             
-            start_window = random.uniform(min_arrival, max_arrival - 10)
+            start_window = rng.uniform(min_arrival, max_arrival - 10)
             # Width of time window
             width = horizon * tw_ratio
             end_window = min(start_window + width, max_arrival)
@@ -155,11 +231,48 @@ class CVRPTWInstance:
             self.nodes.append(Node(i, x, y, demand, start_window, end_window, service_time))
             
         # 3. Compute Distance Matrix
-        size = len(self.nodes)
-        self.distance_matrix = [[0.0] * size for _ in range(size)]
-        for i in range(size):
-            for j in range(size):
-                self.distance_matrix[i][j] = self.nodes[i].distance_to(self.nodes[j])
+        self.distance_matrix = build_distance_matrix(self.nodes)
+
+    def share_distance_matrix(self, dtype: str = "float64") -> SharedMatrix:
+        """
+        Moves the distance matrix into shared memory so worker processes attach to
+        one physical copy. The caller owns the returned handle and must unlink() it.
+        """
+        handle = SharedMatrix.create(self.distance_matrix, dtype=dtype)
+        self.matrix_handle = handle
+        self.distance_matrix = handle.array
+        return handle
+
+    def with_vehicle_cost(self, cost: float) -> 'CVRPTWInstance':
+        """Shallow copy (nodes and matrix shared) with a different fixed cost per vehicle."""
+        inst = copy.copy(self)
+        inst.vehicle_cost = float(cost)
+        return inst
+
+    def vehicles_first_cost(self) -> float:
+        """
+        A vehicle cost larger than any solution's total distance, which makes the objective
+        lexicographic (fewest vehicles, then distance). A solution has at most 2n arcs, none
+        longer than the longest in the matrix (no triangle inequality or symmetry assumed).
+        """
+        matrix = self.distance_matrix
+        if hasattr(matrix, "max"):
+            longest = float(matrix.max())
+        else:
+            longest = max((max(row) for row in matrix if len(row)), default=0.0)
+        return 2.0 * max(1, self.num_customers) * max(longest, 1.0) + 1.0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if state.get("matrix_handle") is not None:
+            # The handle re-opens / re-attaches the matrix on the other side
+            state["distance_matrix"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.distance_matrix is None and self.matrix_handle is not None:
+            self.distance_matrix = self.matrix_handle.array
 
     def get_depot(self) -> Node:
         return self.nodes[0]
@@ -0,0 +1,104 @@
+"""
+Lightweight route representation for destroy/repair and ejection searches.
+
+A RouteState holds the customer ids of one route (depots implicit) with its
+forward start-of-service times and backward latest start times, so inserting
+one customer is checked in O(1). InstanceData is the flat, per-instance view
+(plain lists instead of Node attribute lookups) the checks run against.
+"""
+from typing import List, Sequence, Tuple
+from src.core.models import CVRPTWInstance
+
+INF = float("inf")
+
+
+class InstanceData:
+    def __init__(self, instance: CVRPTWInstance):
+        nodes = instance.nodes
+        self.dm = instance.distance_matrix
+        self.ready = [n.ready_time for n in nodes]
+        self.due = [n.due_date for n in nodes]
+        self.service = [n.service_time for n in nodes]
+        self.demand = [n.demand for n in nodes]
+        self.capacity = instance.vehicle_capacity
+
+
+class RouteState:
+    __slots__ = ("ids", "load", "distance", "start", "latest")
+
+    def __init__(self, ids: List[int]):
+        self.ids = ids
+
+    def update(self, data: InstanceData) -> bool:
+        """Recomputes the schedule; returns False if the route violates capacity or a time window."""
+        dm, ready, due, service, demand = data.dm, data.ready, data.due, data.service, data.demand
+        path = [0] + self.ids + [0]
+        self.load = sum(demand[i] for i in self.ids)
+        start = [0.0]
+        distance = 0.0
+        t = 0.0
+        feasible = self.load <= data.capacity
+        for k in range(1, len(path)):
+            a, b = path[k - 1], path[k]
+            d = dm[a][b]
+            distance += d
+            t = max(t + d, ready[b])
+            if t > due[b]:
+                feasible = False
+            start.append(t)
+            t += service[b]
+        latest = [0.0] * len(path)
+        latest[-1] = due[0]
+        for k in range(len(path) - 2, -1, -1):
+            a = path[k]
+            latest[k] = min(due[a], latest[k + 1] - service[a] - dm[a][path[k + 1]])
+        self.distance = float(distance)
+        self.start = start
+        self.latest = latest
+        return feasible
+
+    def copy(self) -> "RouteState":
+        c = RouteState(self.ids[:])
+        c.load, c.distance, c.start, c.latest = self.load, self.distance, self.start, self.latest
+        return c
+
+    def best_insertion(self, data: InstanceData, u: int) -> Tuple[float, int]:
+        """Cheapest feasible position for u: (delta distance, index into ids), (INF, -1) if none."""
+        if self.load + data.demand[u] > data.capacity:
+            return INF, -1
+        dm, service, ready = data.dm, data.service, data.ready
+        ready_u, due_u, s_u = ready[u], data.due[u], service[u]
+        row_u = dm[u]
+        ids = self.ids
+        start, latest = self.start, self.latest
+        best, best_pos = INF, -1
+        prev = 0
+        for k in range(len(ids) + 1):
+            nxt = ids[k] if k < len(ids) else 0
+            t = max(start[k] + service[prev] + dm[prev][u], ready_u)
+            if t <= due_u and max(t + s_u + row_u[nxt], ready[nxt]) <= latest[k + 1]:
+                delta = dm[prev][u] + row_u[nxt] - dm[prev][nxt]
+                if delta < best:
+                    best, best_pos = delta, k
+            elif start[k] > due_u:
+                break  # u would arrive late at every later position too
+            prev = nxt
+        return float(best), best_pos
+
+
+def route_penalty(data: InstanceData, ids: Sequence[int]) -> Tuple[float, float]:
+    """(load excess, time warp) of a route; both 0 iff it is feasible. Late arrivals are
+    'warped back' to the due date so one violation is not counted again downstream."""
+    dm, ready, due, service = data.dm, data.ready, data.due, data.service
+    excess = max(0.0, sum(data.demand[i] for i in ids) - data.capacity)
+    warp = 0.0
+    t = 0.0
+    prev = 0
+    for b in list(ids) + [0]:
+        t = max(t + dm[prev][b], ready[b])
+        if t > due[b]:
+            warp += t - due[b]
+            t = due[b]
+        t += service[b]
+        prev = b
+    return excess, float(warp)
@@ -0,0 +1,69 @@
+"""
+Route segments with time-warp concatenation (Vidal et al., 2013).
+
+A Segment summarises a sequence of visits: total duration, accumulated time
+warp (how far service had to be "moved back in time" to meet due dates, 0 iff
+the time windows are respected), earliest/latest start, distance and load.
+Two segments concatenate in O(1), so with the prefix and suffix segments of
+every route a relocate or swap between two routes is evaluated in O(1),
+including its capacity excess and time warp.
+"""
+from typing import List, NamedTuple, Sequence, Tuple
+from src.core.route_state import InstanceData
+
+
+class Segment(NamedTuple):
+    duration: float
+    time_warp: float
+    earliest: float
+    latest: float
+    distance: float
+    load: float
+    first: int
+    last: int
+
+
+def single(data: InstanceData, i: int) -> Segment:
+    return Segment(data.service[i], 0.0, data.ready[i], data.due[i], 0.0, data.demand[i], i, i)
+
+
+def concat(data: InstanceData, a: Segment, b: Segment) -> Segment:
+    d = data.dm[a.last][b.first]
+    delta = a.duration - a.time_warp + d
+    wait = max(b.earliest - delta - a.latest, 0.0)
+    warp = max(a.earliest + delta - b.latest, 0.0)
+    return Segment(
+        a.duration + b.duration + d + wait,
+        a.time_warp + b.time_warp + warp,
+        max(b.earliest - delta, a.earliest) - wait,
+        min(b.latest - delta, a.latest) + warp,
+        a.distance + b.distance + d,
+        a.load + b.load,
+        a.first,
+        b.last,
+    )
+
+
+def sequence(data: InstanceData, ids: Sequence[int]) -> Segment:
+    """Segment of a full route (depots added), O(len)."""
+    seg = single(data, 0)
+    for i in ids:
+        seg = concat(data, seg, single(data, i))
+    return concat(data, seg, single(data, 0))
+
+
+def prefix_suffix(data: InstanceData, ids: Sequence[int]) -> Tuple[List[Segment], List[Segment]]:
+    """
+    Segments of path[:k+1] and path[k:] for path = [0] + ids + [0]; a customer at
+    path index k is removed by concat(prefix[k-1], suffix[k+1]).
+    """
+    path = [0] + list(ids) + [0]
+    singles = [single(data, i) for i in path]
+    prefix = [singles[0]]
+    for s in singles[1:]:
+        prefix.append(concat(data, prefix[-1], s))
+    suffix = [singles[-1]]
+    for s in reversed(singles[:-1]):
+        suffix.append(concat(data, s, suffix[-1]))
+    suffix.reverse()
+    return prefix, suffix
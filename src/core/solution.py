@@ -1,22 +1,45 @@
 from typing import List, Tuple, Optional, Any
 from dataclasses import dataclass, field
 from src.core.models import Route, CVRPTWInstance
+from src.utils import instrumentation
 
 class Solution:
     """Wrapper for a complete solution (list of routes)."""
-    def __init__(self, routes: List[Route], instance: CVRPTWInstance):
+    def __init__(self, routes: List[Route], instance: CVRPTWInstance, evaluate: bool = True):
         self.routes = routes
         self.instance = instance
         self.total_distance = 0.0
         self.total_wait = 0.0
         self.is_feasible = True
+        self.num_vehicles = 0
         self.history: List[Tuple[str, int, float]] = [] # (Stage, Step, Cost)
-        self._calculate_metrics()
+        self.metrics = None # SolverReport when instrumentation is enabled
+        self.seed = None # master seed of the run that produced it
+        self.lower_bound = None # cost bound (src.core.bounds) when the run had a target gap
+        if evaluate:
+            self._calculate_metrics()
+
+    @classmethod
+    def from_metrics(cls, routes: List[Route], instance: CVRPTWInstance, total_distance: float,
+                     total_wait: float, is_feasible: bool, num_vehicles: int) -> 'Solution':
+        """Solution whose objective values are already known; only the route schedules are recomputed."""
+        sol = cls(routes, instance, evaluate=False)
+        for r in routes:
+            r.calculate_metrics(instance.distance_matrix)
+        sol.total_distance = total_distance
+        sol.total_wait = total_wait
+        sol.is_feasible = is_feasible
+        sol.num_vehicles = num_vehicles
+        return sol
         
     def _calculate_metrics(self):
+        stats = instrumentation.active
+        if stats is not None:
+            stats.evaluations += 1
         self.total_distance = 0.0
         self.total_wait = 0.0
         self.is_feasible = True
+        self.num_vehicles = sum(1 for r in self.routes if len(r.nodes) > 2)
         for r in self.routes:
             r.calculate_metrics(self.instance.distance_matrix)
             self.total_distance += r.total_distance
@@ -25,8 +48,18 @@ class Solution:
             if not r.is_feasible(self.instance.vehicle_capacity, self.instance.distance_matrix):
                 self.is_feasible = False
 
+    def to_compact(self):
+        """Instance-free CompactSolution for cheap inter-process transfer (see src.core.encoding)."""
+        from src.core.encoding import encode_solution
+        return encode_solution(self)
+
+    @classmethod
+    def from_compact(cls, compact, instance: CVRPTWInstance, verify: bool = False) -> 'Solution':
+        from src.core.encoding import decode_solution
+        return decode_solution(compact, instance, verify=verify)
+
     def fitness(self) -> float:
-        # Minimize distance. Penalize infeasibility heavily.
+        # Minimize distance (plus the instance's fixed cost per vehicle). Penalize infeasibility heavily.
         if not self.is_feasible:
             return float('inf')
-        return self.total_distance
+        return self.total_distance + self.instance.vehicle_cost * self.num_vehicles
@@ -0,0 +1,87 @@
+"""
+Unvisited customers of a solution under construction, for route-building
+heuristics (ACO).
+
+Customers are kept in two sorted lists, by (due date, demand, id) and by
+(demand, id). Within a route the current time only grows and the remaining
+capacity only shrinks, so:
+  - every customer whose due date is before the current time can never be
+    served on this route again; expire(time) skips that whole prefix with one
+    bisection, and new_route() brings it back in O(1);
+  - only customers whose demand fits the remaining capacity are candidates,
+    and they are a prefix of the demand order (one bisection). candidates()
+    walks whichever of the two ranges is shorter;
+  - when the remaining capacity is below the smallest unvisited demand the
+    route is full, without looking at any candidate (min_demand()).
+remove() takes a served customer out for the rest of the solution: two
+bisections plus two list deletions. The deletions are O(n) memmoves rather
+than O(log n): a balanced tree in Python would cost more per operation at
+any instance size the construction (itself O(n) per step) can handle.
+"""
+from bisect import bisect_left, bisect_right
+from typing import List
+
+from src.core.models import CVRPTWInstance, Node
+
+INF = float("inf")
+
+
+class UnvisitedIndex:
+    __slots__ = ("keys", "ids", "by_demand", "due", "start", "time")
+
+    def __init__(self, instance: CVRPTWInstance = None):
+        if instance is None:
+            return
+        self.keys = sorted((n.due_date, n.demand, n.id) for n in instance.get_customers())
+        self.ids = [k[2] for k in self.keys]
+        self.by_demand = sorted((n.demand, n.id) for n in instance.get_customers())
+        # Due date by id, shared (never modified) by the copies
+        self.due = [n.due_date for n in instance.nodes]
+        self.start = 0
+        self.time = -INF
+
+    def copy(self) -> "UnvisitedIndex":
+        other = UnvisitedIndex()
+        other.keys = self.keys[:]
+        other.ids = self.ids[:]
+        other.by_demand = self.by_demand[:]
+        other.due = self.due
+        other.start = 0
+        other.time = -INF
+        return other
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def new_route(self):
+        self.start = 0
+        self.time = -INF
+
+    def expire(self, time: float):
+        """Drops, for the current route, every customer due before `time`."""
+        self.start = bisect_left(self.keys, (time,), self.start)
+        self.time = time
+
+    def min_demand(self) -> float:
+        return self.by_demand[0][0] if self.by_demand else INF
+
+    def candidates(self, capacity: float = INF) -> List[int]:
+        """
+        Ids of the customers not expired on the current route whose demand fits `capacity`,
+        by due date when the unexpired customers are the fewer, else by demand.
+        """
+        fitting = bisect_right(self.by_demand, (capacity, INF))
+        if fitting >= len(self.ids) - self.start:
+            if fitting == len(self.by_demand):
+                return self.ids[self.start:]
+            return [cid for _, demand, cid in self.keys[self.start:] if demand <= capacity]
+        due, time = self.due, self.time
+        return [cid for _, cid in self.by_demand[:fitting] if due[cid] >= time]
+
+    def remove(self, node: Node):
+        i = bisect_left(self.keys, (node.due_date, node.demand, node.id))
+        del self.keys[i]
+        del self.ids[i]
+        if i < self.start:
+            self.start -= 1
+        del self.by_demand[bisect_left(self.by_demand, (node.demand, node.id))]
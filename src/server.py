@@ -0,0 +1,292 @@
+"""
+Local HTTP job server for the hybrid solver.
+
+    python -m src.server --port 8765 --workers 4 --max-pending 32
+
+Jobs run on a JobManager pool of pre-warmed worker processes that keep the
+instances they have seen (and their solvers) in memory, so repeated requests
+on an instance skip imports, parsing and the distance matrix. The server
+itself only parses nodes: distance matrices are built in the workers. At most
+--max-pending jobs are queued or running; further submissions get 503 with a
+Retry-After header instead of growing the queue.
+
+Endpoints (JSON in and out):
+    POST   /jobs                 submit a job, 202 {"job_id", "instance"}
+    GET    /jobs                 status of every retained job
+    GET    /jobs/<id>            status (state, stage, step, best, ...)
+    GET    /jobs/<id>/incumbent  latest incumbent (final solution once finished)
+    GET    /jobs/<id>/result     final solution, 409 while the job is running
+    DELETE /jobs/<id>            cancel (a running job keeps its best solution)
+    GET    /health               pool size and queue usage
+
+POST /jobs body:
+    {"instance": {"solomon": "<file contents>"}
+              | {"nodes": [[x, y, demand, ready, due, service], ...], "capacity": 200}
+              | {"id": "<instance id returned by an earlier submission>"},
+     "config": {...partial HybridConfig, e.g. {"aco": {"n_ants": 20}}...},
+     "seed": 1, "time_limit": 30.0, "label": "..."}
+Node rows are indexed by position, row 0 being the depot.
+"""
+import argparse
+import json
+import re
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from src.config import HybridConfig, config_from_dict
+from src.core.encoding import compact_to_dict
+from src.core.models import Node
+from src.solvers.jobs import InstanceSpec, JobManager, JobQueueFull, JobStatus
+from src.utils.logger import logger, setup_logger
+from src.utils.solomon_loader import parse_solomon_text
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+_JOB_PATH = re.compile(r"^/jobs/(\d+)(/incumbent|/result)?$")
+
+
+class RequestError(Exception):
+    def __init__(self, status: HTTPStatus, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def spec_from_payload(payload: dict) -> InstanceSpec:
+    if "solomon" in payload:
+        nodes, capacity = parse_solomon_text(payload["solomon"])
+        return InstanceSpec.from_nodes(nodes, capacity)
+    if "nodes" in payload:
+        if "capacity" not in payload:
+            raise ValueError("'capacity' is required with 'nodes'")
+        rows = payload["nodes"]
+        if any(len(row) != 6 for row in rows):
+            raise ValueError("node rows must be [x, y, demand, ready, due, service]")
+        nodes = [Node(i, *(float(v) for v in row)) for i, row in enumerate(rows)]
+        return InstanceSpec.from_nodes(nodes, float(payload["capacity"]))
+    raise ValueError("instance needs one of 'solomon', 'nodes' or 'id'")
+
+
+def status_to_dict(job: JobStatus) -> dict:
+    return {
+        "job_id": job.job_id,
+        "label": job.label,
+        "seed": job.seed,
+        "time_limit": job.time_limit,
+        "state": job.state,
+        "stage": job.stage,
+        "step": job.step,
+        "best": job.best if job.best != float("inf") else None,
+        "has_incumbent": job.incumbent is not None or job.compact is not None,
+        "solve_time": job.solve_time,
+        "error": job.error,
+        "submitted_at": job.submitted_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+class JobServer:
+    """
+    Request handling independent of HTTP: instance specs (nodes, no matrix) are
+    parsed outside the lock, kept once per content digest while a retained job
+    uses them; the oldest finished jobs are forgotten beyond max_retained.
+    """
+
+    def __init__(self, manager: JobManager, max_retained: int = 1000):
+        self.manager = manager
+        self.max_retained = max_retained
+        self._instances: Dict[str, InstanceSpec] = {}
+        self._job_instance: "OrderedDict[int, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, body: dict) -> dict:
+        payload = body.get("instance")
+        if not isinstance(payload, dict):
+            raise ValueError("'instance' object is required")
+        config = config_from_dict(body.get("config") or {}, HybridConfig)
+        time_limit = body.get("time_limit")
+        if time_limit is not None and float(time_limit) <= 0:
+            raise ValueError("'time_limit' must be positive")
+        spec = None if "id" in payload else spec_from_payload(payload)
+        with self._lock:
+            if spec is None:
+                spec = self._instances.get(payload["id"])
+                if spec is None:
+                    raise RequestError(HTTPStatus.NOT_FOUND, f"unknown instance {payload['id']!r}")
+            else:
+                spec = self._instances.setdefault(spec.digest, spec)
+            digest = spec.digest
+            try:
+                job_id = self.manager.submit(spec, config, seed=body.get("seed"),
+                                             label=str(body.get("label", "")),
+                                             time_limit=float(time_limit) if time_limit is not None else None)
+            except JobQueueFull as e:
+                if digest not in self._job_instance.values():
+                    del self._instances[digest]
+                raise RequestError(HTTPStatus.SERVICE_UNAVAILABLE, str(e), {"Retry-After": "1"})
+            self._job_instance[job_id] = digest
+            self._prune()
+        logger.info("Job %d queued (%d customers)", job_id, spec.num_customers)
+        return {"job_id": job_id, "instance": digest}
+
+    def _prune(self):
+        excess = len(self._job_instance) - self.max_retained
+        for job_id in list(self._job_instance):
+            if excess <= 0:
+                break
+            if self.manager.status(job_id).finished:
+                self.manager.forget(job_id)
+                del self._job_instance[job_id]
+                excess -= 1
+        used = set(self._job_instance.values())
+        for digest in [d for d in self._instances if d not in used]:
+            del self._instances[digest]
+
+    def _job(self, job_id: int) -> Tuple[JobStatus, str]:
+        with self._lock:
+            digest = self._job_instance.get(job_id)
+            if digest is None:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"unknown job {job_id}")
+            return self.manager.status(job_id), digest
+
+    def status(self, job_id: int) -> dict:
+        return status_to_dict(self._job(job_id)[0])
+
+    def statuses(self) -> list:
+        with self._lock:
+            ids = list(self._job_instance)
+        return [status_to_dict(job) for job in self.manager.statuses(ids)]
+
+    def solution(self, job_id: int, final: bool) -> dict:
+        job, digest = self._job(job_id)
+        if final and not job.finished:
+            raise RequestError(HTTPStatus.CONFLICT, f"job {job_id} is {job.state}")
+        compact = job.compact or job.incumbent
+        if compact is None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"job {job_id} has no solution yet")
+        return {"job": status_to_dict(job), "solution": compact_to_dict(compact, digest)}
+
+    def cancel(self, job_id: int) -> dict:
+        self._job(job_id)
+        self.manager.cancel(job_id)
+        return {"job_id": job_id, "cancelling": True}
+
+    def health(self) -> dict:
+        return {"workers": self.manager.max_workers, "pending": self.manager.pending(),
+                "max_pending": self.manager.max_pending}
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    server_version = "cvrptw-jobs/1"
+
+    def do_GET(self):
+        self._handle(self._get)
+
+    def do_POST(self):
+        self._handle(self._post)
+
+    def do_DELETE(self):
+        self._handle(self._delete)
+
+    def _get(self):
+        jobs = self.server.jobs
+        if self.path == "/health":
+            return HTTPStatus.OK, jobs.health()
+        if self.path == "/jobs":
+            return HTTPStatus.OK, jobs.statuses()
+        job_id, sub = self._job_path()
+        if sub is None:
+            return HTTPStatus.OK, jobs.status(job_id)
+        return HTTPStatus.OK, jobs.solution(job_id, final=sub == "/result")
+
+    def _post(self):
+        if self.path != "/jobs":
+            raise RequestError(HTTPStatus.NOT_FOUND, f"no route {self.path}")
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"body exceeds {MAX_BODY_BYTES} bytes")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {e}")
+        if not isinstance(body, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "body must be a JSON object")
+        return HTTPStatus.ACCEPTED, self.server.jobs.submit(body)
+
+    def _delete(self):
+        job_id, sub = self._job_path()
+        if sub is not None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"no route {self.path}")
+        return HTTPStatus.ACCEPTED, self.server.jobs.cancel(job_id)
+
+    def _job_path(self) -> Tuple[int, Optional[str]]:
+        match = _JOB_PATH.match(self.path)
+        if match is None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"no route {self.path}")
+        return int(match.group(1)), match.group(2)
+
+    def _handle(self, route):
+        headers = {}
+        try:
+            status, data = route()
+        except RequestError as e:
+            status, data, headers = e.status, {"error": str(e)}, e.headers
+        except (ValueError, TypeError) as e:
+            status, data = HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except Exception as e:
+            logger.exception("Request %s %s failed", self.command, self.path)
+            status, data = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+        payload = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def make_server(host: str, port: int, manager: JobManager, max_retained: int = 1000) -> ThreadingHTTPServer:
+    httpd = ThreadingHTTPServer((host, port), JobRequestHandler)
+    httpd.daemon_threads = True
+    httpd.jobs = JobServer(manager, max_retained=max_retained)
+    return httpd
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local CVRPTW solver job server")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--max-pending", type=int, default=32,
+                        help="Queued + running jobs accepted before submissions get 503")
+    parser.add_argument("--max-retained", type=int, default=1000,
+                        help="Jobs kept for status queries; the oldest finished ones are dropped")
+    parser.add_argument("--progress-interval", type=float, default=0.5,
+                        help="Seconds between progress / incumbent updates from a job")
+    parser.add_argument("--log-file", type=str, default="server.log", help="Log file ('' to disable)")
+    args = parser.parse_args()
+    setup_logger(log_file=args.log_file)
+
+    with JobManager(max_workers=args.workers, progress_interval=args.progress_interval,
+                    max_pending=args.max_pending) as manager:
+        manager.warm_up()
+        httpd = make_server(args.host, args.port, manager, max_retained=args.max_retained)
+        logger.info("Serving on http://%s:%d with %d workers", args.host, httpd.server_address[1],
+                    manager.max_workers)
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
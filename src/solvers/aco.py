@@ -1,34 +1,57 @@
 import random
-from typing import List, Tuple
-from src.core.models import CVRPTWInstance, Route, Node
+from typing import List, Optional, Tuple
+from src.core.models import CVRPTWInstance, Route, Node, matrix_row
 from src.core.solution import Solution
+from src.core.unvisited import UnvisitedIndex
 from src.interfaces import SolverStrategy
 from src.config import ACOConfig
 from src.utils.logger import logger
+from src.utils import convergence, instrumentation, progress, trace
+from src.utils.rng import derive_seed, resolve_seed
 
 class ACOSolver(SolverStrategy):
     """
     Stage 1: Ant Colony Optimization
     Constructs solutions probabilisticly based on pheromones and heuristic info.
     """
-    def __init__(self, instance: CVRPTWInstance, config: ACOConfig):
+    def __init__(self, instance: CVRPTWInstance, config: ACOConfig, seed: Optional[int] = None):
         self.instance = instance
         self.config = config
+        self.reseed(seed)
         
         size = len(instance.nodes)
         self.pheromones = [[1.0 for _ in range(size)] for _ in range(size)]
-        logger.debug(f"Initialized ACOSolver with {config.n_ants} ants")
+        # Heuristic visibility eta^beta depends only on the instance: each row is computed the first
+        # time an ant leaves that node and reused across solves (see _visibility_row)
+        self.visibility: List[Optional[List[float]]] = [None] * size
+        # Customers ordered by due date; each construction works on a copy
+        self.unvisited = UnvisitedIndex(instance)
+        logger.debug("Initialized ACOSolver with %d ants", config.n_ants)
+
+    def reseed(self, seed: Optional[int] = None):
+        # Each ant of each iteration gets its own substream, so ants could run in any order or in parallel
+        self.seed = resolve_seed(seed)
+
+    def reset(self):
+        """Restores the initial pheromone trail in place so the solver can be reused for another run."""
+        for row in self.pheromones:
+            row[:] = [1.0] * len(row)
 
     def solve(self) -> Tuple[List[Solution], List[float]]:
         best_solutions = []
         history = []
         
         global_best_cost = float('inf')
+        hook = progress.active
+        monitor = convergence.monitor(self.config.convergence)
         
         for i in range(self.config.iterations):
+            if hook is not None and hook.should_stop():
+                break
             solutions = []
-            for _ in range(self.config.n_ants):
-                sol = self._construct_solution()
+            for ant in range(self.config.n_ants):
+                rng = random.Random(derive_seed(self.seed, i, ant))
+                sol = self._construct_solution(rng)
                 if sol.is_feasible:
                     solutions.append(sol)
             
@@ -53,39 +76,66 @@ class ACOSolver(SolverStrategy):
                 best_solutions.extend(solutions)
                 
             # Track history
+            tracer = trace.active
             if current_best:
                 if current_best.fitness() < global_best_cost:
                     global_best_cost = current_best.fitness()
+                    if tracer is not None:
+                        tracer.emit("incumbent", stage="ACO", step=i, cost=global_best_cost)
+                    if hook is not None:
+                        hook.incumbent("ACO", i, global_best_cost, current_best)
             
             # If no feasible solution found yet, append inf or last best
             cost = global_best_cost if global_best_cost != float('inf') else 0
             history.append(cost)
-            logger.debug(f"ACO Iteration {i+1}/{self.config.iterations}: Best Cost {cost:.2f}")
+            if tracer is not None and tracer.sampled(i):
+                tracer.emit("iteration", stage="ACO", step=i, best=cost, feasible=len(solutions))
+            if hook is not None:
+                hook.iteration("ACO", i, cost)
+            logger.debug("ACO Iteration %d/%d: Best Cost %.2f", i+1, self.config.iterations, cost)
+            if monitor is not None and monitor.update(global_best_cost):
+                convergence.report("ACO", i, monitor.reason)
+                break
                 
         return best_solutions, history
 
-    def _construct_solution(self) -> Solution:
-        unvisited = set(self.instance.get_customers())
+    def _construct_solution(self, rng: random.Random) -> Solution:
+        unvisited = self.unvisited.copy()
+        nodes = self.instance.nodes
+        dm = self.instance.distance_matrix
+        capacity = self.instance.vehicle_capacity
         routes = []
         
         while unvisited:
             route_nodes = [self.instance.get_depot()]
             current_load = 0.0
             current_time = 0.0
+            unvisited.new_route()
             
             while True:
+                # Route full: no unvisited demand fits (checked without scanning the candidates)
+                if current_load + unvisited.min_demand() > capacity:
+                    break
                 curr_node = route_nodes[-1]
+                # Customers due before now can never be reached on this route again
+                unvisited.expire(current_time)
+                candidates = unvisited.candidates(capacity - current_load)
                 feasible_next = []
+
+                stats = instrumentation.active
+                if stats is not None:
+                    stats.feasibility_checks += len(candidates)
                 
-                # Find feasible candidates
-                for cand in unvisited:
+                # Find feasible candidates (NumPy rows are converted once per step, not indexed per candidate)
+                dist_row = matrix_row(dm, curr_node.id)
+                for cid in candidates:
+                    cand = nodes[cid]
                     # Check Capacity
-                    if current_load + cand.demand > self.instance.vehicle_capacity:
+                    if current_load + cand.demand > capacity:
                         continue
                     
                     # Check Time Window
-                    dist = self.instance.distance_matrix[curr_node.id][cand.id]
-                    arrival = current_time + dist
+                    arrival = current_time + dist_row[cid]
                     wait = max(0.0, cand.ready_time - arrival)
                     start = arrival + wait
                     
@@ -96,34 +146,51 @@ class ACOSolver(SolverStrategy):
                     break
                 
                 # Select next node
-                next_node = self._select_next_node(curr_node, feasible_next)
+                next_node = self._select_next_node(curr_node, feasible_next, rng)
                 route_nodes.append(next_node)
                 unvisited.remove(next_node)
                 
                 # Update state
                 current_load += next_node.demand
-                dist = self.instance.distance_matrix[curr_node.id][next_node.id]
-                arrival = current_time + dist
+                arrival = current_time + dist_row[next_node.id]
                 wait = max(0.0, next_node.ready_time - arrival)
                 current_time = arrival + wait + next_node.service_time
             
+            if len(route_nodes) == 1:
+                # Not even a fresh vehicle can serve what is left: put it on one infeasible route
+                # instead of opening empty routes forever
+                route_nodes.extend(nodes[cid] for cid in unvisited.ids)
+                route_nodes.append(self.instance.get_depot())
+                routes.append(Route(nodes=route_nodes))
+                break
             route_nodes.append(self.instance.get_depot())
             routes.append(Route(nodes=route_nodes))
             
         return Solution(routes, self.instance)
 
-    def _select_next_node(self, curr: Node, candidates: List[Node]) -> Node:
+    def _select_next_node(self, curr: Node, candidates: List[Node], rng: random.Random) -> Node:
         # Probabilistic selection
         probs = []
+        tau_row = self.pheromones[curr.id]
+        vis_row = self.visibility[curr.id] or self._visibility_row(curr.id)
+        alpha = self.config.alpha
         for cand in candidates:
-            tau = self.pheromones[curr.id][cand.id]
-            dist = self.instance.distance_matrix[curr.id][cand.id]
-            eta = 1.0 / (dist + 1e-6)
-            probs.append((tau ** self.config.alpha) * (eta ** self.config.beta))
+            probs.append((tau_row[cand.id] ** alpha) * vis_row[cand.id])
             
         total = sum(probs)
         if total == 0:
-            return random.choice(candidates)
+            return rng.choice(candidates)
         
         probs = [p/total for p in probs]
-        return random.choices(candidates, weights=probs, k=1)[0]
+        return rng.choices(candidates, weights=probs, k=1)[0]
+
+    def _visibility_row(self, i: int) -> List[float]:
+        row = self.instance.distance_matrix[i]
+        beta = self.config.beta
+        if isinstance(row, list):
+            vis = [(1.0 / (d + 1e-6)) ** beta for d in row]
+        else:
+            # NumPy row: vectorised, stored as a list like the rest of the hot loop's data
+            vis = ((1.0 / (row + 1e-6)) ** beta).tolist()
+        self.visibility[i] = vis
+        return vis
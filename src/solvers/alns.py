@@ -0,0 +1,266 @@
+import math
+import random
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from src.core.models import CVRPTWInstance, Route
+from src.core.solution import Solution
+from src.core.route_state import INF, InstanceData, RouteState
+from src.interfaces import SolverStrategy
+from src.config import ALNSConfig
+from src.utils.logger import logger
+from src.utils import convergence, instrumentation, progress, trace
+from src.utils.rng import resolve_seed
+
+DESTROY_OPERATORS = ("random", "worst", "related", "route")
+REPAIR_OPERATORS = ("greedy", "regret")
+# Operator scores per segment: new global best, improved current, accepted worse
+SCORE_BEST, SCORE_BETTER, SCORE_ACCEPTED = 33.0, 9.0, 13.0
+# Randomisation exponents of worst / related removal (higher = more deterministic)
+WORST_POWER, RELATED_POWER = 3.0, 6.0
+
+class ALNSSolver(SolverStrategy):
+    """
+    Adaptive Large Neighborhood Search (destroy & repair).
+    Destroy: random, worst, related (Shaw) and route removal.
+    Repair: greedy and regret-k insertion over a cache of the best insertion
+    (cost, position) of every unassigned customer into every route; after an
+    insertion only the entries of the modified route are recomputed.
+    Operator weights adapt per segment; acceptance is simulated annealing.
+    """
+    def __init__(self, instance: CVRPTWInstance, config: ALNSConfig, seed: Optional[int] = None):
+        self.instance = instance
+        self.config = config
+        self.reseed(seed)
+        self.data = InstanceData(instance)
+        self.dm, self.ready, self.due, self.demand = self.data.dm, self.data.ready, self.data.due, self.data.demand
+        self._related_scale = None
+        logger.debug("Initialized ALNSSolver with iterations=%d", config.iterations)
+
+    def reseed(self, seed: Optional[int] = None):
+        self.seed = resolve_seed(seed)
+        self.rng = random.Random(self.seed)
+
+    # --- insertion cache -------------------------------------------------
+
+    def _fill_cache(self, routes: List[RouteState], customers, cache: Dict[int, Dict[int, Tuple[float, int]]]):
+        """Computes cache[route_index][u] for the given customers."""
+        stats = instrumentation.active
+        for r_idx, route in enumerate(routes):
+            entries = cache.setdefault(r_idx, {})
+            for u in customers:
+                entries[u] = route.best_insertion(self.data, u)
+        if stats is not None:
+            stats.feasibility_checks += len(routes) * len(customers)
+            instrumentation.record_cache("alns_insertion", False, len(routes) * len(customers))
+
+    def _repair(self, routes: List[RouteState], unassigned: List[int], k: int):
+        """Inserts all unassigned customers (opening new routes as needed). k == 1 is greedy."""
+        stats = instrumentation.active
+        hits = 0
+        cache: Dict[int, Dict[int, Tuple[float, int]]] = {}
+        self._fill_cache(routes, unassigned, cache)
+        pending = set(unassigned)
+        dm = self.dm
+        while pending:
+            choice, choice_route, choice_key = None, None, None
+            for u in pending:
+                # A fresh route is always an option (the fleet is unbounded)
+                costs = [(dm[0][u] + dm[u][0] + self.instance.vehicle_cost, -1, 0)]
+                for r_idx in range(len(routes)):
+                    delta, pos = cache[r_idx][u]
+                    if delta < INF:
+                        costs.append((delta, r_idx, pos))
+                hits += len(routes)
+                if k > 1:
+                    costs.sort(key=lambda c: c[0])
+                    top = costs[:k]
+                    regret = sum(c[0] - top[0][0] for c in top[1:]) + (k - len(top)) * 1e9
+                    key = (-regret, top[0][0], u)
+                    best = top[0]
+                else:
+                    best = min(costs, key=lambda c: c[0])
+                    key = (best[0], u)
+                if choice_key is None or key < choice_key:
+                    choice, choice_route, choice_key = u, best, key
+            pending.discard(choice)
+            _, r_idx, pos = choice_route
+            if r_idx < 0:
+                route = RouteState([choice])
+                routes.append(route)
+                r_idx = len(routes) - 1
+            else:
+                route = routes[r_idx]
+                route.ids.insert(pos, choice)
+            route.update(self.data)
+            for entries in cache.values():
+                entries.pop(choice, None)
+            # Only the modified route's insertion costs change
+            cache[r_idx] = {u: route.best_insertion(self.data, u) for u in pending}
+            if stats is not None:
+                stats.feasibility_checks += len(pending)
+                instrumentation.record_cache("alns_insertion", False, len(pending))
+        instrumentation.record_cache("alns_insertion", True, hits)
+
+    # --- removal operators -----------------------------------------------
+
+    def _remove_random(self, routes: List[RouteState], q: int) -> List[int]:
+        customers = [u for r in routes for u in r.ids]
+        return self.rng.sample(customers, min(q, len(customers)))
+
+    def _remove_worst(self, routes: List[RouteState], q: int) -> List[int]:
+        dm = self.dm
+        savings = []
+        for r in routes:
+            path = [0] + r.ids + [0]
+            for k in range(1, len(path) - 1):
+                a, u, b = path[k - 1], path[k], path[k + 1]
+                savings.append((dm[a][u] + dm[u][b] - dm[a][b], u))
+        savings.sort(reverse=True)
+        removed = []
+        while savings and len(removed) < q:
+            idx = int(len(savings) * self.rng.random() ** WORST_POWER)
+            removed.append(savings.pop(idx)[1])
+        return removed
+
+    def _relatedness(self, a: int, b: int) -> float:
+        if self._related_scale is None:
+            n = len(self.ready)
+            max_d = max(max(float(self.dm[i][j]) for j in range(n)) for i in (0, n // 2, n - 1)) or 1.0
+            horizon = (max(self.due) - min(self.ready)) or 1.0
+            self._related_scale = (max_d, horizon, max(self.demand) or 1.0)
+        max_d, horizon, max_q = self._related_scale
+        return (9.0 * self.dm[a][b] / max_d + 3.0 * abs(self.ready[a] - self.ready[b]) / horizon
+                + 2.0 * abs(self.demand[a] - self.demand[b]) / max_q)
+
+    def _remove_related(self, routes: List[RouteState], q: int) -> List[int]:
+        remaining = [u for r in routes for u in r.ids]
+        if not remaining:
+            return []
+        seed = self.rng.choice(remaining)
+        removed = [seed]
+        remaining.remove(seed)
+        while remaining and len(removed) < q:
+            ref = self.rng.choice(removed)
+            remaining.sort(key=lambda u: self._relatedness(ref, u))
+            idx = int(len(remaining) * self.rng.random() ** RELATED_POWER)
+            removed.append(remaining.pop(idx))
+        return removed
+
+    def _remove_route(self, routes: List[RouteState], q: int) -> List[int]:
+        # Prefer short routes: emptying one saves a vehicle and its depot legs
+        order = sorted(range(len(routes)), key=lambda i: (len(routes[i].ids), self.rng.random()))
+        removed = []
+        for i in order:
+            if len(removed) >= q:
+                break
+            if self.rng.random() < 0.5 or not removed:
+                removed.extend(routes[i].ids)
+        return removed
+
+    # --- main loop -------------------------------------------------------
+
+    def _to_solution(self, routes: List[RouteState]) -> Solution:
+        nodes = self.instance.nodes
+        depot = nodes[0]
+        return Solution([Route(nodes=[depot] + [nodes[i] for i in r.ids] + [depot]) for r in routes if r.ids],
+                        self.instance)
+
+    def _initial_state(self, solution: Solution) -> List[RouteState]:
+        """Keeps the feasible routes; customers of infeasible routes (and any missing ones) are reinserted."""
+        routes, seen = [], set()
+        for r in solution.routes:
+            state = RouteState([n.id for n in r.nodes if n.id != 0 and n.id not in seen])
+            seen.update(state.ids)
+            if state.ids and state.update(self.data):
+                routes.append(state)
+        assigned = {u for r in routes for u in r.ids}
+        unassigned = [u for u in range(1, self.instance.num_customers + 1) if u not in assigned]
+        if unassigned:
+            self._repair(routes, unassigned, max(1, self.config.regret_k))
+        return routes
+
+    def _cost(self, routes: List[RouteState]) -> float:
+        return sum(r.distance for r in routes) + self.instance.vehicle_cost * sum(1 for r in routes if r.ids)
+
+    def _select(self, weights: List[float]) -> int:
+        return self.rng.choices(range(len(weights)), weights=weights)[0]
+
+    def solve(self, initial_solution: Solution) -> Tuple[Solution, List[float]]:
+        cfg = self.config
+        n = self.instance.num_customers
+        current = self._initial_state(initial_solution)
+        current_cost = self._cost(current)
+        best, best_cost = [r.copy() for r in current], current_cost
+        history = [initial_solution.fitness()]
+        if n == 0:
+            return initial_solution, history
+
+        destroy = [getattr(self, f"_remove_{name}") for name in DESTROY_OPERATORS]
+        d_weights, r_weights = [1.0] * len(destroy), [1.0] * len(REPAIR_OPERATORS)
+        d_scores, r_scores = [0.0] * len(destroy), [0.0] * len(REPAIR_OPERATORS)
+        d_uses, r_uses = [0] * len(destroy), [0] * len(REPAIR_OPERATORS)
+        min_q = min(n, max(1, cfg.min_removal))
+        max_q = min(n, max(min_q, int(cfg.max_removal_ratio * n)))
+        # A solution start_temperature_ratio worse than the start is accepted with probability 1/2
+        temperature = cfg.start_temperature_ratio * current_cost / math.log(2) if current_cost > 0 else 1.0
+        tracer = trace.active
+        hook = progress.active
+        monitor = convergence.monitor(cfg.convergence)
+
+        for it in range(cfg.iterations):
+            if hook is not None and hook.should_stop():
+                break
+            d_idx, r_idx = self._select(d_weights), self._select(r_weights)
+            q = self.rng.randint(min_q, max_q)
+            candidate = [r.copy() for r in current]
+            removed = set(destroy[d_idx](candidate, q))
+            for r in candidate:
+                if any(u in removed for u in r.ids):
+                    r.ids = [u for u in r.ids if u not in removed]
+                    r.update(self.data)
+            candidate = [r for r in candidate if r.ids]
+            k = cfg.regret_k if REPAIR_OPERATORS[r_idx] == "regret" else 1
+            self._repair(candidate, sorted(removed), k)
+            cand_cost = self._cost(candidate)
+
+            score = 0.0
+            if cand_cost < best_cost - 1e-9:
+                best, best_cost = [r.copy() for r in candidate], cand_cost
+                score = SCORE_BEST
+                if tracer is not None:
+                    tracer.emit("incumbent", stage="ALNS", step=it, cost=best_cost)
+                if hook is not None:
+                    hook.incumbent("ALNS", it, best_cost, partial(self._to_solution, best))
+            if cand_cost < current_cost - 1e-9:
+                current, current_cost = candidate, cand_cost
+                score = score or SCORE_BETTER
+            elif self.rng.random() < math.exp(-(cand_cost - current_cost) / max(temperature, 1e-12)):
+                current, current_cost = candidate, cand_cost
+                score = score or SCORE_ACCEPTED
+            temperature *= cfg.cooling_rate
+
+            d_scores[d_idx] += score
+            r_scores[r_idx] += score
+            d_uses[d_idx] += 1
+            r_uses[r_idx] += 1
+            if (it + 1) % cfg.segment_length == 0:
+                for weights, scores, uses in ((d_weights, d_scores, d_uses), (r_weights, r_scores, r_uses)):
+                    for i in range(len(weights)):
+                        if uses[i]:
+                            weights[i] = (1 - cfg.reaction) * weights[i] + cfg.reaction * scores[i] / uses[i]
+                            weights[i] = max(weights[i], 0.05)
+                        scores[i], uses[i] = 0.0, 0
+
+            history.append(best_cost)
+            if hook is not None:
+                hook.iteration("ALNS", it, best_cost)
+            if tracer is not None and tracer.sampled(it):
+                tracer.emit("iteration", stage="ALNS", step=it, best=best_cost, current=current_cost,
+                            destroy=DESTROY_OPERATORS[d_idx], repair=REPAIR_OPERATORS[r_idx], removed=len(removed))
+            if it % 50 == 0:
+                logger.debug("ALNS Iter %d: Best Cost %.2f", it, best_cost)
+            if monitor is not None and monitor.update(best_cost):
+                convergence.report("ALNS", it, monitor.reason)
+                break
+
+        return self._to_solution(best), history
@@ -0,0 +1,155 @@
+"""
+Batch solving with reusable worker processes and solver objects.
+
+Each worker receives the registered instances once (pool initializer) and keeps
+one HybridSolver per instance, so per-instance precomputation (ACO visibility
+rows, pheromone storage, ...) is built once per worker instead of once per
+run. Solvers are reset() between runs and results travel back as
+CompactSolution, which is decoded against the parent's instance.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from src.config import HybridConfig
+from src.core.encoding import CompactSolution, decode_solution
+from src.core.models import CVRPTWInstance
+from src.core.solution import Solution
+
+
+@dataclass
+class BatchResult:
+    job_index: int
+    instance_index: int
+    seed: int
+    cost: float
+    solve_time: float
+    compact: CompactSolution
+    solution: Optional[Solution] = None
+
+
+class _Worker:
+    """Registered instances plus one warm HybridSolver per instance."""
+
+    def __init__(self, instances: List[CVRPTWInstance], config: HybridConfig):
+        self.instances = instances
+        self.config = config
+        self.solvers: Dict[int, object] = {}
+
+    def run(self, job_index: int, instance_index: int, seed: int) -> Tuple[int, int, int, float, float, CompactSolution]:
+        from src.solvers.hybrid import HybridSolver
+        solver = self.solvers.get(instance_index)
+        if solver is None:
+            solver = HybridSolver(self.instances[instance_index], self.config)
+            self.solvers[instance_index] = solver
+        t0 = time.perf_counter()
+        sol = solver.solve(seed=seed)  # resets per-run state and reseeds every stage
+        dt = time.perf_counter() - t0
+        return job_index, instance_index, seed, sol.fitness(), dt, sol.to_compact()
+
+
+# Set by the pool initializer in each worker process (the in-process mode keeps its own _Worker)
+_worker: Optional[_Worker] = None
+
+
+def _init_worker(instances: List[CVRPTWInstance], config: HybridConfig, trace_queue=None, trace_sample: int = 1):
+    global _worker
+    _worker = _Worker(instances, config)
+    if trace_queue is not None:
+        from src.utils import trace
+        trace.attach(trace_queue, trace_sample)
+
+
+def _run_job(job_index: int, instance_index: int, seed: int) -> Tuple[int, int, int, float, float, CompactSolution]:
+    return _worker.run(job_index, instance_index, seed)
+
+
+class BatchSolver:
+    """
+    Keeps a pool of warm workers for a fixed set of instances.
+    max_workers=0 runs jobs in the calling process (useful for debugging and profiling).
+    """
+
+    def __init__(self, instances: Sequence[CVRPTWInstance], config: HybridConfig,
+                 max_workers: Optional[int] = None, trace_queue=None, trace_sample: int = 1):
+        self.instances = list(instances)
+        self.config = config
+        self.max_workers = max_workers
+        self._pool = None
+        self._local: Optional[_Worker] = None
+        if max_workers == 0:
+            self._local = _Worker(self.instances, config)
+        else:
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(self.instances, config, trace_queue, trace_sample),
+            )
+
+    def _index_of(self, instance: Union[int, CVRPTWInstance]) -> int:
+        if isinstance(instance, int):
+            return instance
+        for i, inst in enumerate(self.instances):
+            if inst is instance:
+                return i
+        raise ValueError("Instance was not registered with this BatchSolver")
+
+    def solve_many(self, jobs: Iterable[Tuple[Union[int, CVRPTWInstance], int]],
+                   decode: bool = True) -> Iterator[BatchResult]:
+        """
+        Runs (instance or instance index, seed) jobs and yields results as they finish
+        (completion order, see BatchResult.job_index).
+        """
+        job_list = [(j, self._index_of(inst), seed) for j, (inst, seed) in enumerate(jobs)]
+        futures = []
+        if self._pool is None:
+            results = (self._local.run(*job) for job in job_list)
+        else:
+            futures = [self._pool.submit(_run_job, *job) for job in job_list]
+            results = (f.result() for f in as_completed(futures))
+
+        try:
+            for job_index, inst_idx, seed, cost, dt, compact in results:
+                solution = decode_solution(compact, self.instances[inst_idx]) if decode else None
+                yield BatchResult(job_index, inst_idx, seed, cost, dt, compact, solution)
+        finally:
+            # Stopped early (break, close() or an error): drop the jobs that have not started
+            for f in futures:
+                f.cancel()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def solve_many(jobs: Iterable[Tuple[CVRPTWInstance, int]], config: HybridConfig,
+               max_workers: Optional[int] = None, decode: bool = True) -> Iterator[BatchResult]:
+    """
+    Solves many (instance, seed) jobs on a pool of reusable workers, streaming
+    results back as they finish. Distinct instances are shipped to each worker once.
+    The pool is shut down when the generator finishes or is closed; callers that may
+    stop early should close it explicitly (contextlib.closing) rather than rely on
+    garbage collection.
+    """
+    jobs = list(jobs)
+    instances: List[CVRPTWInstance] = []
+    seen: Dict[int, int] = {}
+    indexed = []
+    for inst, seed in jobs:
+        if id(inst) not in seen:
+            seen[id(inst)] = len(instances)
+            instances.append(inst)
+        indexed.append((seen[id(inst)], seed))
+    batch = BatchSolver(instances, config, max_workers=max_workers)
+    try:
+        yield from batch.solve_many(indexed, decode=decode)
+    finally:
+        batch.close()
@@ -0,0 +1,316 @@
+"""
+Decomposition for very large instances.
+
+Customers are partitioned into subproblems of about `target_size` customers,
+each subproblem is solved by the regular hybrid pipeline in a worker process,
+and the sub-solutions are merged.
+
+Initial partition (DecompositionConfig.method):
+- "polar":   equal-size angular sectors around the depot
+- "cluster": k-means on (x, y, time-window centre); time_weight scales the
+             time axis relative to the spatial spread
+
+With a deadline (HybridConfig.time_limit or a job's), every subproblem is
+solved with its share of the time left, counting the parts and rounds still
+to come; subproblems keep the parent's cancellation but report nothing.
+
+Improvement rounds then group whole routes of the merged solution by the angle
+of their centroid, with the sector boundaries rotated every round so routes cut
+apart by the previous partition are optimised together. Routes are compared
+on (feasibility, objective): a re-solved group replaces its routes when it is
+feasible and they are not, or when it is as feasible and cheaper. In round 0
+a sub-solution is compared the same way with one route per customer.
+"""
+import math
+import multiprocessing as mp
+import os
+import queue
+import time
+import dataclasses
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from src.config import HybridConfig, DecompositionConfig
+from src.core.encoding import CompactSolution
+from src.core.models import CVRPTWInstance, Node, Route
+from src.core.route_state import InstanceData, RouteState
+from src.core.solution import Solution
+from src.interfaces import SolverStrategy
+from src.utils.logger import logger
+from src.utils import progress, trace
+from src.utils.rng import derive_seed, make_rng
+
+PARTITION_METHODS = ("polar", "cluster")
+
+
+def _angle(depot: Node, x: float, y: float) -> float:
+    return math.atan2(y - depot.y, x - depot.x)
+
+
+def _chunks(items: Sequence, k: int) -> List[List]:
+    """Splits items into k contiguous chunks of (almost) equal size."""
+    n = len(items)
+    return [list(items[i * n // k:(i + 1) * n // k]) for i in range(k) if i * n // k < (i + 1) * n // k]
+
+
+def partition_polar(instance: CVRPTWInstance, k: int, offset: float = 0.0) -> List[List[int]]:
+    depot = instance.get_depot()
+    customers = sorted(
+        instance.get_customers(),
+        key=lambda c: ((_angle(depot, c.x, c.y) - offset) % (2 * math.pi), c.due_date),
+    )
+    return [[c.id for c in chunk] for chunk in _chunks(customers, k)]
+
+
+def partition_cluster(instance: CVRPTWInstance, k: int, rng, time_weight: float = 1.0,
+                      iterations: int = 20) -> List[List[int]]:
+    customers = instance.get_customers()
+    if k <= 1 or len(customers) <= k:
+        return [[c.id for c in customers]]
+
+    def spread(values):
+        mean = sum(values) / len(values)
+        return math.sqrt(sum((v - mean) ** 2 for v in values) / len(values)) or 1.0
+
+    tw_centre = [(c.ready_time + c.due_date) / 2 for c in customers]
+    space = (spread([c.x for c in customers]) + spread([c.y for c in customers])) / 2
+    t_scale = time_weight * space / spread(tw_centre)
+    points = [(c.x, c.y, t * t_scale) for c, t in zip(customers, tw_centre)]
+
+    centres = rng.sample(points, k)
+    assign = [0] * len(points)
+    for _ in range(iterations):
+        changed = False
+        for i, p in enumerate(points):
+            best = min(range(k), key=lambda j: (p[0] - centres[j][0]) ** 2 + (p[1] - centres[j][1]) ** 2
+                       + (p[2] - centres[j][2]) ** 2)
+            if best != assign[i]:
+                assign[i] = best
+                changed = True
+        sums = [[0.0, 0.0, 0.0, 0] for _ in range(k)]
+        for a, p in zip(assign, points):
+            s = sums[a]
+            s[0] += p[0]; s[1] += p[1]; s[2] += p[2]; s[3] += 1
+        centres = [(s[0] / s[3], s[1] / s[3], s[2] / s[3]) if s[3] else centres[j] for j, s in enumerate(sums)]
+        if not changed:
+            break
+
+    groups = [[] for _ in range(k)]
+    for a, c in zip(assign, customers):
+        groups[a].append(c)
+    # k-means does not balance sizes: split oversized clusters into angular sectors
+    target = max(1, len(customers) // k)
+    depot = instance.get_depot()
+    parts = []
+    for g in groups:
+        if not g:
+            continue
+        if len(g) > 2 * target:
+            g = sorted(g, key=lambda c: _angle(depot, c.x, c.y))
+            parts.extend(_chunks(g, math.ceil(len(g) / target)))
+        else:
+            parts.append(g)
+    return [[c.id for c in p] for p in parts]
+
+
+def partition_routes(solution: Solution, target_size: int, offset: float = 0.0) -> List[List[int]]:
+    """Groups whole routes, ordered by the angle of their centroid, into ~target_size customers each."""
+    depot = solution.instance.get_depot()
+    keyed = []
+    for r in solution.routes:
+        custs = [n for n in r.nodes if n.id != 0]
+        if not custs:
+            continue
+        cx = sum(n.x for n in custs) / len(custs)
+        cy = sum(n.y for n in custs) / len(custs)
+        keyed.append(((_angle(depot, cx, cy) - offset) % (2 * math.pi), [n.id for n in custs]))
+    keyed.sort(key=lambda t: t[0])
+
+    groups, current = [], []
+    for _, ids in keyed:
+        current.extend(ids)
+        if len(current) >= target_size:
+            groups.append(current)
+            current = []
+    if current:
+        if groups and len(current) < target_size // 2:
+            groups[-1].extend(current)
+        else:
+            groups.append(current)
+    return groups
+
+
+def build_subinstance(instance: CVRPTWInstance, customer_ids: Sequence[int]) -> Tuple[CVRPTWInstance, List[int]]:
+    """Renumbers depot + customers to 0..m and slices the parent matrix. Returns (sub, new_id -> old_id)."""
+    mapping = [0] + list(customer_ids)
+    nodes = [dataclasses.replace(instance.nodes[old], id=new) for new, old in enumerate(mapping)]
+    dm = instance.distance_matrix
+    matrix = [[float(dm[a][b]) for b in mapping] for a in mapping]
+    sub = CVRPTWInstance.from_nodes(nodes, instance.vehicle_capacity, distance_matrix=matrix)
+    sub.vehicle_cost = instance.vehicle_cost
+    return sub, mapping
+
+
+def _init_worker(trace_queue=None, trace_sample: int = 1):
+    if trace_queue is not None:
+        trace.attach(trace_queue, trace_sample)
+
+
+def _solve_subproblem(sub: CVRPTWInstance, config: HybridConfig, seed: int, cancel_event=None) -> CompactSolution:
+    """
+    In-process, the parent's reporter is muted (subproblem ids are renumbered and their
+    costs partial) but still stops the solve; in a pool worker, cancel_event (a picklable
+    Manager Event) is the parent's cancellation. config.time_limit is the part's budget.
+    """
+    from src.solvers.hybrid import HybridSolver
+    if progress.active is None and cancel_event is not None:
+        progress.install(progress.ProgressReporter(None, None, cancel_event))
+        try:
+            return HybridSolver(sub, config).solve(seed=seed).to_compact()
+        finally:
+            progress.install(None)
+    with progress.muted():
+        return HybridSolver(sub, config).solve(seed=seed).to_compact()
+
+
+def _routes_key(instance: CVRPTWInstance, data: InstanceData, routes: List[List[int]]) -> Tuple[bool, float]:
+    """(infeasible, objective) of a set of routes: lower is better, feasibility first."""
+    feasible = True
+    total = 0.0
+    for ids in routes:
+        state = RouteState(ids)
+        feasible &= state.update(data)
+        total += state.distance
+    return not feasible, total + instance.vehicle_cost * sum(1 for ids in routes if ids)
+
+
+class DecompositionSolver(SolverStrategy):
+    def __init__(self, instance: CVRPTWInstance, config: HybridConfig):
+        self.instance = instance
+        self.config = config
+        self.dconf: DecompositionConfig = config.decomposition
+        if self.dconf.method not in PARTITION_METHODS:
+            raise ValueError(f"Unknown decomposition method '{self.dconf.method}', expected one of {PARTITION_METHODS}")
+        # Subproblems run the plain pipeline (no nested decomposition, no per-worker instrumentation);
+        # the parent's deadline is split among them and its target gap does not apply to a part
+        self.sub_config = dataclasses.replace(
+            config,
+            decomposition=dataclasses.replace(self.dconf, enabled=False),
+            instrumentation=dataclasses.replace(config.instrumentation, enabled=False, openmetrics_path=None),
+            time_limit=None,
+            target_gap=None,
+        )
+        self.data = InstanceData(instance)
+        self.workers = self.dconf.max_workers if self.dconf.max_workers is not None else (os.cpu_count() or 1)
+
+    def _initial_partition(self, master: int) -> List[List[int]]:
+        k = max(1, math.ceil(self.instance.num_customers / self.dconf.target_size))
+        if self.dconf.method == "cluster":
+            return partition_cluster(self.instance, k, make_rng(master, "decomp", "cluster"), self.dconf.time_weight)
+        return partition_polar(self.instance, k)
+
+    def _solve_parts(self, pool, parts: List[List[int]], master: int, round_idx: int) -> List[List[List[int]]]:
+        """Returns, per part, its routes as original customer ids."""
+        subs = [build_subinstance(self.instance, ids) for ids in parts]
+        seeds = [derive_seed(master, "decomp", round_idx, i) for i in range(len(parts))]
+        hook = progress.active
+        deadline = hook.deadline if hook is not None else None
+        rounds_left = self.dconf.rounds + 1 - round_idx
+        if pool is None:
+            compacts = []
+            for i, ((sub, _), s) in enumerate(zip(subs, seeds)):
+                # Parts left in this round plus as many per later round; time a part leaves goes to the next
+                config = self._part_config(deadline, (len(parts) - i) + len(parts) * (rounds_left - 1))
+                compacts.append(_solve_subproblem(sub, config, s))
+        else:
+            waves = math.ceil(len(parts) / max(1, self.workers))
+            config = self._part_config(deadline, waves * rounds_left)
+            cancel_event = hook.cancel_event if hook is not None else None
+            futures = [pool.submit(_solve_subproblem, sub, config, s, cancel_event) for (sub, _), s in zip(subs, seeds)]
+            compacts = [f.result() for f in futures]
+        return [[[mapping[i] for i in r] for r in c.routes if r] for (_, mapping), c in zip(subs, compacts)]
+
+    def _part_config(self, deadline: Optional[float], slots: int) -> HybridConfig:
+        """Subproblem config with 1/slots of the time left before `deadline` (None: no limit)."""
+        if deadline is None:
+            return self.sub_config
+        seconds = max(0.0, deadline - time.monotonic()) / max(1, slots)
+        return dataclasses.replace(self.sub_config, time_limit=seconds)
+
+    def _better(self, candidate: List[List[int]], current: List[List[int]]) -> bool:
+        """True if candidate is feasible and current is not, or equally feasible and cheaper."""
+        cand_infeasible, cand_cost = _routes_key(self.instance, self.data, candidate)
+        infeasible, cost = _routes_key(self.instance, self.data, current)
+        if cand_infeasible != infeasible:
+            return not cand_infeasible
+        return cand_cost < cost - 1e-9
+
+    def _to_solution(self, routes: List[List[int]]) -> Solution:
+        nodes = self.instance.nodes
+        depot = nodes[0]
+        return Solution([Route(nodes=[depot] + [nodes[i] for i in ids] + [depot]) for ids in routes], self.instance)
+
+    def solve(self, master: int) -> Tuple[Solution, List[float]]:
+        workers = self.dconf.max_workers
+        tracer = trace.active
+        pool = None
+        if workers != 0:
+            # Only a process queue (trace.start(..., multiprocess=True)) can reach the workers
+            trace_queue = tracer.queue if tracer is not None and not isinstance(tracer.queue, queue.SimpleQueue) else None
+            if tracer is not None and trace_queue is None:
+                logger.warning("Trace queue is in-process only; subproblem events are not traced")
+            # Not forked: the parent may be running logging, trace or job threads
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                       initializer=_init_worker,
+                                       initargs=(trace_queue, tracer.sample_every if tracer is not None else 1))
+        history = []
+        hook = progress.active
+        try:
+            parts = self._initial_partition(master)
+            logger.info("Decomposition round 0: %d subproblems (%s)", len(parts), self.dconf.method)
+            routes = []
+            for ids, cand_routes in zip(parts, self._solve_parts(pool, parts, master, 0)):
+                singles = [[c] for c in ids]
+                keep = self._better(cand_routes, singles)
+                routes.extend(cand_routes if keep else singles)
+            best = self._to_solution(routes)
+            history.append(best.fitness())
+            if tracer is not None:
+                tracer.emit("iteration", stage="Decomposition", step=0, best=best.fitness(), parts=len(parts))
+
+            route_ids = [[n.id for n in r.nodes if n.id != 0] for r in best.routes]
+            if hook is not None:
+                hook.incumbent("Decomposition", 0, best.fitness(), best)
+            for round_idx in range(1, self.dconf.rounds + 1):
+                if hook is not None and hook.should_stop():
+                    break
+                # Rotate the sector boundaries so routes that were split apart get solved together
+                offset = round_idx * math.pi / (self.dconf.rounds + 1)
+                current = self._to_solution(route_ids)
+                parts = partition_routes(current, self.dconf.target_size, offset)
+                improved = 0
+                new_routes = []
+                for ids, cand_routes in zip(parts, self._solve_parts(pool, parts, master, round_idx)):
+                    members = set(ids)
+                    old_routes = [r for r in route_ids if r and r[0] in members]
+                    if self._better(cand_routes, old_routes):
+                        new_routes.extend(cand_routes)
+                        improved += 1
+                    else:
+                        new_routes.extend(old_routes)
+                route_ids = new_routes
+                candidate = self._to_solution(route_ids)
+                if candidate.fitness() <= best.fitness():
+                    best = candidate
+                    if hook is not None:
+                        hook.incumbent("Decomposition", round_idx, best.fitness(), best)
+                history.append(best.fitness())
+                logger.info("Decomposition round %d: %d/%d subproblems improved, cost %.2f",
+                            round_idx, improved, len(parts), best.fitness())
+                if tracer is not None:
+                    tracer.emit("iteration", stage="Decomposition", step=round_idx, best=best.fitness(),
+                                parts=len(parts), improved=improved)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return best, history
@@ -0,0 +1,142 @@
+"""
+Granular local search for the GA's offspring ("education", as in hybrid
+genetic search, Vidal et al. 2012).
+
+Only short-range moves are tried: for every customer u and each of its
+`neighbors` nearest customers v, relocate u right before or after v, swap u
+and v, or exchange route tails so that u is followed by v (2-opt*). Moves
+between two routes are evaluated in O(1) from the routes' prefix/suffix
+segments (src.core.segments), moves within one route in O(route length).
+The first improving feasible move is applied; the search ends at a local
+optimum or when the child's budget of evaluated moves is spent.
+"""
+import heapq
+from typing import List, Tuple
+
+from src.core import segments
+from src.core.models import CVRPTWInstance
+from src.core.route_state import InstanceData
+from src.utils import instrumentation
+
+_EPS = 1e-9
+
+
+def granular_neighbors(instance: CVRPTWInstance, k: int) -> List[List[int]]:
+    """neighbors[u]: the k customers closest to customer u (min of both directions), nearest first."""
+    dm = instance.distance_matrix
+    n = instance.num_customers
+    result: List[List[int]] = [[]]
+    for u in range(1, n + 1):
+        row = dm[u]
+        others = (v for v in range(1, n + 1) if v != u)
+        result.append(heapq.nsmallest(k, others, key=lambda v: min(row[v], dm[v][u])))
+    return result
+
+
+class Educator:
+    def __init__(self, instance: CVRPTWInstance, neighbors: int, max_moves: int):
+        self.instance = instance
+        self.data = InstanceData(instance)
+        self.neighbors = granular_neighbors(instance, neighbors)
+        self.max_moves = max_moves
+
+    def educate(self, routes: List[List[int]], rng) -> Tuple[List[List[int]], int]:
+        """Improves a feasible solution given as customer id lists; returns (routes, moves applied)."""
+        data = self.data
+        capacity = data.capacity
+        vehicle_cost = self.instance.vehicle_cost
+        routes = [list(ids) for ids in routes if ids]
+        route_of = [0] * (self.instance.num_customers + 1)
+        pos_of = [0] * (self.instance.num_customers + 1)
+        prefixes: List[list] = [None] * len(routes)
+        suffixes: List[list] = [None] * len(routes)
+
+        def index(r):
+            for p, c in enumerate(routes[r], start=1):
+                route_of[c] = r
+                pos_of[c] = p
+            prefixes[r], suffixes[r] = segments.prefix_suffix(data, routes[r])
+
+        for r in range(len(routes)):
+            index(r)
+
+        def cost(seg, size):
+            if seg.time_warp > _EPS or seg.load > capacity:
+                return None
+            return seg.distance + (vehicle_cost if size else 0.0)
+
+        def old_cost(r):
+            return suffixes[r][0].distance + (vehicle_cost if routes[r] else 0.0)
+
+        budget = self.max_moves
+        applied = 0
+        order = list(range(1, self.instance.num_customers + 1))
+        improved = True
+        while improved and budget > 0:
+            improved = False
+            rng.shuffle(order)
+            for u in order:
+                for v in self.neighbors[u]:
+                    ru, rv = route_of[u], route_of[v]
+                    i, j = pos_of[u], pos_of[v]
+                    ids_u, ids_v = routes[ru], routes[rv]
+                    best = None
+                    for changes in self._candidates(ru, rv, i, j, u, v, ids_u, ids_v, prefixes, suffixes):
+                        budget -= 1
+                        total = 0.0
+                        for r, (new_ids, seg) in changes.items():
+                            c = cost(seg, len(new_ids))
+                            if c is None:
+                                break
+                            total += c - old_cost(r)
+                        else:
+                            if total < -_EPS:
+                                best = changes
+                                break
+                        if budget <= 0:
+                            break
+                    if best is not None:
+                        for r, (new_ids, _) in best.items():
+                            routes[r] = new_ids
+                            index(r)
+                        applied += 1
+                        improved = True
+                    if budget <= 0:
+                        break
+                if budget <= 0:
+                    break
+        stats = instrumentation.active
+        if stats is not None:
+            stats.feasibility_checks += self.max_moves - max(budget, 0)
+        return [ids for ids in routes if ids], applied
+
+    def _candidates(self, ru, rv, i, j, u, v, ids_u, ids_v, prefixes, suffixes):
+        """Moves of u towards its neighbour v, each as {route index: (new ids, new segment)}."""
+        data = self.data
+        concat, single = segments.concat, segments.single
+        if ru == rv:
+            rest = ids_u[:i - 1] + ids_u[i:]
+            at = rest.index(v)
+            for new_ids in (rest[:at] + [u] + rest[at:], rest[:at + 1] + [u] + rest[at + 1:]):
+                yield {ru: (new_ids, segments.sequence(data, new_ids))}
+            swapped = ids_u[:]
+            swapped[i - 1], swapped[j - 1] = v, u
+            yield {ru: (swapped, segments.sequence(data, swapped))}
+            return
+        pre_u, suf_u, pre_v, suf_v = prefixes[ru], suffixes[ru], prefixes[rv], suffixes[rv]
+        removed = concat(data, pre_u[i - 1], suf_u[i + 1])
+        without_u = ids_u[:i - 1] + ids_u[i:]
+        # Relocate u before v, then after v
+        yield {ru: (without_u, removed),
+               rv: (ids_v[:j - 1] + [u] + ids_v[j - 1:], concat(data, concat(data, pre_v[j - 1], single(data, u)),
+                                                                 suf_v[j]))}
+        yield {ru: (without_u, removed),
+               rv: (ids_v[:j] + [u] + ids_v[j:], concat(data, concat(data, pre_v[j], single(data, u)), suf_v[j + 1]))}
+        # Swap u and v
+        new_u, new_v = ids_u[:], ids_v[:]
+        new_u[i - 1], new_v[j - 1] = v, u
+        yield {ru: (new_u, concat(data, concat(data, pre_u[i - 1], single(data, v)), suf_u[i + 1])),
+               rv: (new_v, concat(data, concat(data, pre_v[j - 1], single(data, u)), suf_v[j + 1]))}
+        # 2-opt*: u's head followed by v and its tail, v's head followed by u's tail
+        yield {ru: (ids_u[:i] + ids_v[j - 1:], concat(data, pre_u[i], suf_v[j])),
+               rv: (ids_v[:j - 1] + ids_u[i:], concat(data, pre_v[j - 1], suf_u[i + 1]))}
@@ -1,20 +1,30 @@
 import random
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from src.core.models import CVRPTWInstance, Route, Node
 from src.core.solution import Solution
 from src.interfaces import SolverStrategy
 from src.config import GAConfig
 from src.utils.logger import logger
+from src.utils import convergence, instrumentation, progress, trace
+from src.utils.rng import resolve_seed
 
 class GASolver(SolverStrategy):
     """
     Stage 2: Genetic Algorithm
-    Evolves population using Order Crossover and Mutation.
+    Evolves population using Order Crossover and Mutation. With config.education
+    every child is improved by a granular local search (memetic GA) and children
+    identical to an individual already present are discarded.
     """
-    def __init__(self, instance: CVRPTWInstance, config: GAConfig):
+    def __init__(self, instance: CVRPTWInstance, config: GAConfig, seed: Optional[int] = None):
         self.instance = instance
         self.config = config
-        logger.debug(f"Initialized GASolver with pop_size={config.population_size}")
+        self.reseed(seed)
+        self._educator = None
+        logger.debug("Initialized GASolver with pop_size=%d", config.population_size)
+
+    def reseed(self, seed: Optional[int] = None):
+        self.seed = resolve_seed(seed)
+        self.rng = random.Random(self.seed)
 
     def solve(self, initial_solutions: List[Solution]) -> Tuple[Solution, List[float]]:
         history = []
@@ -27,14 +37,30 @@ class GASolver(SolverStrategy):
             
         best_overall = min(population, key=lambda x: x.fitness())
         history.append(best_overall.fitness())
+        hook = progress.active
+        monitor = convergence.monitor(self.config.convergence)
+        min_diversity = self.config.min_diversity
+        educator = self._get_educator()
         
         for gen in range(self.config.generations):
+            if hook is not None and hook.should_stop():
+                break
             new_pop = []
             
             # Elitism
             new_pop.append(best_overall)
+            if educator is not None:
+                keys = {self._key(self._route_ids(s.routes)) for s in population}
+                # Past this many children, a converged population may accept clones
+                max_attempts = 2 * self.config.population_size
+                attempts = 0
+                moves = 0
             
             while len(new_pop) < self.config.population_size:
+                # A generation can take seconds on large instances: stop with a partial one
+                # (the elite is always in it); the check above then ends the run
+                if hook is not None and hook.should_stop():
+                    break
                 p1 = self._tournament_selection(population)
                 p2 = self._tournament_selection(population)
                 
@@ -42,26 +68,90 @@ class GASolver(SolverStrategy):
                 child_routes = self._ordered_crossover(p1, p2)
                 
                 # Mutation
-                if random.random() < self.config.mutation_rate:
+                if self.rng.random() < self.config.mutation_rate:
                     child_routes = self._mutate(child_routes)
                 
-                child = Solution(child_routes, self.instance)
-                new_pop.append(child)
+                if educator is None:
+                    new_pop.append(Solution(child_routes, self.instance))
+                    continue
+                attempts += 1
+                unique = attempts <= max_attempts
+                ids = self._route_ids(child_routes)
+                if unique and self._key(ids) in keys:
+                    # A known solution: skipped without educating it
+                    instrumentation.record_cache("ga_clones", True)
+                    continue
+                ids, applied = educator.educate(ids, self.rng)
+                moves += applied
+                key = self._key(ids)
+                if unique and key in keys:
+                    instrumentation.record_cache("ga_clones", True)
+                    continue
+                instrumentation.record_cache("ga_clones", False)
+                keys.add(key)
+                new_pop.append(self._to_solution(ids))
             
             population = new_pop
+            tracer = trace.active
             current_best = min(population, key=lambda x: x.fitness())
             if current_best.fitness() < best_overall.fitness():
                 best_overall = current_best
+                if tracer is not None:
+                    tracer.emit("incumbent", stage="GA", step=gen, cost=best_overall.fitness())
+                if hook is not None:
+                    hook.incumbent("GA", gen, best_overall.fitness(), best_overall)
             
             history.append(best_overall.fitness())
+            if tracer is not None and tracer.sampled(gen):
+                tracer.emit("iteration", stage="GA", step=gen, best=best_overall.fitness(),
+                            generation_best=current_best.fitness())
+            if hook is not None:
+                hook.iteration("GA", gen, best_overall.fitness())
             if gen % 10 == 0:
-                logger.debug(f"GA Gen {gen}: Best Cost {best_overall.fitness():.2f}")
+                logger.debug("GA Gen %d: Best Cost %.2f", gen, best_overall.fitness())
+                if educator is not None:
+                    logger.debug("GA Gen %d: %d education moves, %d children tried", gen, moves, attempts)
+            if monitor is not None and monitor.update(best_overall.fitness()):
+                convergence.report("GA", gen, monitor.reason)
+                break
+            if min_diversity is not None:
+                diversity = self._diversity(population)
+                if diversity < min_diversity:
+                    convergence.report("GA", gen, f"population diversity {diversity:.2f} < {min_diversity:.2f}")
+                    break
                 
         return best_overall, history
 
+    def _get_educator(self):
+        if not self.config.education:
+            return None
+        if self._educator is None:
+            from src.solvers.education import Educator
+            self._educator = Educator(self.instance, self.config.education_neighbors, self.config.education_moves)
+        return self._educator
+
+    @staticmethod
+    def _route_ids(routes: List[Route]) -> List[List[int]]:
+        return [[n.id for n in r.nodes if n.id != 0] for r in routes]
+
+    @staticmethod
+    def _key(routes: List[List[int]]) -> tuple:
+        """Identity of a solution: its routes as customer id tuples, in canonical order."""
+        return tuple(sorted(tuple(ids) for ids in routes if ids))
+
+    def _to_solution(self, routes: List[List[int]]) -> Solution:
+        nodes = self.instance.nodes
+        depot = nodes[0]
+        return Solution([Route(nodes=[depot] + [nodes[i] for i in ids] + [depot]) for ids in routes], self.instance)
+
+    @staticmethod
+    def _diversity(population: List[Solution]) -> float:
+        """Share of distinct costs in the population (1.0: all different)."""
+        return len({round(s.total_distance, 6) for s in population}) / len(population)
+
     def _generate_random_solution(self) -> Solution:
         customers = self.instance.get_customers()
-        random.shuffle(customers)
+        self.rng.shuffle(customers)
         return self._split_into_routes(customers)
 
     def _split_into_routes(self, customers: List[Node]) -> Solution:
@@ -69,6 +159,10 @@ class GASolver(SolverStrategy):
         route_nodes = [self.instance.get_depot()]
         load = 0
         time = 0
+
+        stats = instrumentation.active
+        if stats is not None:
+            stats.feasibility_checks += len(customers)
         
         for c in customers:
             dist = self.instance.distance_matrix[route_nodes[-1].id][c.id]
@@ -97,7 +191,7 @@ class GASolver(SolverStrategy):
         return Solution(routes, self.instance)
 
     def _tournament_selection(self, pop: List[Solution], k=3) -> Solution:
-        candidates = random.sample(pop, k)
+        candidates = self.rng.sample(pop, k)
         return min(candidates, key=lambda x: x.fitness())
 
     def _ordered_crossover(self, p1: Solution, p2: Solution) -> List[Route]:
@@ -108,7 +202,7 @@ class GASolver(SolverStrategy):
             return p1.routes
             
         size = len(t1)
-        start, end = sorted(random.sample(range(size), 2))
+        start, end = sorted(self.rng.sample(range(size), 2))
         
         child_p = [None] * size
         child_p[start:end] = t1[start:end]
@@ -128,7 +222,7 @@ class GASolver(SolverStrategy):
         if len(flat) < 2:
             return routes
             
-        i, j = random.sample(range(len(flat)), 2)
+        i, j = self.rng.sample(range(len(flat)), 2)
         flat[i], flat[j] = flat[j], flat[i]
         
         return self._split_into_routes(flat).routes
@@ -1,3 +1,7 @@
+import time
+from contextlib import contextmanager, ExitStack
+from typing import Optional
+from src.core.bounds import lower_bounds
 from src.core.models import CVRPTWInstance
 from src.core.solution import Solution
 from src.interfaces import SolverStrategy
@@ -5,37 +9,170 @@ from src.config import HybridConfig
 from src.solvers.aco import ACOSolver
 from src.solvers.ga import GASolver
 from src.solvers.tabu import TabuSolver
+from src.solvers.alns import ALNSSolver
+from src.solvers.route_min import RouteMinimizer
 from src.utils.logger import logger
+from src.utils import instrumentation, progress, trace
+from src.utils.rng import derive_seed, resolve_seed
+
+IMPROVEMENT_STAGES = {"tabu": ("Tabu",), "alns": ("ALNS",), "tabu+alns": ("Tabu", "ALNS")}
+OBJECTIVES = ("distance", "vehicles")
 
 class HybridSolver(SolverStrategy):
-    def __init__(self, instance: CVRPTWInstance, config: HybridConfig):
+    def __init__(self, instance: CVRPTWInstance, config: HybridConfig, profiler=None):
+        if config.objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective '{config.objective}', expected one of {OBJECTIVES}")
+        if config.target_gap is not None and config.objective != "distance":
+            # The bound and the gap are on distance; the vehicles objective has no comparable bound
+            raise ValueError("target_gap requires the 'distance' objective")
+        # Returned solutions refer to the caller's instance, whatever cost the stages optimise
+        self.original_instance = instance
+        if config.objective == "vehicles":
+            # Every stage minimises Solution.fitness(); a dominant vehicle cost makes it lexicographic
+            instance = instance.with_vehicle_cost(instance.vehicles_first_cost())
         self.instance = instance
         self.config = config
-        self.aco = ACOSolver(instance, config.aco)
-        self.ga = GASolver(instance, config.ga)
-        self.tabu = TabuSolver(instance, config.tabu)
+        # Optional StageProfiler (src.utils.profiling); each stage is profiled separately
+        self.profiler = profiler
+        if config.improvement not in IMPROVEMENT_STAGES:
+            raise ValueError(f"Unknown improvement '{config.improvement}', expected one of {list(IMPROVEMENT_STAGES)}")
+        self.improvement = IMPROVEMENT_STAGES[config.improvement]
+        dconf = config.decomposition
+        self.decompose = dconf.enabled and instance.num_customers > dconf.target_size
+        if self.decompose:
+            # Stage solvers only run on subproblems; skip their O(n^2) precomputation here
+            from src.solvers.decomposition import DecompositionSolver
+            self.decomposition = DecompositionSolver(instance, config)
+            self.aco = self.ga = self.tabu = self.alns = self.route_min = None
+        else:
+            self.aco = ACOSolver(instance, config.aco)
+            self.ga = GASolver(instance, config.ga)
+            self.tabu = TabuSolver(instance, config.tabu)
+            self.alns = ALNSSolver(instance, config.alns) if "ALNS" in self.improvement else None
+            self.route_min = RouteMinimizer(instance, config.route_min) if config.route_min.enabled else None
         logger.info("Initialized HybridSolver")
 
-    def solve(self) -> Solution:
+    def reset(self):
+        """Clears per-run state so the same solver (and its per-instance precomputation) can solve again."""
+        if self.decompose:
+            return
+        self.aco.reset()
+        self.tabu.reset()
+
+    def _stage_seconds(self, name: str, plan, end: Optional[float]) -> Optional[float]:
+        """This stage's time_shares part of the time left for it and the stages after it."""
+        if end is None:
+            return None
+        shares = self.config.time_shares
+        rest = plan[plan.index(name):]
+        total = sum(shares.get(s, 1.0) for s in rest)
+        return max(0.0, end - time.monotonic()) * shares.get(name, 1.0) / total
+
+    @contextmanager
+    def _stage(self, report, name: str, seconds: Optional[float] = None):
+        tracer = trace.active
+        if tracer is not None:
+            tracer.emit("stage_start", stage=name)
+        with ExitStack() as stack:
+            stack.enter_context(progress.time_limit(seconds))
+            stack.enter_context(instrumentation.stage(report, name, self.config.instrumentation.trace_memory))
+            if self.profiler is not None:
+                stack.enter_context(self.profiler.stage(name))
+            yield
+        if tracer is not None:
+            tracer.emit("stage_end", stage=name)
+
+    def solve(self, seed: Optional[int] = None) -> Solution:
+        """
+        Runs ACO -> GA -> [RouteMin] -> Tabu/ALNS (config.improvement). The master seed is `seed`, else config.seed, else drawn
+        from `random`; each stage gets its own derived stream and the seed used is
+        recorded on the returned solution, so any run can be replayed exactly.
+        config.time_limit bounds the whole run; with config.target_gap it ends as soon as
+        the incumbent is within that gap of the lower bound (solution.lower_bound).
+        """
+        self.reset()
+        master = resolve_seed(seed if seed is not None else self.config.seed)
+        target = None
+        with progress.time_limit(self.config.time_limit):
+            # The bound counts against the time limit (the stages share what is left)
+            if self.config.target_gap is not None:
+                bound = lower_bounds(self.instance).cost(self.instance.vehicle_cost)
+                target = bound * (1.0 + self.config.target_gap)
+                logger.info("Lower bound %.2f; stopping at cost %.2f", bound, target)
+            with progress.stop_at(target):
+                solution = self._solve_decomposed(master) if self.decompose else self._solve(master)
+                if target is not None and progress.active.target_reached:
+                    logger.info("Target gap reached: cost %.2f <= %.2f", solution.fitness(), target)
+        # The vehicles objective's dominant vehicle cost stays internal to the stages
+        solution.instance = self.original_instance
+        if target is not None:
+            solution.lower_bound = lower_bounds(self.instance).cost(self.original_instance.vehicle_cost)
+        logger.info("Hybrid Solver Finished. Final Cost: %.2f", solution.fitness())
+        return solution
+
+    def _solve(self, master: int) -> Solution:
+        self.aco.reseed(derive_seed(master, "aco"))
+        self.ga.reseed(derive_seed(master, "ga"))
+        self.tabu.reseed(derive_seed(master, "tabu"))
+        if self.alns is not None:
+            self.alns.reseed(derive_seed(master, "alns"))
+        if self.route_min is not None:
+            self.route_min.reseed(derive_seed(master, "route_min"))
         full_history = []
+        inst_cfg = self.config.instrumentation
+        report = instrumentation.SolverReport() if inst_cfg.enabled else None
+        # With a time limit every stage gets a share of what is left when it starts. solve() installed
+        # the deadline (config.time_limit, or an earlier one from the caller's reporter)
+        plan = ["ACO", "GA"] + (["RouteMin"] if self.route_min is not None else []) + list(self.improvement)
+        end = progress.active.deadline if progress.active is not None else None
         
         # Stage 1: ACO
         logger.info("Starting Stage 1: ACO")
-        aco_solutions, aco_hist = self.aco.solve()
+        with self._stage(report, "ACO", self._stage_seconds("ACO", plan, end)):
+            aco_solutions, aco_hist = self.aco.solve()
         full_history.extend([('ACO', i, cost) for i, cost in enumerate(aco_hist)])
         
         # Stage 2: GA
         logger.info("Starting Stage 2: GA")
-        ga_solution, ga_hist = self.ga.solve(aco_solutions)
+        with self._stage(report, "GA", self._stage_seconds("GA", plan, end)):
+            ga_solution, ga_hist = self.ga.solve(aco_solutions)
         full_history.extend([('GA', i, cost) for i, cost in enumerate(ga_hist)])
         
-        # Stage 3: Tabu
-        logger.info("Starting Stage 3: Tabu")
-        final_solution, tabu_hist = self.tabu.solve(ga_solution)
-        full_history.extend([('Tabu', i, cost) for i, cost in enumerate(tabu_hist)])
+        final_solution = ga_solution
+        if self.route_min is not None:
+            logger.info("Starting Stage 2b: Route minimization")
+            with self._stage(report, "RouteMin", self._stage_seconds("RouteMin", plan, end)):
+                final_solution, rm_hist = self.route_min.solve(final_solution)
+            full_history.extend([('RouteMin', i, cost) for i, cost in enumerate(rm_hist)])
+
+        # Stage 3: Tabu and/or ALNS
+        for name in self.improvement:
+            logger.info("Starting Stage 3: %s", name)
+            stage_solver = self.tabu if name == "Tabu" else self.alns
+            with self._stage(report, name, self._stage_seconds(name, plan, end)):
+                final_solution, stage_hist = stage_solver.solve(final_solution)
+            full_history.extend([(name, i, cost) for i, cost in enumerate(stage_hist)])
         
         # Attach history to solution for plotting
         final_solution.history = full_history
-        logger.info(f"Hybrid Solver Finished. Final Cost: {final_solution.fitness():.2f}")
+        final_solution.metrics = report
+        final_solution.seed = master
+        if report is not None and inst_cfg.openmetrics_path:
+            instrumentation.write_openmetrics(report, inst_cfg.openmetrics_path)
         
         return final_solution
+
+    def _solve_decomposed(self, master: int) -> Solution:
+        """Large instances: solve subproblems with the full pipeline and merge (see decomposition.py)."""
+        inst_cfg = self.config.instrumentation
+        report = instrumentation.SolverReport() if inst_cfg.enabled else None
+        logger.info("Decomposing %d customers (%s, ~%d per subproblem)", self.instance.num_customers,
+                    self.config.decomposition.method, self.config.decomposition.target_size)
+        with self._stage(report, "Decomposition"):
+            final_solution, hist = self.decomposition.solve(master)
+        final_solution.history = [('Decomposition', i, cost) for i, cost in enumerate(hist)]
+        final_solution.metrics = report
+        final_solution.seed = master
+        if report is not None and inst_cfg.openmetrics_path:
+            instrumentation.write_openmetrics(report, inst_cfg.openmetrics_path)
+        return final_solution
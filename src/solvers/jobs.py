@@ -0,0 +1,323 @@
+"""
+Background solve jobs with live progress and cancellation.
+
+JobManager runs HybridSolver jobs on a process pool and keeps a JobStatus per
+job that a UI (or server) can poll without blocking: state, current stage and
+step, best cost, the latest incumbent (as a CompactSolution) and, at the end,
+the final solution. Workers report through src.utils.progress; a listener
+thread in the parent applies those messages. cancel() stops a queued job
+immediately and asks a running one to stop, in which case it finishes with the
+best solution found so far (state "cancelled"). A job's time_limit stops it
+the same way, but it ends as "done".
+
+Workers keep their HybridSolver per (instance, config) between jobs, so
+per-instance precomputation is reused when the same instance is solved again.
+Submitting an InstanceSpec instead of an instance only ships the nodes: each
+worker builds the distance matrix once and keeps the instance in memory.
+With max_pending set, submit() raises JobQueueFull instead of queueing more
+than that many unfinished jobs.
+"""
+import dataclasses
+import itertools
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from src.config import HybridConfig
+from src.core.encoding import CompactSolution, decode_solution, instance_digest, nodes_digest
+from src.core.models import CVRPTWInstance, Node
+from src.core.solution import Solution
+from src.utils import progress
+from src.utils.rng import resolve_seed
+
+FINAL_STATES = ("done", "cancelled", "failed")
+# Warm solvers and instances kept per worker process
+_MAX_CACHED_SOLVERS = 8
+_MAX_CACHED_INSTANCES = 8
+
+
+class JobQueueFull(RuntimeError):
+    """Raised by submit() when max_pending unfinished jobs are already queued or running."""
+
+
+@dataclass(frozen=True)
+class InstanceSpec:
+    """Nodes and capacity of a Euclidean instance, small enough to send with every job."""
+    digest: str
+    nodes: Tuple[Node, ...]
+    vehicle_capacity: float
+
+    @classmethod
+    def of(cls, instance: CVRPTWInstance) -> "InstanceSpec":
+        if instance.matrix_handle is not None or not instance.euclidean:
+            raise ValueError("instances with an external distance matrix are submitted as is")
+        return cls(instance_digest(instance), tuple(instance.nodes), instance.vehicle_capacity)
+
+    @classmethod
+    def from_nodes(cls, nodes: Sequence[Node], vehicle_capacity: float) -> "InstanceSpec":
+        """Spec without building the instance (its distance matrix is only built in the workers)."""
+        if not nodes or [n.id for n in nodes] != list(range(len(nodes))):
+            raise ValueError("nodes must be numbered 0..n with the depot first")
+        depot = nodes[0]
+        for n in nodes[1:]:
+            # A customer no single-customer trip can serve makes every solution infeasible
+            if n.demand > vehicle_capacity:
+                raise ValueError(f"customer {n.id}: demand {n.demand:g} exceeds capacity {vehicle_capacity:g}")
+            start = max(depot.distance_to(n), n.ready_time)
+            if start > n.due_date:
+                raise ValueError(f"customer {n.id}: due date {n.due_date:g} is before the earliest arrival {start:g}")
+            if start + n.service_time + n.distance_to(depot) > depot.due_date:
+                raise ValueError(f"customer {n.id}: cannot return to the depot by {depot.due_date:g}")
+        return cls(nodes_digest(nodes, vehicle_capacity), tuple(nodes), float(vehicle_capacity))
+
+    @property
+    def num_customers(self) -> int:
+        return len(self.nodes) - 1
+
+    def build(self) -> CVRPTWInstance:
+        return CVRPTWInstance.from_nodes(list(self.nodes), self.vehicle_capacity)
+
+
+@dataclass
+class JobStatus:
+    job_id: int
+    label: str
+    seed: int
+    time_limit: Optional[float] = None
+    state: str = "queued"  # queued | running | done | cancelled | failed
+    stage: Optional[str] = None
+    step: int = 0
+    best: float = float("inf")
+    incumbent: Optional[CompactSolution] = None
+    compact: Optional[CompactSolution] = None  # final solution (also set for cancelled jobs)
+    solve_time: float = 0.0
+    history: list = field(default_factory=list)
+    error: Optional[str] = None
+    submitted_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINAL_STATES
+
+
+# Worker-process state
+_solvers: Dict[Tuple[str, str], object] = {}
+_instances: Dict[str, CVRPTWInstance] = {}
+
+
+def _warm_worker():
+    """Pool initializer: pays the solver imports before the first job arrives."""
+    import src.solvers.hybrid  # noqa: F401
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _instance_for(spec: InstanceSpec) -> CVRPTWInstance:
+    instance = _instances.get(spec.digest)
+    if instance is None:
+        if len(_instances) >= _MAX_CACHED_INSTANCES:
+            _instances.pop(next(iter(_instances)))
+        instance = spec.build()
+        instance._digest = spec.digest
+        _instances[spec.digest] = instance
+    return instance
+
+
+def _solver_for(instance: CVRPTWInstance, config: HybridConfig):
+    from src.solvers.hybrid import HybridSolver
+    from src.utils.results_store import config_digest
+    key = (instance_digest(instance), config_digest(config))
+    solver = _solvers.get(key)
+    if solver is None:
+        if len(_solvers) >= _MAX_CACHED_SOLVERS:
+            _solvers.pop(next(iter(_solvers)))
+        solver = HybridSolver(instance, config)
+        _solvers[key] = solver
+    return solver
+
+
+def _run_job(job_id: int, instance: Union[CVRPTWInstance, InstanceSpec], config: HybridConfig, seed: int,
+             queue, cancel_event, interval: float,
+             time_limit: Optional[float] = None) -> Tuple[CompactSolution, float, float, bool, list]:
+    # The time budget counts from the start of the job, including a cold instance build
+    deadline = time.monotonic() + time_limit if time_limit is not None else None
+    reporter = progress.ProgressReporter(job_id, queue, cancel_event, interval, deadline=deadline)
+    queue.put(("started", job_id))
+    progress.install(reporter)
+    try:
+        if isinstance(instance, InstanceSpec):
+            instance = _instance_for(instance)
+        solver = _solver_for(instance, config)
+        t0 = time.perf_counter()
+        sol = solver.solve(seed=seed)
+        dt = time.perf_counter() - t0
+        reporter.flush()
+        # fitness() includes the instance's vehicle cost, which the compact form does not carry
+        return sol.to_compact(), sol.fitness(), dt, reporter.cancelled(), sol.history
+    finally:
+        progress.install(None)
+
+
+class JobManager:
+    """
+    Process pool for background solves. max_workers=None uses all cores.
+    Workers are started with "spawn" by default, which is safe from threaded
+    hosts such as a Streamlit or HTTP server. max_pending bounds the number of
+    unfinished jobs (None: unbounded).
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, progress_interval: float = 0.5,
+                 mp_context: str = "spawn", max_pending: Optional[int] = None):
+        ctx = mp.get_context(mp_context)
+        self.progress_interval = progress_interval
+        self.max_pending = max_pending
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._manager = ctx.Manager()
+        self._queue = self._manager.Queue()
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx,
+                                         initializer=_warm_worker)
+        self._jobs: Dict[int, JobStatus] = {}
+        self._cancel: Dict[int, object] = {}
+        self._futures: Dict[int, object] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._listener = threading.Thread(target=self._listen, name="job-progress", daemon=True)
+        self._listener.start()
+
+    def warm_up(self, timeout: Optional[float] = None):
+        """Starts every worker now (imports included) instead of on the first jobs."""
+        futures = [self._pool.submit(_ping) for _ in range(self.max_workers)]
+        for f in futures:
+            f.result(timeout=timeout)
+
+    def pending(self) -> int:
+        """Number of queued or running jobs."""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def submit(self, instance: Union[CVRPTWInstance, InstanceSpec], config: HybridConfig,
+               seed: Optional[int] = None, label: str = "", time_limit: Optional[float] = None) -> int:
+        seed = resolve_seed(seed if seed is not None else config.seed)
+        cancel_event = self._manager.Event()
+        with self._lock:
+            if self.max_pending is not None and \
+                    sum(1 for job in self._jobs.values() if not job.finished) >= self.max_pending:
+                raise JobQueueFull(f"{self.max_pending} jobs already pending")
+            job_id = next(self._ids)
+            self._jobs[job_id] = JobStatus(job_id, label, seed, time_limit, submitted_at=time.time())
+            self._cancel[job_id] = cancel_event
+        future = self._pool.submit(_run_job, job_id, instance, config, seed,
+                                   self._queue, cancel_event, self.progress_interval, time_limit)
+        self._futures[job_id] = future
+        future.add_done_callback(lambda f, job_id=job_id: self._on_done(job_id, f))
+        return job_id
+
+    def _listen(self):
+        while True:
+            try:
+                msg = self._queue.get()
+            except (EOFError, OSError):
+                return
+            if msg is None:
+                return
+            kind, job_id = msg[0], msg[1]
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job.finished:
+                    continue
+                if kind == "started":
+                    job.state = "running"
+                    job.started_at = time.time()
+                elif kind == "progress":
+                    job.stage, job.step, job.best = msg[2], msg[3], msg[4]
+                elif kind == "incumbent":
+                    job.stage, job.step, job.best, job.incumbent = msg[2], msg[3], msg[4], msg[5]
+
+    def _on_done(self, job_id: int, future):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.finished_at = time.time()
+            if future.cancelled():
+                job.state = "cancelled"
+                return
+            exc = future.exception()
+            if exc is not None:
+                job.state = "failed"
+                job.error = f"{type(exc).__name__}: {exc}"
+                return
+            compact, cost, dt, stopped, history = future.result()
+            job.compact = compact
+            job.solve_time = dt
+            job.history = history
+            job.best = cost if compact.is_feasible else float("inf")
+            job.state = "cancelled" if stopped else "done"
+
+    def status(self, job_id: int) -> JobStatus:
+        with self._lock:
+            return dataclasses.replace(self._jobs[job_id])
+
+    def statuses(self, job_ids: Optional[List[int]] = None) -> List[JobStatus]:
+        with self._lock:
+            ids = list(self._jobs) if job_ids is None else job_ids
+            return [dataclasses.replace(self._jobs[i]) for i in ids if i in self._jobs]
+
+    def cancel(self, job_id: int):
+        future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            return
+        event = self._cancel.get(job_id)
+        if event is not None:
+            event.set()
+
+    def wait(self, job_id: int, timeout: Optional[float] = None) -> JobStatus:
+        future = self._futures[job_id]
+        try:
+            future.exception(timeout=timeout)
+        except Exception:
+            pass
+        # The done callback may still be running in the pool's thread
+        deadline = time.monotonic() + 1.0
+        while not self.status(job_id).finished and future.done() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.status(job_id)
+
+    def solution(self, job_id: int, instance: CVRPTWInstance) -> Optional[Solution]:
+        """Final solution, else the latest incumbent, decoded against the caller's instance."""
+        job = self.status(job_id)
+        compact = job.compact or job.incumbent
+        if compact is None:
+            return None
+        sol = decode_solution(compact, instance)
+        sol.history = job.history
+        sol.seed = job.seed
+        return sol
+
+    def forget(self, job_id: int):
+        """Drops a finished job's bookkeeping."""
+        with self._lock:
+            if job_id in self._jobs and self._jobs[job_id].finished:
+                del self._jobs[job_id]
+                self._cancel.pop(job_id, None)
+                self._futures.pop(job_id, None)
+
+    def shutdown(self):
+        for job_id in list(self._futures):
+            self.cancel(job_id)
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._queue.put(None)
+        self._listener.join(timeout=5)
+        self._manager.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
@@ -0,0 +1,192 @@
+import random
+from collections import defaultdict
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from src.core.models import CVRPTWInstance, Route
+from src.core.solution import Solution
+from src.core.route_state import INF, InstanceData, RouteState, route_penalty
+from src.interfaces import SolverStrategy
+from src.config import RouteMinConfig
+from src.utils.logger import logger
+from src.utils import instrumentation, progress, trace
+from src.utils.rng import resolve_seed
+
+# Weight of capacity excess relative to time warp in the squeeze penalty
+LOAD_WEIGHT = 1.0
+
+
+class RouteMinimizer(SolverStrategy):
+    """
+    Route elimination (ejection pool, after Nagata & Braysy).
+    Repeatedly removes the smallest route and reinserts its customers from an
+    ejection pool: feasible insertion first, then a squeeze (insert at the least
+    penalised position and relocate customers out of the violated route until it
+    is feasible), then an ejection insertion that makes room by removing up to
+    `max_ejected` customers, preferring ones that were rarely hard to insert.
+    Stops at the first route that cannot be emptied within the iteration budget.
+    """
+    def __init__(self, instance: CVRPTWInstance, config: RouteMinConfig, seed: Optional[int] = None):
+        self.instance = instance
+        self.config = config
+        self.reseed(seed)
+        self.data = InstanceData(instance)
+        logger.debug("Initialized RouteMinimizer with max_iterations=%d", config.max_iterations)
+
+    def reseed(self, seed: Optional[int] = None):
+        self.seed = resolve_seed(seed)
+        self.rng = random.Random(self.seed)
+
+    def _penalty(self, ids: List[int]) -> float:
+        stats = instrumentation.active
+        if stats is not None:
+            stats.feasibility_checks += 1
+        excess, warp = route_penalty(self.data, ids)
+        return LOAD_WEIGHT * excess + warp
+
+    def _insert_feasible(self, routes: List[RouteState], u: int) -> bool:
+        best, best_route, best_pos = INF, None, -1
+        for route in routes:
+            delta, pos = route.best_insertion(self.data, u)
+            if delta < best:
+                best, best_route, best_pos = delta, route, pos
+        if best_route is None:
+            return False
+        best_route.ids.insert(best_pos, u)
+        best_route.update(self.data)
+        return True
+
+    def _least_penalty_insertion(self, route: RouteState, u: int) -> Tuple[float, int]:
+        best, best_pos = INF, 0
+        ids = route.ids
+        for pos in range(len(ids) + 1):
+            pen = self._penalty(ids[:pos] + [u] + ids[pos:])
+            if pen < best:
+                best, best_pos = pen, pos
+        return best, best_pos
+
+    def _squeeze(self, routes: List[RouteState], u: int) -> bool:
+        """Inserts u at the least penalised position, then relocates customers out of that route."""
+        scored = [(self._least_penalty_insertion(r, u), i) for i, r in enumerate(routes)]
+        (penalty, pos), r_idx = min(scored, key=lambda t: t[0][0])
+        target = routes[r_idx]
+        ids = target.ids[:pos] + [u] + target.ids[pos:]
+        moves = []  # (customer, receiving route, its previous ids) to undo
+        while penalty > 0:
+            best = None
+            for v in ids:
+                if v == u:
+                    continue
+                rest = [w for w in ids if w != v]
+                rest_pen = self._penalty(rest)
+                if rest_pen >= penalty:
+                    continue
+                for j, other in enumerate(routes):
+                    if j == r_idx:
+                        continue
+                    delta, vpos = other.best_insertion(self.data, v)
+                    if delta < INF and (best is None or (rest_pen, delta) < best[:2]):
+                        best = (rest_pen, delta, v, j, vpos, rest)
+            if best is None:
+                break
+            penalty, _, v, j, vpos, ids = best
+            other = routes[j]
+            moves.append((other, other.ids[:]))
+            other.ids.insert(vpos, v)
+            other.update(self.data)
+        if penalty > 0:
+            for other, old_ids in reversed(moves):
+                other.ids = old_ids
+                other.update(self.data)
+            return False
+        target.ids = ids
+        target.update(self.data)
+        return True
+
+    def _eject_insert(self, routes: List[RouteState], u: int, counts: Dict[int, int]) -> Optional[List[int]]:
+        """Inserts u, ejecting the cheapest (by failure counts, then distance) set of <= max_ejected customers."""
+        best = None
+        for r_idx, route in enumerate(routes):
+            _, pos = self._least_penalty_insertion(route, u)
+            ids = route.ids[:pos] + [u] + route.ids[pos:]
+            others = [v for v in ids if v != u]
+            candidates = [(v,) for v in others]
+            if self.config.max_ejected >= 2:
+                candidates += [(a, b) for i, a in enumerate(others) for b in others[i + 1:]]
+            for ejected in candidates:
+                p_sum = sum(counts[v] for v in ejected)
+                if best is not None and p_sum > best[0]:
+                    continue
+                rest = [w for w in ids if w not in ejected]
+                if self._penalty(rest) > 0:
+                    continue
+                state = RouteState(rest)
+                state.update(self.data)
+                key = (p_sum, state.distance - route.distance)
+                if best is None or key < best[:2]:
+                    best = (p_sum, key[1], r_idx, state, list(ejected))
+        if best is None:
+            return None
+        routes[best[2]] = best[3]
+        return best[4]
+
+    def _eliminate_one(self, routes: List[RouteState]) -> Optional[List[RouteState]]:
+        trial = [r.copy() for r in routes]
+        victim = min(range(len(trial)), key=lambda i: (len(trial[i].ids), trial[i].distance))
+        pool = trial.pop(victim).ids[:]
+        self.rng.shuffle(pool)
+        counts = defaultdict(int)
+        for _ in range(self.config.max_iterations):
+            if not pool:
+                return trial
+            u = pool.pop()
+            if self._insert_feasible(trial, u) or self._squeeze(trial, u):
+                continue
+            counts[u] += 1
+            ejected = self._eject_insert(trial, u, counts)
+            if ejected is None:
+                return None
+            pool.extend(ejected)
+        return trial if not pool else None
+
+    def _to_solution(self, routes: List[RouteState]) -> Solution:
+        nodes = self.instance.nodes
+        depot = nodes[0]
+        return Solution([Route(nodes=[depot] + [nodes[i] for i in r.ids] + [depot]) for r in routes if r.ids],
+                        self.instance)
+
+    def solve(self, initial_solution: Solution) -> Tuple[Solution, List[float]]:
+        routes, seen = [], set()
+        for r in initial_solution.routes:
+            state = RouteState([n.id for n in r.nodes if n.id != 0 and n.id not in seen])
+            seen.update(state.ids)
+            if state.ids and state.update(self.data):
+                routes.append(state)
+        assigned = {u for r in routes for u in r.ids}
+        for u in range(1, self.instance.num_customers + 1):
+            if u not in assigned and not self._insert_feasible(routes, u):
+                state = RouteState([u])
+                state.update(self.data)
+                routes.append(state)
+
+        best = self._to_solution(routes)
+        history = [best.fitness()]
+        tracer = trace.active
+        step = 0
+        hook = progress.active
+        while len(routes) > 1 and not (hook is not None and hook.should_stop()):
+            reduced = self._eliminate_one(routes)
+            if reduced is None:
+                break
+            routes = reduced
+            step += 1
+            history.append(self._to_solution(routes).fitness())
+            logger.debug("RouteMin: %d routes", len(routes))
+            if tracer is not None:
+                tracer.emit("iteration", stage="RouteMin", step=step, routes=len(routes), best=history[-1])
+            if hook is not None:
+                hook.incumbent("RouteMin", step, history[-1], partial(self._to_solution, routes))
+        final = self._to_solution(routes)
+        if tracer is not None and step:
+            tracer.emit("incumbent", stage="RouteMin", step=step, cost=final.fitness())
+        logger.info("Route minimization: %d -> %d vehicles", initial_solution.num_vehicles, final.num_vehicles)
+        return final, history
@@ -1,28 +1,50 @@
 import random
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from src.core.models import CVRPTWInstance, Route
 from src.core.solution import Solution
+from src.core.route_state import InstanceData
+from src.core import segments
 from src.interfaces import SolverStrategy
 from src.config import TabuConfig
 from src.utils.logger import logger
+from src.utils import convergence, instrumentation, progress, trace
+from src.utils.rng import resolve_seed
 
 class TabuSolver(SolverStrategy):
     """
     Stage 3: Tabu Search
-    Local search refinement.
+    Local search refinement. With config.allow_infeasible the search moves through
+    infeasible solutions under a penalised objective (see _solve_penalized).
     """
-    def __init__(self, instance: CVRPTWInstance, config: TabuConfig):
+    def __init__(self, instance: CVRPTWInstance, config: TabuConfig, seed: Optional[int] = None):
         self.instance = instance
         self.config = config
+        self.reseed(seed)
         self.tabu_list = []
-        logger.debug(f"Initialized TabuSolver with max_steps={config.max_steps}")
+        self._data = None
+        logger.debug("Initialized TabuSolver with max_steps=%d", config.max_steps)
+
+    def reseed(self, seed: Optional[int] = None):
+        self.seed = resolve_seed(seed)
+        self.rng = random.Random(self.seed)
+
+    def reset(self):
+        self.tabu_list.clear()
 
     def solve(self, initial_solution: Solution) -> Tuple[Solution, List[float]]:
+        # Moves from a previous run refer to another solution's route indices
+        self.reset()
+        if self.config.allow_infeasible:
+            return self._solve_penalized(initial_solution)
         current_sol = initial_solution
         best_sol = initial_solution
         history = [best_sol.fitness()]
+        hook = progress.active
+        monitor = convergence.monitor(self.config.convergence)
         
         for step in range(self.config.max_steps):
+            if hook is not None and hook.should_stop():
+                break
             neighborhood = self._get_neighborhood(current_sol)
             
             best_neighbor = None
@@ -37,8 +59,15 @@ class TabuSolver(SolverStrategy):
                 if not is_tabu:
                     candidates.append((neighbor, move))
             
+            tracer = trace.active
             if not candidates:
                 history.append(best_sol.fitness())
+                if tracer is not None and tracer.sampled(step):
+                    tracer.emit("iteration", stage="Tabu", step=step, best=best_sol.fitness(),
+                                neighbors=len(neighborhood), candidates=0)
+                if monitor is not None and monitor.update(best_sol.fitness()):
+                    convergence.report("Tabu", step, monitor.reason)
+                    break
                 continue
                 
             best_neighbor, best_move = min(candidates, key=lambda x: x[0].fitness())
@@ -50,10 +79,23 @@ class TabuSolver(SolverStrategy):
                 
             if current_sol.fitness() < best_sol.fitness():
                 best_sol = current_sol
+                if tracer is not None:
+                    tracer.emit("incumbent", stage="Tabu", step=step, cost=best_sol.fitness())
+                if hook is not None:
+                    hook.incumbent("Tabu", step, best_sol.fitness(), best_sol)
             
             history.append(best_sol.fitness())
+            if hook is not None:
+                hook.iteration("Tabu", step, best_sol.fitness())
+            if tracer is not None and tracer.sampled(step):
+                tracer.emit("iteration", stage="Tabu", step=step, best=best_sol.fitness(),
+                            current=current_sol.fitness(), neighbors=len(neighborhood),
+                            candidates=len(candidates), move=best_move[0])
             if step % 10 == 0:
-                logger.debug(f"Tabu Step {step}: Best Cost {best_sol.fitness():.2f}")
+                logger.debug("Tabu Step %d: Best Cost %.2f", step, best_sol.fitness())
+            if monitor is not None and monitor.update(best_sol.fitness()):
+                convergence.report("Tabu", step, monitor.reason)
+                break
                 
         return best_sol, history
 
@@ -67,29 +109,36 @@ class TabuSolver(SolverStrategy):
             return []
 
         while attempts < max_attempts:
-            move_type = random.choice(['relocate', 'swap'])
+            move_type = self.rng.choice(['relocate', 'swap'])
             
             if move_type == 'relocate':
-                r_idx1 = random.randint(0, len(routes)-1)
-                r_idx2 = random.randint(0, len(routes)-1)
+                r_idx1 = self.rng.randint(0, len(routes)-1)
+                r_idx2 = self.rng.randint(0, len(routes)-1)
                 
                 r1 = routes[r_idx1]
                 if len(r1.nodes) <= 2: 
                     attempts += 1
                     continue
                 
-                c_idx = random.randint(1, len(r1.nodes)-2)
+                c_idx = self.rng.randint(1, len(r1.nodes)-2)
                 customer = r1.nodes[c_idx]
                 
                 new_r1_nodes = r1.nodes[:c_idx] + r1.nodes[c_idx+1:]
                 
-                r2 = routes[r_idx2]
-                insert_pos = random.randint(1, len(r2.nodes)-1)
-                new_r2_nodes = r2.nodes[:insert_pos] + [customer] + r2.nodes[insert_pos:]
-                
-                new_routes = [r for i, r in enumerate(routes) if i not in [r_idx1, r_idx2]]
-                new_routes.append(Route(nodes=new_r1_nodes))
-                new_routes.append(Route(nodes=new_r2_nodes))
+                if r_idx1 == r_idx2:
+                    # Move within the route: reinsert into the route without the customer
+                    insert_pos = self.rng.randint(1, len(new_r1_nodes)-1)
+                    new_nodes = new_r1_nodes[:insert_pos] + [customer] + new_r1_nodes[insert_pos:]
+                    new_routes = [r for i, r in enumerate(routes) if i != r_idx1]
+                    new_routes.append(Route(nodes=new_nodes))
+                else:
+                    r2 = routes[r_idx2]
+                    insert_pos = self.rng.randint(1, len(r2.nodes)-1)
+                    new_r2_nodes = r2.nodes[:insert_pos] + [customer] + r2.nodes[insert_pos:]
+                    
+                    new_routes = [r for i, r in enumerate(routes) if i not in [r_idx1, r_idx2]]
+                    new_routes.append(Route(nodes=new_r1_nodes))
+                    new_routes.append(Route(nodes=new_r2_nodes))
                 
                 neighbor = Solution(new_routes, self.instance)
                 if neighbor.is_feasible:
@@ -97,8 +146,8 @@ class TabuSolver(SolverStrategy):
                     neighbors.append((neighbor, move))
 
             else: # Swap
-                r_idx1 = random.randint(0, len(routes)-1)
-                r_idx2 = random.randint(0, len(routes)-1)
+                r_idx1 = self.rng.randint(0, len(routes)-1)
+                r_idx2 = self.rng.randint(0, len(routes)-1)
                 
                 r1 = routes[r_idx1]
                 r2 = routes[r_idx2]
@@ -107,8 +156,8 @@ class TabuSolver(SolverStrategy):
                     attempts += 1
                     continue
                     
-                c_idx1 = random.randint(1, len(r1.nodes)-2)
-                c_idx2 = random.randint(1, len(r2.nodes)-2)
+                c_idx1 = self.rng.randint(1, len(r1.nodes)-2)
+                c_idx2 = self.rng.randint(1, len(r2.nodes)-2)
                 
                 cust1 = r1.nodes[c_idx1]
                 cust2 = r2.nodes[c_idx2]
@@ -136,3 +185,183 @@ class TabuSolver(SolverStrategy):
             attempts += 1
             
         return neighbors
+
+    # --- penalised search through infeasible space -------------------------
+
+    def _route_cost(self, seg, w_load: float, w_tw: float) -> float:
+        return (seg.distance + w_load * max(0.0, seg.load - self._data.capacity)
+                + w_tw * seg.time_warp)
+
+    def _sample_move(self, routes, prefixes, suffixes):
+        """
+        Random relocate/swap evaluated from prefix/suffix segments: O(1) between two
+        routes, O(route length) within one. Returns (move, {route index: new ids/segment}).
+        """
+        data = self._data
+        r1 = self.rng.randrange(len(routes))
+        r2 = self.rng.randrange(len(routes))
+        ids1, ids2 = routes[r1], routes[r2]
+        if not ids1:
+            return None
+        i = self.rng.randint(1, len(ids1))  # path index of the customer in r1
+        u = ids1[i - 1]
+        if self.rng.random() < 0.5:
+            if r1 == r2:
+                rest = ids1[:i - 1] + ids1[i:]
+                j = self.rng.randint(0, len(rest))
+                new_ids = rest[:j] + [u] + rest[j:]
+                return ('relocate', u, r1, r2), {r1: (new_ids, segments.sequence(data, new_ids))}
+            j = self.rng.randint(1, len(ids2) + 1)  # insert before path index j of r2
+            seg1 = segments.concat(data, prefixes[r1][i - 1], suffixes[r1][i + 1])
+            seg2 = segments.concat(data, segments.concat(data, prefixes[r2][j - 1], segments.single(data, u)),
+                                   suffixes[r2][j])
+            return ('relocate', u, r1, r2), {
+                r1: (ids1[:i - 1] + ids1[i:], seg1),
+                r2: (ids2[:j - 1] + [u] + ids2[j - 1:], seg2),
+            }
+        if not ids2:
+            return None
+        j = self.rng.randint(1, len(ids2))
+        v = ids2[j - 1]
+        if r1 == r2:
+            if i == j:
+                return None
+            new_ids = ids1[:]
+            new_ids[i - 1], new_ids[j - 1] = v, u
+            return ('swap', u, v), {r1: (new_ids, segments.sequence(data, new_ids))}
+        seg1 = segments.concat(data, segments.concat(data, prefixes[r1][i - 1], segments.single(data, v)),
+                               suffixes[r1][i + 1])
+        seg2 = segments.concat(data, segments.concat(data, prefixes[r2][j - 1], segments.single(data, u)),
+                               suffixes[r2][j + 1])
+        new1, new2 = ids1[:], ids2[:]
+        new1[i - 1], new2[j - 1] = v, u
+        return ('swap', u, v), {r1: (new1, seg1), r2: (new2, seg2)}
+
+    def _to_solution(self, routes) -> Solution:
+        nodes = self.instance.nodes
+        depot = nodes[0]
+        return Solution([Route(nodes=[depot] + [nodes[i] for i in ids] + [depot]) for ids in routes if ids],
+                        self.instance)
+
+    def _solve_penalized(self, initial_solution: Solution) -> Tuple[Solution, List[float]]:
+        """
+        Tabu search on cost = distance + w_load * capacity excess + w_tw * time warp.
+        Moves are evaluated in O(1) from the routes' prefix/suffix segments; only the
+        chosen move rebuilds the segments of its (at most two) routes. Every
+        penalty_interval steps each weight grows by 20% if the current solution
+        satisfied that constraint in fewer than target_feasible of the steps, and
+        shrinks by 15% otherwise. Returns the best feasible solution found.
+        """
+        cfg = self.config
+        if self._data is None:
+            self._data = InstanceData(self.instance)
+        data = self._data
+        seen = set()
+        routes = []
+        for r in initial_solution.routes:
+            ids = [n.id for n in r.nodes if n.id != 0 and n.id not in seen]
+            seen.update(ids)
+            routes.append(ids)
+        routes.extend([u] for u in range(1, self.instance.num_customers + 1) if u not in seen)
+        routes.append([])  # a spare vehicle the search may open
+        seg = [segments.sequence(data, ids) for ids in routes]
+        prefixes, suffixes = map(list, zip(*(segments.prefix_suffix(data, ids) for ids in routes)))
+
+        w_load, w_tw = cfg.penalty_capacity, cfg.penalty_time_warp
+        vehicle_cost = self.instance.vehicle_cost
+        best_sol = initial_solution
+        if not best_sol.is_feasible:
+            candidate = self._to_solution(routes)
+            if candidate.is_feasible:
+                best_sol = candidate
+        history = [best_sol.fitness()]
+        load_ok = tw_ok = 0
+        tracer = trace.active
+        stats = instrumentation.active
+        hook = progress.active
+        monitor = convergence.monitor(cfg.convergence)
+
+        for step in range(cfg.max_steps):
+            if hook is not None and hook.should_stop():
+                break
+            best_fit = best_sol.fitness()
+            chosen = None
+            evaluated = 0
+            for _ in range(cfg.neighborhood_size):
+                sampled = self._sample_move(routes, prefixes, suffixes)
+                if sampled is None:
+                    continue
+                evaluated += 1
+                move, changes = sampled
+                delta = 0.0
+                feasible_after = True
+                for r_idx, (ids, new_seg) in changes.items():
+                    old = seg[r_idx]
+                    delta += (self._route_cost(new_seg, w_load, w_tw) - self._route_cost(old, w_load, w_tw)
+                              + vehicle_cost * (bool(ids) - bool(routes[r_idx])))
+                    feasible_after &= new_seg.time_warp <= 1e-9 and new_seg.load <= data.capacity
+                is_tabu = move in self.tabu_list
+                if is_tabu and feasible_after:
+                    # Aspiration: a tabu move is allowed if it yields a new best feasible solution
+                    feasible_after = all(
+                        s.time_warp <= 1e-9 and s.load <= data.capacity
+                        for k, s in enumerate(seg) if k not in changes)
+                    total = sum(s.distance + vehicle_cost * bool(routes[k]) for k, s in enumerate(seg)
+                                if k not in changes)
+                    total += sum(s.distance + vehicle_cost * bool(ids) for ids, s in changes.values())
+                    is_tabu = not (feasible_after and total < best_fit)
+                if not is_tabu and (chosen is None or delta < chosen[0]):
+                    chosen = (delta, move, changes)
+            if stats is not None:
+                stats.feasibility_checks += evaluated
+
+            if chosen is not None:
+                _, move, changes = chosen
+                for r_idx, (ids, new_seg) in changes.items():
+                    routes[r_idx] = ids
+                    seg[r_idx] = new_seg
+                    prefixes[r_idx], suffixes[r_idx] = segments.prefix_suffix(data, ids)
+                if all(routes):
+                    routes.append([])
+                    seg.append(segments.sequence(data, []))
+                    p, s = segments.prefix_suffix(data, [])
+                    prefixes.append(p)
+                    suffixes.append(s)
+                self.tabu_list.append(move)
+                if len(self.tabu_list) > cfg.tabu_tenure:
+                    self.tabu_list.pop(0)
+
+            cap_ok = all(s.load <= data.capacity for s in seg)
+            time_ok = all(s.time_warp <= 1e-9 for s in seg)
+            load_ok += cap_ok
+            tw_ok += time_ok
+            if cap_ok and time_ok:
+                distance = sum(s.distance for s in seg) + vehicle_cost * sum(1 for ids in routes if ids)
+                if distance < best_fit - 1e-9:
+                    best_sol = self._to_solution(routes)
+                    if tracer is not None:
+                        tracer.emit("incumbent", stage="Tabu", step=step, cost=best_sol.fitness())
+                    if hook is not None:
+                        hook.incumbent("Tabu", step, best_sol.fitness(), best_sol)
+
+            if (step + 1) % cfg.penalty_interval == 0:
+                w_load *= 1.2 if load_ok < cfg.target_feasible * cfg.penalty_interval else 0.85
+                w_tw *= 1.2 if tw_ok < cfg.target_feasible * cfg.penalty_interval else 0.85
+                w_load, w_tw = max(w_load, 0.01), max(w_tw, 0.01)
+                load_ok = tw_ok = 0
+
+            history.append(best_sol.fitness())
+            if hook is not None:
+                hook.iteration("Tabu", step, best_sol.fitness())
+            if tracer is not None and tracer.sampled(step):
+                tracer.emit("iteration", stage="Tabu", step=step, best=best_sol.fitness(),
+                            candidates=evaluated, penalty_capacity=w_load, penalty_time_warp=w_tw,
+                            feasible=cap_ok and time_ok)
+            if step % 10 == 0:
+                logger.debug("Tabu Step %d: Best Cost %.2f (w_load=%.2f, w_tw=%.2f)",
+                             step, best_sol.fitness(), w_load, w_tw)
+            if monitor is not None and monitor.update(best_sol.fitness()):
+                convergence.report("Tabu", step, monitor.reason)
+                break
+
+        return best_sol, history
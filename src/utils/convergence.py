@@ -0,0 +1,68 @@
+"""
+Stagnation detection for the iterative stages (ACO, GA, Tabu, ALNS).
+
+A stage feeds its best cost to a StagnationMonitor once per iteration and
+stops when the monitor reports convergence: no new best for `patience`
+iterations, or a relative improvement below `min_rate` per second over the
+last `rate_window` seconds. monitor() returns None when every criterion is
+off, so disabled stages only pay a None check.
+"""
+import time
+from collections import deque
+from typing import Optional
+
+from src.config import ConvergenceConfig
+from src.utils import trace
+from src.utils.logger import logger
+
+INF = float("inf")
+
+
+class StagnationMonitor:
+    def __init__(self, config: ConvergenceConfig):
+        self.patience = config.patience
+        self.min_rate = config.min_rate
+        self.window = config.rate_window
+        self.best = INF
+        self.since_improvement = 0
+        self.reason: Optional[str] = None
+        # (time, best) samples; the first one is the latest sample at least `window` old
+        self._samples = deque()
+
+    def update(self, best: float) -> bool:
+        """Records this iteration's best cost; True once the stage has converged."""
+        if best < self.best - 1e-9 * abs(best):
+            self.best = best
+            self.since_improvement = 0
+        else:
+            self.since_improvement += 1
+        if self.patience is not None and self.since_improvement >= self.patience:
+            self.reason = f"no improvement for {self.since_improvement} iterations"
+            return True
+        if self.min_rate is not None and best < INF:
+            now = time.monotonic()
+            samples = self._samples
+            samples.append((now, best))
+            while len(samples) > 1 and samples[1][0] <= now - self.window:
+                samples.popleft()
+            t_ref, best_ref = samples[0]
+            if now - t_ref >= self.window and best > 0:
+                rate = (best_ref - best) / best / (now - t_ref)
+                if rate < self.min_rate:
+                    self.reason = f"improving {rate:.2e}/s < {self.min_rate:.2e}/s"
+                    return True
+        return False
+
+
+def monitor(config: ConvergenceConfig) -> Optional[StagnationMonitor]:
+    if config.patience is None and config.min_rate is None:
+        return None
+    return StagnationMonitor(config)
+
+
+def report(stage: str, step: int, reason: str):
+    """Logs and traces an early stop."""
+    logger.info("%s converged at step %d: %s", stage, step, reason)
+    tracer = trace.active
+    if tracer is not None:
+        tracer.emit("converged", stage=stage, step=step, reason=reason)
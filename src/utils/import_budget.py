@@ -0,0 +1,106 @@
+"""
+Import-time budget check for the solver path.
+
+Spawns a fresh interpreter in an empty temporary directory, imports the solver
+modules, and fails if:
+  - the cumulative import time of any checked module exceeds the budget,
+  - a plotting/UI dependency (matplotlib, numpy, streamlit, pandas) was loaded,
+  - the import created any file in the working directory.
+
+Usage: python -m src.utils.import_budget [--budget-ms 150] [--repeat 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SOLVER_MODULES = [
+    "src.cli",
+    "src.core.models",
+    "src.core.solution",
+    "src.solvers.aco",
+    "src.solvers.ga",
+    "src.solvers.tabu",
+    "src.solvers.hybrid",
+]
+FORBIDDEN_MODULES = ["matplotlib", "numpy", "streamlit", "pandas"]
+
+_PROBE = """
+import sys
+for name in {modules!r}:
+    __import__(name)
+loaded = sorted(m for m in {forbidden!r} if m in sys.modules)
+print("FORBIDDEN:" + ",".join(loaded))
+"""
+
+
+def _run_probe(project_root: Path, workdir: str) -> Tuple[Dict[str, float], List[str]]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(project_root) + os.pathsep + env.get("PYTHONPATH", "")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    code = _PROBE.format(modules=SOLVER_MODULES, forbidden=FORBIDDEN_MODULES)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=workdir, env=env, capture_output=True, text=True, check=True,
+    )
+    cumulative_ms: Dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            cumulative = int(parts[1])
+        except ValueError:
+            continue  # header line
+        cumulative_ms[parts[2].strip()] = cumulative / 1000.0
+    forbidden = []
+    for line in proc.stdout.splitlines():
+        if line.startswith("FORBIDDEN:") and line[len("FORBIDDEN:"):]:
+            forbidden = line[len("FORBIDDEN:"):].split(",")
+    return cumulative_ms, forbidden
+
+
+def check(budget_ms: float, repeat: int = 3) -> List[str]:
+    """Returns a list of violations (empty when the budget holds)."""
+    project_root = Path(__file__).resolve().parents[2]
+    problems = []
+    best: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(max(1, repeat)):
+            timings, forbidden = _run_probe(project_root, workdir)
+            for name in SOLVER_MODULES:
+                if name in timings:
+                    best[name] = min(best.get(name, float("inf")), timings[name])
+            for name in forbidden:
+                problems.append(f"{name} imported on the solver path")
+        created = os.listdir(workdir)
+        if created:
+            problems.append(f"import created files in the working directory: {created}")
+
+    # Minimum over repeats filters out noise from a busy machine
+    for name, ms in sorted(best.items()):
+        print(f"{name:<24}{ms:>8.1f} ms")
+        if ms > budget_ms:
+            problems.append(f"{name} took {ms:.1f} ms to import (budget {budget_ms:.0f} ms)")
+    return sorted(set(problems))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the solver path")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="Max cumulative import time per module")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs to take the minimum over")
+    args = parser.parse_args()
+
+    problems = check(args.budget_ms, args.repeat)
+    for p in problems:
+        print(f"FAIL: {p}")
+    if problems:
+        sys.exit(1)
+    print("Import budget OK")
+
+
+if __name__ == "__main__":
+    main()
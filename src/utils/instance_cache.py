@@ -0,0 +1,129 @@
+"""
+Binary on-disk cache for parsed instances.
+
+Each instance file is keyed by the SHA-256 of its content. The cache entry is a
+directory holding plain .npy arrays (nodes and distance matrix) plus a small
+meta.json. Plain .npy is used rather than .npz because only .npy files can be
+memory-mapped by np.load(mmap_mode="r"); a warm load is then a few page faults
+instead of a parse plus an O(n^2) matrix construction.
+
+NumPy is optional: without it the loader simply parses the file every time.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from src.core.models import Node, CVRPTWInstance
+from src.utils import instrumentation
+from src.utils.shared_matrix import MappedMatrix
+from src.utils.solomon_loader import load_solomon_txt, build_instance
+
+CACHE_VERSION = 1
+NODE_FIELDS = ("id", "x", "y", "demand", "ready_time", "due_date", "service_time")
+
+
+def default_cache_dir() -> Path:
+    env = os.environ.get("CVRPTW_CACHE_DIR")
+    if env:
+        return Path(env)
+    return Path.home() / ".cache" / "cvrptw" / "instances"
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _numpy():
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    return np
+
+
+def _instance_from_arrays(node_arr, capacity: float, matrix, mmap_matrix: bool) -> CVRPTWInstance:
+    nodes = [Node(int(row[0]), *row[1:]) for row in node_arr.tolist()]
+    # Nested lists index fastest in the solvers' inner loops; keep the memory map only when asked
+    if mmap_matrix:
+        matrix = MappedMatrix(matrix.filename, expected_size=len(nodes))
+    else:
+        matrix = matrix.tolist()
+    return CVRPTWInstance.from_nodes(nodes, capacity, distance_matrix=matrix, euclidean=True)
+
+
+def _write_entry(np, entry: Path, nodes, capacity: float):
+    node_arr = np.array([[getattr(n, f) for f in NODE_FIELDS] for n in nodes], dtype=np.float64)
+    xy = node_arr[:, 1:3]
+    diff = xy[:, None, :] - xy[None, :, :]
+    matrix = np.hypot(diff[..., 0], diff[..., 1])
+
+    # Write into a temp dir and rename, so concurrent readers never see a partial entry
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=entry.name + ".", dir=entry.parent))
+    try:
+        np.save(tmp / "nodes.npy", node_arr)
+        np.save(tmp / "distance.npy", matrix)
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "capacity": capacity, "size": len(nodes)}, f)
+        if entry.exists() and _read_entry(np, entry) is None:
+            # Entry of another cache version: move it aside first (a directory cannot be
+            # replaced while it has files); readers that mapped its arrays keep them
+            stale = Path(tempfile.mkdtemp(prefix=entry.name + ".stale.", dir=entry.parent))
+            os.replace(entry, stale / "entry")
+            shutil.rmtree(stale, ignore_errors=True)
+        os.replace(tmp, entry)
+    except OSError:
+        # Another process won the race (or the dir is read-only): keep whatever is there
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _read_entry(np, entry: Path):
+    meta_path = entry / "meta.json"
+    if not meta_path.exists():
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    node_arr = np.load(entry / "nodes.npy", mmap_mode="r")
+    matrix = np.load(entry / "distance.npy", mmap_mode="r")
+    return node_arr, float(meta["capacity"]), matrix
+
+
+def load_cached_instance(path: str, cache_dir: Optional[str] = None, mmap_matrix: bool = False) -> CVRPTWInstance:
+    """
+    Loads an instance through the binary cache, populating it on a miss.
+    mmap_matrix=True keeps the distance matrix as a read-only memory-mapped array
+    (shared by the page cache across processes) instead of nested lists.
+    """
+    np = _numpy()
+    if np is None:
+        nodes, cap = load_solomon_txt(path)
+        return build_instance(nodes, cap)
+
+    entry = Path(cache_dir) if cache_dir else default_cache_dir()
+    entry = entry / file_digest(path)
+
+    cached = _read_entry(np, entry)
+    instrumentation.record_cache("instance", cached is not None)
+    if cached is None:
+        nodes, cap = load_solomon_txt(path)
+        _write_entry(np, entry, nodes, cap)
+        cached = _read_entry(np, entry)
+        if cached is None:
+            return build_instance(nodes, cap)
+
+    node_arr, cap, matrix = cached
+    return _instance_from_arrays(node_arr, cap, matrix, mmap_matrix)
+
+
+def clear_cache(cache_dir: Optional[str] = None):
+    shutil.rmtree(Path(cache_dir) if cache_dir else default_cache_dir(), ignore_errors=True)
@@ -2,11 +2,14 @@ from typing import List
 import math
 
 def build_distance_matrix(nodes) -> List[List[float]]:
+    """Euclidean distance matrix indexed by node id (computed once per pair)."""
     size = len(nodes)
     dist = [[0.0]*size for _ in range(size)]
     for i in range(size):
-        for j in range(size):
-            dx = nodes[i].x - nodes[j].x
-            dy = nodes[i].y - nodes[j].y
-            dist[i][j] = math.hypot(dx, dy)
+        xi, yi = nodes[i].x, nodes[i].y
+        row = dist[i]
+        for j in range(i + 1, size):
+            d = math.hypot(xi - nodes[j].x, yi - nodes[j].y)
+            row[j] = d
+            dist[j][i] = d
     return dist
@@ -0,0 +1,128 @@
+"""
+Seeded Solomon-style instance generator (C / R / RC) for 100 to 10,000+ customers.
+
+Customers are drawn as NumPy arrays in one pass, and the distance matrix is
+built in row blocks, so a 10,000-customer instance takes seconds rather than
+minutes. Large matrices stay float64 arrays (800 MB at 10,000 customers);
+converting them to nested lists would take several GB. The layout follows the Solomon classes:
+  - "c":  customers around cluster centres (about 10 customers per cluster)
+  - "r":  customers uniformly spread over the grid
+  - "rc": half clustered, half uniform
+The grid grows with sqrt(n) like the Gehring-Homberger extension, so customer
+density and route lengths stay comparable across sizes.
+
+Time-window tightness: `tw_width` is the window width as a fraction of the
+horizon and `tw_density` the share of customers that have a window at all
+(the others may be served any time they can still return to the depot).
+Every customer is individually reachable: a window never opens after the
+latest start that still allows returning to the depot.
+
+The same seed and parameters always give the same instance. Requires NumPy.
+"""
+import math
+from typing import List, Optional, Tuple
+
+from src.core.models import CVRPTWInstance, Node
+from src.utils.rng import resolve_seed
+
+KINDS = ("c", "r", "rc")
+# Rows of the distance matrix computed per NumPy block (bounds the temporaries)
+_MATRIX_BLOCK = 512
+# Nodes above which the matrix stays a float64 array by default: nested lists take about
+# 4x the memory (~1.2 GB at 5,000 customers, 4-5 GB at 10,000) and seconds to convert
+_ARRAY_ABOVE = 2000
+
+
+def _numpy():
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("the instance generator needs NumPy (pip install numpy)") from None
+    return np
+
+
+def generate_nodes(num_customers: int, kind: str = "rc", seed: Optional[int] = None,
+                   vehicle_capacity: float = 200.0, min_demand: int = 1, max_demand: int = 30,
+                   service_time: float = 10.0, tw_width: float = 0.1, tw_density: float = 1.0,
+                   grid_size: Optional[float] = None, horizon: Optional[float] = None,
+                   cluster_size: int = 10) -> Tuple[List[Node], float]:
+    """
+    Returns (nodes, vehicle_capacity) with the depot (id 0) at the grid centre.
+    grid_size defaults to 100 * sqrt(n / 100), horizon to 2.3 grid lengths
+    (the Solomon "1" series) plus one service time.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}, got {kind!r}")
+    if num_customers < 1:
+        raise ValueError("num_customers must be positive")
+    if not 0.0 < tw_width <= 1.0 or not 0.0 <= tw_density <= 1.0:
+        raise ValueError("tw_width must be in (0, 1] and tw_density in [0, 1]")
+    if not 1 <= min_demand <= max_demand <= vehicle_capacity:
+        raise ValueError("demands must satisfy 1 <= min_demand <= max_demand <= vehicle_capacity")
+    np = _numpy()
+    rng = np.random.default_rng(resolve_seed(seed))
+    n = num_customers
+    grid = float(grid_size) if grid_size is not None else 100.0 * math.sqrt(n / 100.0)
+    horizon = float(horizon) if horizon is not None else 2.3 * grid + service_time
+    depot = grid / 2.0
+
+    # Positions
+    n_clustered = {"c": n, "r": 0, "rc": n // 2}[kind]
+    xy = rng.uniform(0.0, grid, size=(n, 2))
+    if n_clustered:
+        n_centres = max(1, n_clustered // cluster_size)
+        centres = rng.uniform(0.1 * grid, 0.9 * grid, size=(n_centres, 2))
+        members = rng.integers(0, n_centres, size=n_clustered)
+        spread = 0.02 * grid + 2.0
+        xy[:n_clustered] = np.clip(centres[members] + rng.normal(0.0, spread, size=(n_clustered, 2)), 0.0, grid)
+    # Interleave clustered and random customers so ids carry no class information
+    xy = xy[rng.permutation(n)]
+
+    demand = rng.integers(min_demand, max_demand + 1, size=n).astype(float)
+
+    # Time windows around a feasible service start
+    d0 = np.hypot(xy[:, 0] - depot, xy[:, 1] - depot)
+    latest = horizon - d0 - service_time
+    if np.any(latest < d0):
+        raise ValueError("horizon too short to serve every customer; increase horizon")
+    centre = rng.uniform(d0, latest)
+    half = 0.5 * tw_width * horizon * rng.uniform(0.5, 1.5, size=n)
+    ready = np.maximum(centre - half, 0.0)
+    due = np.minimum(centre + half, latest)
+    open_ = rng.random(n) >= tw_density
+    ready[open_] = 0.0
+    due[open_] = latest[open_]
+
+    nodes = [Node(0, depot, depot, 0.0, 0.0, horizon, 0.0)]
+    nodes += [Node(i, x, y, d, r, u, service_time)
+              for i, (x, y, d, r, u) in enumerate(zip(xy[:, 0].tolist(), xy[:, 1].tolist(), demand.tolist(),
+                                                      ready.tolist(), due.tolist()), start=1)]
+    return nodes, float(vehicle_capacity)
+
+
+def euclidean_matrix(nodes: List[Node], as_array: Optional[bool] = None):
+    """
+    Euclidean distance matrix indexed by node id, built in row blocks.
+    Nested lists (the solvers' fastest format) or a float64 array, which needs
+    8 n^2 bytes against about 4x that for lists. as_array=None picks the array
+    above _ARRAY_ABOVE nodes.
+    """
+    np = _numpy()
+    x = np.array([nd.x for nd in nodes])
+    y = np.array([nd.y for nd in nodes])
+    size = len(nodes)
+    matrix = np.empty((size, size))
+    for i in range(0, size, _MATRIX_BLOCK):
+        j = min(i + _MATRIX_BLOCK, size)
+        np.hypot(x[i:j, None] - x[None, :], y[i:j, None] - y[None, :], out=matrix[i:j])
+    if as_array is None:
+        as_array = size > _ARRAY_ABOVE
+    return matrix if as_array else matrix.tolist()
+
+
+def generate_instance(num_customers: int, kind: str = "rc", seed: Optional[int] = None,
+                      as_array: Optional[bool] = None, **params) -> CVRPTWInstance:
+    """Generated instance (see generate_nodes for the parameters)."""
+    nodes, capacity = generate_nodes(num_customers, kind, seed, **params)
+    return CVRPTWInstance.from_nodes(nodes, capacity, distance_matrix=euclidean_matrix(nodes, as_array),
+                                     euclidean=True)
@@ -0,0 +1,185 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Metrics of the stage currently running, or None when instrumentation is off.
+# Hot paths only pay for one module attribute lookup and a None check.
+active: Optional["StageMetrics"] = None
+
+
+@dataclass
+class StageMetrics:
+    """Counters and timings collected for one pipeline stage."""
+    stage: str
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    evaluations: int = 0
+    feasibility_checks: int = 0
+    cache_hits: Dict[str, int] = field(default_factory=dict)
+    cache_misses: Dict[str, int] = field(default_factory=dict)
+    # Process-lifetime peak (ru_maxrss) when the stage ended, not the stage's own peak:
+    # it never decreases, so only the first stage that raises it is attributable
+    peak_rss_kb: int = 0
+    peak_alloc_kb: Optional[int] = None
+
+    def cache_lookups(self) -> int:
+        return sum(self.cache_hits.values()) + sum(self.cache_misses.values())
+
+    def cache_hit_rate(self, name: Optional[str] = None) -> float:
+        if name is None:
+            hits = sum(self.cache_hits.values())
+            misses = sum(self.cache_misses.values())
+        else:
+            hits = self.cache_hits.get(name, 0)
+            misses = self.cache_misses.get(name, 0)
+        total = hits + misses
+        return hits / total if total else 0.0
+
+
+@dataclass
+class SolverReport:
+    """Structured per-stage report attached to a Solution as `solution.metrics`."""
+    stages: List[StageMetrics] = field(default_factory=list)
+
+    def stage(self, name: str) -> Optional[StageMetrics]:
+        for s in self.stages:
+            if s.stage == name:
+                return s
+        return None
+
+    @property
+    def wall_time(self) -> float:
+        return sum(s.wall_time for s in self.stages)
+
+    @property
+    def evaluations(self) -> int:
+        return sum(s.evaluations for s in self.stages)
+
+    def to_dict(self) -> dict:
+        return {
+            "wall_time": self.wall_time,
+            "evaluations": self.evaluations,
+            "stages": [dict(asdict(s), cache_hit_rate=s.cache_hit_rate()) for s in self.stages],
+        }
+
+    def summary(self) -> str:
+        # hit% is '-' for stages without a cache; maxrss is the process peak so far (see StageMetrics)
+        lines = [f"{'stage':<8}{'wall[s]':>10}{'cpu[s]':>10}{'evals':>10}{'feas':>12}{'hit%':>8}{'maxrss[MB]':>12}"]
+        for s in self.stages:
+            hit = f"{100 * s.cache_hit_rate():.1f}" if s.cache_lookups() else "-"
+            lines.append(
+                f"{s.stage:<8}{s.wall_time:>10.3f}{s.cpu_time:>10.3f}{s.evaluations:>10}"
+                f"{s.feasibility_checks:>12}{hit:>8}{s.peak_rss_kb / 1024:>12.1f}"
+            )
+        return "\n".join(lines)
+
+
+def record_cache(name: str, hit: bool, count: int = 1):
+    """Count `count` cache lookups on the active stage (no-op when disabled)."""
+    stats = active
+    if stats is None or count <= 0:
+        return
+    counters = stats.cache_hits if hit else stats.cache_misses
+    counters[name] = counters.get(name, 0) + count
+
+
+def _peak_rss_kb() -> int:
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+@contextmanager
+def stage(report: Optional[SolverReport], name: str, trace_memory: bool = False):
+    """
+    Collects metrics for the enclosed block into `report`.
+    Passing report=None disables collection entirely.
+    """
+    global active
+    if report is None:
+        yield None
+        return
+
+    stats = StageMetrics(stage=name)
+    if trace_memory:
+        import tracemalloc
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif trace_memory:
+        tracemalloc.reset_peak()
+
+    previous = active
+    active = stats
+    wall0 = time.perf_counter()
+    cpu0 = time.process_time()
+    try:
+        yield stats
+    finally:
+        stats.wall_time = time.perf_counter() - wall0
+        stats.cpu_time = time.process_time() - cpu0
+        active = previous
+        stats.peak_rss_kb = _peak_rss_kb()
+        if trace_memory:
+            stats.peak_alloc_kb = tracemalloc.get_traced_memory()[1] // 1024
+            if started_tracing:
+                tracemalloc.stop()
+        report.stages.append(stats)
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def write_openmetrics(report: SolverReport, path: str, labels: Optional[Dict[str, str]] = None):
+    """
+    Writes the report in Prometheus/OpenMetrics text format.
+    The file is replaced atomically so a textfile collector never reads a partial file.
+    """
+    base = dict(labels or {})
+
+    def fmt_labels(extra: Dict[str, str]) -> str:
+        merged = {**base, **extra}
+        body = ",".join(f'{k}="{_escape_label(v)}"' for k, v in sorted(merged.items()))
+        return "{" + body + "}"
+
+    metrics = [
+        ("cvrptw_stage_wall_seconds", "gauge", "Wall-clock time spent in the stage.",
+         lambda s: [({}, s.wall_time)]),
+        ("cvrptw_stage_cpu_seconds", "gauge", "CPU time spent in the stage.",
+         lambda s: [({}, s.cpu_time)]),
+        ("cvrptw_stage_evaluations", "gauge", "Number of solution evaluations in the stage.",
+         lambda s: [({}, s.evaluations)]),
+        ("cvrptw_stage_feasibility_checks", "gauge", "Number of feasibility checks in the stage.",
+         lambda s: [({}, s.feasibility_checks)]),
+        ("cvrptw_stage_cache_hits", "gauge", "Cache hits in the stage.",
+         lambda s: [({"cache": k}, v) for k, v in sorted(s.cache_hits.items())]),
+        ("cvrptw_stage_cache_misses", "gauge", "Cache misses in the stage.",
+         lambda s: [({"cache": k}, v) for k, v in sorted(s.cache_misses.items())]),
+        ("cvrptw_stage_peak_rss_bytes", "gauge", "Peak resident set size of the process (ru_maxrss) when the stage ended.",
+         lambda s: [({}, s.peak_rss_kb * 1024)]),
+    ]
+
+    out = []
+    for name, kind, help_text, values in metrics:
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        for s in report.stages:
+            for extra, value in values(s):
+                out.append(f"{name}{fmt_labels({'stage': s.stage, **extra})} {value}")
+    out.append("# EOF")
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(out) + "\n")
+    os.replace(tmp_path, path)
@@ -1,11 +1,32 @@
+import atexit
 import logging
+import queue
 import sys
-from pathlib import Path
 
-def setup_logger(name: str = "cvrptw_solver", log_file: str = "solver.log", level: int = logging.INFO) -> logging.Logger:
+LOGGER_NAME = "cvrptw_solver"
+
+def _queue_handler(log_queue) -> logging.Handler:
+    # logging.handlers pulls in socket & co., so it is only imported when logging is set up
+    import logging.handlers
+
+    class _InProcessQueueHandler(logging.handlers.QueueHandler):
+        """Defers message formatting to the listener thread (the queue never leaves the process)."""
+
+        def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+            return record
+
+    return _InProcessQueueHandler(log_queue)
+
+def setup_logger(name: str = LOGGER_NAME, log_file: str = "solver.log", level: int = logging.INFO) -> logging.Logger:
     """
     Sets up a logger with console and file handlers.
+    Records are handed to a queue and formatted/written by a background listener
+    thread, so solver threads never block on terminal or disk I/O.
+    Called by entry points (CLI, app); importing the package never touches the disk.
+    Pass log_file=None to log to the console only.
     """
+    import logging.handlers
+
     logger = logging.getLogger(name)
     logger.setLevel(level)
     
@@ -20,17 +41,24 @@ def setup_logger(name: str = "cvrptw_solver", log_file: str = "solver.log", leve
     # Console Handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
     
     # File Handler
-    try:
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    except IOError:
-        print(f"Warning: Could not create log file {log_file}")
+    if log_file:
+        try:
+            file_handler = logging.FileHandler(log_file)
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except IOError:
+            print(f"Warning: Could not create log file {log_file}")
+
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(_queue_handler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
         
     return logger
 
-# Global logger instance
-logger = setup_logger()
+# Global logger instance (unconfigured until an entry point calls setup_logger)
+logger = logging.getLogger(LOGGER_NAME)
@@ -1,13 +1,32 @@
-import matplotlib.pyplot as plt
-import numpy as np
 from src.core.models import CVRPTWInstance
 from src.core.solution import Solution
 
+# Above these sizes the per-route legend, Gantt labels and convergence points are thinned out
+LEGEND_MAX_ROUTES = 20
+GANTT_MAX_LABELS = 150
+GANTT_MAX_TICKS = 40
+CONVERGENCE_MAX_POINTS = 2000
+
+# matplotlib and NumPy are imported on first use so that importing this module
+# (or anything next to it) stays cheap for solver-only processes.
+def _pyplot():
+    import matplotlib.pyplot as plt
+    return plt
+
+def _rainbow(n: int):
+    import numpy as np
+    return _pyplot().cm.rainbow(np.linspace(0, 1, n))
+
 def plot_solution(instance: CVRPTWInstance, solution: Solution):
     """
     Plots the solution routes on a 2D map.
+    All route edges are drawn as one LineCollection and all direction arrows as
+    one quiver, so the number of artists does not grow with the instance.
     Returns the matplotlib figure.
     """
+    plt = _pyplot()
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
     fig, ax = plt.subplots(figsize=(10, 8))
     
     # Plot Depot
@@ -18,57 +37,85 @@ def plot_solution(instance: CVRPTWInstance, solution: Solution):
     custs = instance.get_customers()
     xs = [c.x for c in custs]
     ys = [c.y for c in custs]
-    ax.scatter(xs, ys, c='blue', s=50, alpha=0.6, label='Customers')
-    
-    # Plot Routes
-    colors = plt.cm.rainbow(np.linspace(0, 1, len(solution.routes)))
-    
-    for idx, route in enumerate(solution.routes):
-        r_xs = [n.x for n in route.nodes]
-        r_ys = [n.y for n in route.nodes]
-        ax.plot(r_xs, r_ys, c=colors[idx], linewidth=2, label=f"Route {idx+1}")
-        
-        # Arrows
-        for i in range(len(r_xs)-1):
-            ax.arrow(r_xs[i], r_ys[i], (r_xs[i+1]-r_xs[i])*0.5, (r_ys[i+1]-r_ys[i])*0.5, 
-                     head_width=2, color=colors[idx])
-    
-    ax.legend()
+    ax.scatter(xs, ys, c='blue', s=50 if len(custs) <= 200 else 8, alpha=0.6, label='Customers')
+    
+    # Plot Routes: one segment (and arrow) per edge, colored by route. Routes keep their index in
+    # solution.routes (number and color), as in plot_gantt, even when empty ones are skipped
+    colors = _rainbow(len(solution.routes))
+    routes = [(idx, r) for idx, r in enumerate(solution.routes) if len(r.nodes) > 1]
+    segments, seg_colors = [], []
+    arrow_x, arrow_y, arrow_u, arrow_v = [], [], [], []
+    for idx, route in routes:
+        pts = [(n.x, n.y) for n in route.nodes]
+        for (x0, y0), (x1, y1) in zip(pts, pts[1:]):
+            segments.append(((x0, y0), (x1, y1)))
+            seg_colors.append(colors[idx])
+            arrow_x.append(x0)
+            arrow_y.append(y0)
+            arrow_u.append((x1 - x0) * 0.5)
+            arrow_v.append((y1 - y0) * 0.5)
+    if segments:
+        ax.add_collection(LineCollection(segments, colors=seg_colors, linewidths=2 if len(routes) <= 50 else 1))
+        # Arrows point halfway along each edge
+        ax.quiver(arrow_x, arrow_y, arrow_u, arrow_v, color=seg_colors, angles='xy', scale_units='xy', scale=1,
+                  width=0.003, headwidth=4, headlength=5)
+    
+    handles, _ = ax.get_legend_handles_labels()
+    if len(routes) <= LEGEND_MAX_ROUTES:
+        handles += [Line2D([0], [0], color=colors[i], linewidth=2, label=f"Route {i+1}") for i, _ in routes]
+    else:
+        handles.append(Line2D([0], [0], color='gray', linewidth=2, label=f"{len(routes)} routes"))
+    # loc='best' scans every plotted point, which dominates rendering for large instances
+    ax.legend(handles=handles, loc='best' if len(custs) <= 200 else 'upper right')
     ax.grid(True, linestyle='--', alpha=0.5)
     ax.set_title(f"Best Solution (Dist: {solution.total_distance:.1f})")
     
     return fig
 
-def plot_convergence(history: list):
+def _downsample(history: list, max_points: int) -> list:
+    """Evenly spaced indices plus every stage boundary and the last point."""
+    n = len(history)
+    if n <= max_points:
+        return list(range(n))
+    stride = -(-n // max_points)
+    keep = set(range(0, n, stride))
+    keep.add(n - 1)
+    for i in range(1, n):
+        if history[i][0] != history[i - 1][0]:
+            keep.update((i - 1, i))
+    return sorted(keep)
+
+def plot_convergence(history: list, max_points: int = CONVERGENCE_MAX_POINTS):
     """
     Plots the convergence of the hybrid algorithm.
-    History is a list of (stage, step, cost).
+    History is a list of (stage, step, cost); histories longer than max_points
+    are downsampled (stage boundaries are always kept).
     """
+    plt = _pyplot()
     fig, ax = plt.subplots(figsize=(10, 4))
     
-    stages = ['ACO', 'GA', 'Tabu']
     colors = {'ACO': 'blue', 'GA': 'green', 'Tabu': 'red'}
-    
-    # Flatten index
-    x = []
-    y = []
-    c = []
-    
-    current_x = 0
-    for stage, step, cost in history:
-        x.append(current_x)
-        y.append(cost)
-        c.append(colors[stage])
-        current_x += 1
+    # Stages added later (decomposition, ...) get the remaining default colors
+    extra = iter(['purple', 'orange', 'brown', 'olive', 'cyan', 'gray'])
+    for stage, _, _ in history:
+        if stage not in colors:
+            colors[stage] = next(extra, 'black')
+    
+    # Flatten index (x keeps the original position when downsampled)
+    x = _downsample(history, max_points)
+    y = [history[i][2] for i in x]
+    c = [colors[history[i][0]] for i in x]
         
     ax.plot(x, y, color='gray', alpha=0.5, linestyle='--')
-    ax.scatter(x, y, c=c, s=20)
+    ax.scatter(x, y, c=c, s=20 if len(x) <= 500 else 4)
     
     # Create custom legend
+    present = {stage for stage, _, _ in history}
     from matplotlib.lines import Line2D
     legend_elements = [Line2D([0], [0], marker='o', color='w', label=stage,
                               markerfacecolor=color, markersize=8)
-                       for stage, color in colors.items()]
+                       for stage, color in colors.items()
+                       if stage in present]
     
     ax.legend(handles=legend_elements)
     ax.set_xlabel("Iterations / Steps")
@@ -78,43 +125,61 @@ def plot_convergence(history: list):
     
     return fig
 
-def plot_gantt(solution: Solution):
+def plot_gantt(solution: Solution, max_labels: int = GANTT_MAX_LABELS):
     """
     Plots a Gantt chart of the schedule.
+    Service and waiting bars are two PolyCollections; customer labels are
+    decimated to about max_labels and vehicle ticks to GANTT_MAX_TICKS.
     """
+    plt = _pyplot()
+    from matplotlib.collections import PolyCollection
     fig, ax = plt.subplots(figsize=(10, 6))
     
     # Y-axis: Vehicles
     # X-axis: Time
     
-    yticks = []
-    yticklabels = []
-    
-    colors = plt.cm.rainbow(np.linspace(0, 1, len(solution.routes)))
+    colors = _rainbow(len(solution.routes))
+    n_customers = sum(max(0, len(r.nodes) - 2) for r in solution.routes)
+    label_every = max(1, -(-n_customers // max_labels))
     
+    service_bars, service_colors, wait_bars = [], [], []
+    labels = []
+    count = 0
     for r_idx, route in enumerate(solution.routes):
         y = r_idx * 10
-        yticks.append(y)
-        yticklabels.append(f"Vehicle {r_idx+1}")
-        
         for n_idx, node in enumerate(route.nodes):
             if node.id == 0: continue # Skip depot
             
             # Get schedule
             arrival, wait, start, depart = route.schedule[n_idx]
+            end = start + node.service_time
             
             # Service Bar
-            ax.barh(y, node.service_time, left=start, height=5, color=colors[r_idx], edgecolor='black', alpha=0.8)
+            service_bars.append([(start, y - 2.5), (start, y + 2.5), (end, y + 2.5), (end, y - 2.5)])
+            service_colors.append(colors[r_idx])
             
             # Wait Bar (if any)
             if wait > 0:
-                ax.barh(y, wait, left=arrival, height=3, color='gray', alpha=0.3, hatch='//')
+                wait_bars.append([(arrival, y - 1.5), (arrival, y + 1.5), (start, y + 1.5), (start, y - 1.5)])
             
             # Label
-            ax.text(start + node.service_time/2, y, str(node.id), ha='center', va='center', color='white', fontsize=8, fontweight='bold')
+            if count % label_every == 0:
+                labels.append((start + node.service_time / 2, y, str(node.id)))
+            count += 1
             
-    ax.set_yticks(yticks)
-    ax.set_yticklabels(yticklabels)
+    if wait_bars:
+        ax.add_collection(PolyCollection(wait_bars, facecolors='gray', edgecolors='none', alpha=0.3, hatch='//'))
+    if service_bars:
+        ax.add_collection(PolyCollection(service_bars, facecolors=service_colors, edgecolors='black',
+                                         linewidths=0.5, alpha=0.8))
+    for x, y, text in labels:
+        ax.text(x, y, text, ha='center', va='center', color='white', fontsize=8, fontweight='bold')
+    ax.autoscale_view()
+
+    n_routes = len(solution.routes)
+    tick_every = max(1, -(-n_routes // GANTT_MAX_TICKS))
+    ax.set_yticks([i * 10 for i in range(0, n_routes, tick_every)])
+    ax.set_yticklabels([f"Vehicle {i+1}" for i in range(0, n_routes, tick_every)])
     ax.set_xlabel("Time")
     ax.set_title("Schedule Gantt Chart (Gray = Waiting)")
     ax.grid(True, axis='x', alpha=0.3)
@@ -0,0 +1,188 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+PROFILE_MODES = ("cprofile", "sampling")
+
+
+@dataclass
+class StageProfile:
+    """Profile of one stage: hot functions plus collapsed stacks for flamegraphs."""
+    stage: str
+    wall_time: float = 0.0
+    # (function label, calls, self seconds, cumulative seconds); calls is 0 in sampling mode
+    functions: List[Tuple[str, int, float, float]] = field(default_factory=list)
+    collapsed: Dict[str, int] = field(default_factory=dict)
+    files: List[str] = field(default_factory=list)
+
+
+def _label(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == "~":  # builtins
+        return name.replace(" ", "_")
+    return f"{name}@{os.path.basename(filename)}:{line}"
+
+
+def _pstats_to_collapsed(stats: pstats.Stats, max_depth: int = 64) -> Dict[str, int]:
+    """
+    Converts deterministic profile data to collapsed stacks (microseconds).
+    cProfile only records caller->callee edges, so each function's self time is
+    attributed to its heaviest caller chain. Good enough to spot hot paths.
+    """
+    raw = stats.stats
+    collapsed: Counter = Counter()
+    for func, (_cc, _nc, tt, _ct, callers) in raw.items():
+        weight = int(tt * 1e6)
+        if weight <= 0:
+            continue
+        path = [func]
+        seen = {func}
+        cur_callers = callers
+        while cur_callers and len(path) < max_depth:
+            parent = max(
+                (c for c in cur_callers if c not in seen),
+                key=lambda c: cur_callers[c][3],
+                default=None,
+            )
+            if parent is None:
+                break
+            path.append(parent)
+            seen.add(parent)
+            cur_callers = raw.get(parent, (0, 0, 0, 0, {}))[4]
+        collapsed[";".join(_label(f) for f in reversed(path))] += weight
+    return dict(collapsed)
+
+
+class _Sampler:
+    """Samples the stack of one thread at a fixed interval from a helper thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cvrptw-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(_label((code.co_filename, code.co_firstlineno, code.co_name)))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+
+class StageProfiler:
+    """
+    Profiles each pipeline stage separately.
+    mode="cprofile" is deterministic (exact call counts, higher overhead);
+    mode="sampling" periodically samples the stack and is cheap enough for big instances.
+    Each stage writes <idx>_<stage>.pstats (cprofile only) and <idx>_<stage>.collapsed to out_dir.
+    """
+
+    def __init__(self, mode: str = "cprofile", out_dir: Optional[str] = None, interval: float = 0.005):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {PROFILE_MODES}")
+        self.mode = mode
+        self.out_dir = out_dir
+        self.interval = interval
+        self.stages: List[StageProfile] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        profile = StageProfile(stage=name)
+        t0 = time.perf_counter()
+        if self.mode == "cprofile":
+            prof = cProfile.Profile()
+            prof.enable()
+            try:
+                yield profile
+            finally:
+                prof.disable()
+                profile.wall_time = time.perf_counter() - t0
+                self._finish_cprofile(profile, prof)
+        else:
+            sampler = _Sampler(threading.get_ident(), self.interval)
+            sampler.start()
+            try:
+                yield profile
+            finally:
+                sampler.stop()
+                profile.wall_time = time.perf_counter() - t0
+                self._finish_sampling(profile, sampler)
+
+    def _base_path(self, profile: StageProfile) -> Optional[str]:
+        if not self.out_dir:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        safe = "".join(ch if ch.isalnum() else "_" for ch in profile.stage)
+        return os.path.join(self.out_dir, f"{len(self.stages):02d}_{safe}")
+
+    def _finish_cprofile(self, profile: StageProfile, prof: cProfile.Profile):
+        stats = pstats.Stats(prof)
+        profile.functions = sorted(
+            ((_label(f), nc, tt, ct) for f, (_cc, nc, tt, ct, _callers) in stats.stats.items()),
+            key=lambda row: row[2], reverse=True,
+        )
+        profile.collapsed = _pstats_to_collapsed(stats)
+        base = self._base_path(profile)
+        if base:
+            stats.dump_stats(base + ".pstats")
+            profile.files.append(base + ".pstats")
+            self._write_collapsed(profile, base + ".collapsed")
+        self.stages.append(profile)
+
+    def _finish_sampling(self, profile: StageProfile, sampler: _Sampler):
+        self_samples: Counter = Counter()
+        cum_samples: Counter = Counter()
+        for stack, count in sampler.samples.items():
+            frames = stack.split(";")
+            self_samples[frames[-1]] += count
+            for frame in set(frames):
+                cum_samples[frame] += count
+        profile.functions = sorted(
+            ((f, 0, self_samples[f] * self.interval, cum_samples[f] * self.interval) for f in cum_samples),
+            key=lambda row: row[2], reverse=True,
+        )
+        profile.collapsed = dict(sampler.samples)
+        base = self._base_path(profile)
+        if base:
+            self._write_collapsed(profile, base + ".collapsed")
+        self.stages.append(profile)
+
+    @staticmethod
+    def _write_collapsed(profile: StageProfile, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, weight in sorted(profile.collapsed.items()):
+                f.write(f"{stack} {weight}\n")
+        profile.files.append(path)
+
+    def summary(self, top_n: int = 10) -> str:
+        """Stage timing table followed by the top-N functions by self time per stage."""
+        lines = [f"{'stage':<10}{'wall[s]':>10}"]
+        lines += [f"{p.stage:<10}{p.wall_time:>10.3f}" for p in self.stages]
+        for p in self.stages:
+            lines.append("")
+            lines.append(f"[{p.stage}] top {top_n} by self time ({self.mode})")
+            lines.append(f"{'self[s]':>10}{'cum[s]':>10}{'calls':>10}  function")
+            for label, calls, self_t, cum_t in p.functions[:top_n]:
+                calls_str = str(calls) if self.mode == "cprofile" else "-"
+                lines.append(f"{self_t:>10.3f}{cum_t:>10.3f}{calls_str:>10}  {label}")
+        return "\n".join(lines)
@@ -0,0 +1,168 @@
+"""
+Live progress, incumbent previews and cooperative cancellation for solves
+running in background processes.
+
+A worker installs a ProgressReporter as `active`; solver stages report
+iterations and new incumbents to it and stop their loop early (returning the
+best solution so far) once should_stop() is true: on cancellation, when the
+optional time budget (`deadline`, a time.monotonic() value) has passed, or
+once an incumbent costs no more than the optional `target`. Messages go to a queue
+(multiprocessing queue or Manager proxy) and are throttled to one per
+`interval` seconds, the newest incumbent taking priority. With no reporter
+installed the stages only pay a None check. time_limit() and stop_at() give a
+solve a deadline or a target cost through the same hook, with or without a
+reporting queue; muted() keeps only the stop conditions, for nested solves
+(subproblems) whose costs are not the reported solve's.
+
+Messages: ("progress", job_id, stage, step, best)
+          ("incumbent", job_id, stage, step, cost, CompactSolution)
+"""
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional, Union
+
+# Reporter of the solve running in this process, or None.
+active: Optional["ProgressReporter"] = None
+
+
+class ProgressReporter:
+    def __init__(self, job_id, queue, cancel_event=None, interval: float = 0.5,
+                 deadline: Optional[float] = None, target: Optional[float] = None):
+        self.job_id = job_id
+        self.queue = queue
+        self.cancel_event = cancel_event
+        self.interval = interval
+        self.deadline = deadline
+        self.target = target
+        self.target_reached = False
+        self._next_send = 0.0
+        self._next_check = 0.0
+        self._stopped = False
+        self._pending = None
+
+    def should_stop(self) -> bool:
+        """True once cancelled (the event is polled at most every 0.1 s), past the deadline or at the target."""
+        if self.target_reached:
+            return True
+        now = time.monotonic()
+        if self.deadline is not None and now >= self.deadline:
+            return True
+        if not self._stopped and self.cancel_event is not None and now >= self._next_check:
+            self._next_check = now + 0.1
+            self._stopped = self.cancel_event.is_set()
+        return self._stopped
+
+    def cancelled(self) -> bool:
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def iteration(self, stage: str, step: int, best: float):
+        if self.queue is None:
+            return
+        now = time.monotonic()
+        if now < self._next_send:
+            return
+        self._next_send = now + self.interval
+        if self._pending is not None:
+            self._send_incumbent()
+        else:
+            self.queue.put(("progress", self.job_id, stage, step, best))
+
+    def incumbent(self, stage: str, step: int, cost: float, solution: Union[object, Callable[[], object]]):
+        """`solution` is a Solution or a zero-argument callable building one; it is only encoded when sent."""
+        if self.target is not None and cost <= self.target:
+            self.target_reached = True
+        if self.queue is None:
+            return
+        self._pending = (stage, step, cost, solution)
+        now = time.monotonic()
+        if now >= self._next_send:
+            self._next_send = now + self.interval
+            self._send_incumbent()
+
+    def flush(self):
+        if self._pending is not None:
+            self._send_incumbent()
+
+    def _send_incumbent(self):
+        stage, step, cost, solution = self._pending
+        self._pending = None
+        if callable(solution):
+            solution = solution()
+        self.queue.put(("incumbent", self.job_id, stage, step, cost, solution.to_compact()))
+
+
+def install(reporter: Optional[ProgressReporter]):
+    global active
+    active = reporter
+
+
+@contextmanager
+def time_limit(seconds: Optional[float]):
+    """
+    Stops the stages of the enclosed solve after `seconds` (None: no limit).
+    Tightens the deadline of an installed reporter, else installs a silent one.
+    """
+    global active
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    reporter = active
+    if reporter is None:
+        active = ProgressReporter(None, None, deadline=deadline)
+        try:
+            yield
+        finally:
+            active = None
+        return
+    previous = reporter.deadline
+    reporter.deadline = deadline if previous is None else min(previous, deadline)
+    try:
+        yield
+    finally:
+        reporter.deadline = previous
+
+
+@contextmanager
+def stop_at(cost: Optional[float]):
+    """
+    Stops the stages of the enclosed solve once an incumbent costs at most `cost`
+    (None: no target). Sets the target of an installed reporter, else installs a silent one.
+    """
+    global active
+    if cost is None:
+        yield
+        return
+    reporter = active
+    if reporter is None:
+        active = ProgressReporter(None, None, target=cost)
+        try:
+            yield
+        finally:
+            active = None
+        return
+    previous = reporter.target, reporter.target_reached
+    reporter.target, reporter.target_reached = cost, False
+    try:
+        yield
+    finally:
+        reporter.target, reporter.target_reached = previous
+
+
+@contextmanager
+def muted():
+    """
+    For the enclosed solve, replaces an installed reporter by a silent one with the same
+    deadline and cancellation: no progress or incumbent messages and no target cost.
+    """
+    global active
+    reporter = active
+    if reporter is None:
+        yield
+        return
+    active = ProgressReporter(None, None, cancel_event=reporter.cancel_event, deadline=reporter.deadline)
+    active._stopped = reporter._stopped
+    try:
+        yield
+    finally:
+        active = reporter
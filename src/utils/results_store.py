@@ -0,0 +1,206 @@
+"""
+Content-addressed results store (SQLite).
+
+Runs are keyed by (instance digest, config digest, seed, commit): re-running an
+identical benchmark returns the stored solution and metrics instead of solving
+again, and every run is kept for trend queries across commits. Uncommitted
+changes get their own key (see current_commit); without git nothing is stored.
+"""
+import dataclasses
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from src.config import HybridConfig
+from src.core.encoding import instance_digest, solution_to_json, solution_from_json
+from src.core.models import CVRPTWInstance
+from src.core.solution import Solution
+
+# Config sections that do not influence the solution
+_NON_RESULT_KEYS = ("instrumentation",)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    instance_hash TEXT NOT NULL,
+    instance_name TEXT,
+    config_hash TEXT NOT NULL,
+    config_json TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    git_commit TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    cost REAL,
+    total_distance REAL,
+    total_wait REAL,
+    vehicles INTEGER,
+    feasible INTEGER,
+    solve_time REAL,
+    solution TEXT,
+    UNIQUE (instance_hash, config_hash, seed, git_commit)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_instance ON runs (instance_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_config ON runs (config_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_commit ON runs (git_commit);
+"""
+
+
+def default_store_path() -> Path:
+    env = os.environ.get("CVRPTW_RESULTS_DB")
+    if env:
+        return Path(env)
+    return Path.home() / ".cache" / "cvrptw" / "results.sqlite"
+
+
+def config_digest(config: HybridConfig) -> str:
+    data = dataclasses.asdict(config)
+    for key in _NON_RESULT_KEYS:
+        data.pop(key, None)
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+_COMMIT = None
+
+
+def _git(root: Path, *args: str) -> Optional[bytes]:
+    try:
+        out = subprocess.run(["git", *args], cwd=root, capture_output=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout if out.returncode == 0 else None
+
+
+def current_commit() -> str:
+    """
+    Version of the solver code the results are keyed by: the git commit, with a
+    '+dirty.<hash>' suffix over the uncommitted changes (diff against HEAD and
+    untracked .py files) when the tree is dirty, so edited code never reuses the
+    runs of its base commit. '' outside a git checkout, which disables caching.
+    Computed once per process, i.e. for the code that was imported.
+    """
+    global _COMMIT
+    if _COMMIT is None:
+        root = Path(__file__).resolve().parents[2]
+        head = _git(root, "rev-parse", "HEAD")
+        diff = _git(root, "diff", "HEAD", "--binary")
+        untracked = _git(root, "ls-files", "--others", "--exclude-standard", "-z", "--", "*.py")
+        if head is None or diff is None or untracked is None:
+            _COMMIT = ""
+        else:
+            _COMMIT = head.decode().strip()
+            names = [name for name in untracked.decode().split("\0") if name]
+            if diff or names:
+                h = hashlib.sha256(diff)
+                for name in sorted(names):
+                    h.update(name.encode() + b"\0")
+                    try:
+                        h.update((root / name).read_bytes())
+                    except OSError:
+                        pass
+                _COMMIT += "+dirty." + h.hexdigest()[:12]
+    return _COMMIT
+
+
+def default_solve(instance: CVRPTWInstance, config: HybridConfig, seed: int) -> Solution:
+    from src.solvers.hybrid import HybridSolver
+    return HybridSolver(instance, config).solve(seed=seed)
+
+
+@dataclass
+class StoredRun:
+    solution: Solution
+    cost: float
+    solve_time: float
+    cached: bool
+    seed: int
+    git_commit: str
+
+
+class ResultsStore:
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else default_store_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, instance: CVRPTWInstance, config: HybridConfig, seed: int,
+            commit: Optional[str] = None) -> Optional[StoredRun]:
+        commit = current_commit() if commit is None else commit
+        if not commit:
+            return None  # unknown code version: never reuse a run
+        row = self._conn.execute(
+            "SELECT * FROM runs WHERE instance_hash=? AND config_hash=? AND seed=? AND git_commit=?",
+            (instance_digest(instance), config_digest(config), seed, commit),
+        ).fetchone()
+        if row is None:
+            return None
+        solution = solution_from_json(row["solution"], instance)
+        return StoredRun(solution, row["cost"], row["solve_time"], True, seed, commit)
+
+    def put(self, instance: CVRPTWInstance, config: HybridConfig, seed: int, solution: Solution,
+            solve_time: float, instance_name: Optional[str] = None, commit: Optional[str] = None):
+        commit = current_commit() if commit is None else commit
+        if not commit:
+            return
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs (instance_hash, instance_name, config_hash, config_json, seed,"
+                " git_commit, created_at, cost, total_distance, total_wait, vehicles, feasible, solve_time,"
+                " solution) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    instance_digest(instance), instance_name, config_digest(config),
+                    json.dumps(dataclasses.asdict(config), sort_keys=True), seed, commit, time.time(),
+                    solution.fitness() if solution.is_feasible else None,
+                    solution.total_distance, solution.total_wait,
+                    sum(1 for r in solution.routes if len(r.nodes) > 2),
+                    int(solution.is_feasible), solve_time, solution_to_json(solution),
+                ),
+            )
+
+    def solve_cached(self, instance: CVRPTWInstance, config: HybridConfig, seed: int,
+                     solve_fn: Callable[[CVRPTWInstance, HybridConfig, int], Solution] = default_solve,
+                     instance_name: Optional[str] = None) -> StoredRun:
+        """Returns the stored run for these inputs, solving (and storing) only on a miss."""
+        hit = self.get(instance, config, seed)
+        if hit is not None:
+            return hit
+        t0 = time.perf_counter()
+        solution = solve_fn(instance, config, seed)
+        dt = time.perf_counter() - t0
+        self.put(instance, config, seed, solution, dt, instance_name=instance_name)
+        return StoredRun(solution, solution.fitness(), dt, False, seed, current_commit())
+
+    def trend(self, instance_hash: Optional[str] = None, config_hash: Optional[str] = None,
+              instance_name: Optional[str] = None) -> List[dict]:
+        """Per-commit aggregates ordered by time, for tracking quality/runtime across builds."""
+        clauses, params = [], []
+        for column, value in (("instance_hash", instance_hash), ("config_hash", config_hash),
+                              ("instance_name", instance_name)):
+            if value is not None:
+                clauses.append(f"{column}=?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn.execute(
+            f"SELECT git_commit, instance_name, config_hash, COUNT(*) AS runs, MIN(cost) AS best_cost,"
+            f" AVG(cost) AS avg_cost, AVG(solve_time) AS avg_time, AVG(vehicles) AS avg_vehicles,"
+            f" SUM(1 - feasible) AS infeasible_runs, MIN(created_at) AS first_run"
+            f" FROM runs {where} GROUP BY git_commit, instance_hash, config_hash ORDER BY first_run",
+            params,
+        ).fetchall()
+        return [dict(r) for r in rows]
@@ -0,0 +1,34 @@
+"""
+Reproducible random streams.
+
+Every solver owns a random.Random seeded from a master seed and a stream label,
+so runs are reproducible regardless of scheduling, and parallel units (ants,
+islands, portfolio members, workers) draw from independent substreams instead
+of sharing the global `random` module.
+"""
+import hashlib
+import random
+from typing import List, Optional
+
+
+def derive_seed(master: int, *keys) -> int:
+    """Stable 63-bit seed for the substream `keys` of `master` (identical in every process)."""
+    data = repr((int(master),) + tuple(keys)).encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little") >> 1
+
+
+def make_rng(master: int, *keys) -> random.Random:
+    return random.Random(derive_seed(master, *keys))
+
+
+def spawn_seeds(master: int, n: int, label: str = "worker") -> List[int]:
+    """Independent seeds for n parallel units (workers, islands, portfolio runs)."""
+    return [derive_seed(master, label, i) for i in range(n)]
+
+
+def resolve_seed(seed: Optional[int]) -> int:
+    """
+    Uses the given seed, or draws one from the global `random` module so that
+    callers who only call random.seed(...) still get reproducible runs.
+    """
+    return int(seed) if seed is not None else random.getrandbits(63)
@@ -0,0 +1,162 @@
+"""
+Scaling benchmark: runtime and memory of every stage against instance size.
+
+Each size runs in a fresh process (so peak RSS belongs to that size only) on a
+generated instance (src.utils.instance_generator). Within a size, RSS is the
+process peak so far and never decreases from one stage to the next; use
+--trace-memory for the allocation peak of each stage on its own. Instance generation and
+distance-matrix construction are measured as their own stages next to the
+solver stages reported by instrumentation. For every stage the local exponent
+k in time ~ n^k is computed between consecutive sizes; the size at which k
+first grows by more than --bend is reported as the point where that stage's
+curve bends.
+
+Usage: python -m src.utils.scaling --sizes 100,200,400,800 --kind rc [--trace-memory] [--csv out.csv]
+"""
+import argparse
+import csv
+import dataclasses
+import math
+import multiprocessing as mp
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from src.config import ACOConfig, GAConfig, HybridConfig, InstrumentationConfig, TabuConfig
+from src.utils import instrumentation
+
+DEFAULT_SIZES = (100, 200, 400, 800)
+# Rows of a result: (n, stage, wall seconds, peak RSS kB, peak traced allocation kB or None)
+Row = Tuple[int, str, float, int, Optional[int]]
+
+
+def _measure(n: int, kind: str, seed: int, config: HybridConfig, tw_width: float) -> List[Row]:
+    from src.core.models import CVRPTWInstance
+    from src.solvers.hybrid import HybridSolver
+    from src.utils.instance_generator import euclidean_matrix, generate_nodes
+
+    import numpy  # noqa: F401  (outside the timed "generate" stage)
+
+    trace_memory = config.instrumentation.trace_memory
+    report = instrumentation.SolverReport()
+    with instrumentation.stage(report, "generate", trace_memory):
+        nodes, capacity = generate_nodes(n, kind, seed, tw_width=tw_width)
+    with instrumentation.stage(report, "matrix", trace_memory):
+        # Nested lists for small n, a float64 array for large n (as generate_instance)
+        instance = CVRPTWInstance.from_nodes(nodes, capacity, distance_matrix=euclidean_matrix(nodes),
+                                             euclidean=True)
+    solution = HybridSolver(instance, config).solve(seed=seed)
+    stages = report.stages + solution.metrics.stages
+    return [(n, s.stage, s.wall_time, s.peak_rss_kb, s.peak_alloc_kb) for s in stages]
+
+
+def run(sizes: List[int], kind: str = "rc", seed: int = 0, config: Optional[HybridConfig] = None,
+        tw_width: float = 0.1) -> List[Row]:
+    config = config or HybridConfig()
+    config = dataclasses.replace(config, instrumentation=dataclasses.replace(config.instrumentation, enabled=True))
+    rows: List[Row] = []
+    # One process per size: ru_maxrss never decreases within a process
+    ctx = mp.get_context("spawn")
+    for n in sizes:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            size_rows = pool.submit(_measure, n, kind, seed, config, tw_width).result()
+        total = sum(r[2] for r in size_rows)
+        print(f"n={n:<6} {total:8.2f}s  " + "  ".join(f"{r[1]} {r[2]:.2f}s" for r in size_rows), flush=True)
+        rows.extend(size_rows)
+    return rows
+
+
+def exponents(rows: List[Row]) -> Dict[str, List[Tuple[int, int, float]]]:
+    """Per stage, the local exponent log(t2/t1) / log(n2/n1) between consecutive sizes."""
+    times: Dict[str, Dict[int, float]] = {}
+    for n, stage, wall, _, _ in rows:
+        times.setdefault(stage, {})[n] = wall
+    result = {}
+    for stage, by_n in times.items():
+        sizes = sorted(by_n)
+        result[stage] = [(a, b, math.log(max(by_n[b], 1e-6) / max(by_n[a], 1e-6)) / math.log(b / a))
+                         for a, b in zip(sizes, sizes[1:])]
+    return result
+
+
+def bends(slopes: Dict[str, List[Tuple[int, int, float]]], threshold: float = 0.5) -> Dict[str, Optional[int]]:
+    """First size after which a stage's exponent grows by more than threshold (None: no bend)."""
+    found = {}
+    for stage, steps in slopes.items():
+        found[stage] = next((steps[i][0] for i in range(1, len(steps))
+                             if steps[i][2] - steps[i - 1][2] > threshold), None)
+    return found
+
+
+def summary(rows: List[Row], threshold: float = 0.5) -> str:
+    sizes = sorted({r[0] for r in rows})
+    stages = list(dict.fromkeys(r[1] for r in rows))
+    cell = {(r[0], r[1]): r for r in rows}
+    traced = any(r[4] is not None for r in rows)
+
+    lines = ["wall time [s]", f"{'stage':<10}" + "".join(f"{n:>10}" for n in sizes)]
+    for stage in stages:
+        lines.append(f"{stage:<10}" + "".join(f"{cell[n, stage][2]:>10.3f}" if (n, stage) in cell else f"{'-':>10}"
+                                              for n in sizes))
+    mem_col = 4 if traced else 3
+    lines += ["", "peak alloc [MB]" if traced else "process peak RSS so far [MB] (cumulative, see --trace-memory)",
+              f"{'stage':<10}" + "".join(f"{n:>10}" for n in sizes)]
+    for stage in stages:
+        lines.append(f"{stage:<10}" + "".join(f"{(cell[n, stage][mem_col] or 0) / 1024:>10.1f}"
+                                              if (n, stage) in cell else f"{'-':>10}" for n in sizes))
+
+    slopes = exponents(rows)
+    bent = bends(slopes, threshold)
+    lines += ["", "local exponent k (time ~ n^k)",
+              f"{'stage':<10}" + "".join(f"{f'{a}-{b}':>12}" for a, b in zip(sizes, sizes[1:])) + f"{'bends at':>10}"]
+    for stage in stages:
+        ks = {(a, b): k for a, b, k in slopes.get(stage, [])}
+        lines.append(f"{stage:<10}" + "".join(f"{ks[a, b]:>12.2f}" if (a, b) in ks else f"{'-':>12}"
+                                              for a, b in zip(sizes, sizes[1:]))
+                     + f"{bent.get(stage) or '-':>10}")
+    return "\n".join(lines)
+
+
+def write_csv(rows: List[Row], path: str):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["n", "stage", "wall_time_s", "peak_rss_kb", "peak_alloc_kb"])
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runtime and memory of each solver stage against n")
+    parser.add_argument("--sizes", type=str, default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated customer counts")
+    parser.add_argument("--kind", choices=("c", "r", "rc"), default="rc", help="Generated instance class")
+    parser.add_argument("--tw-width", type=float, default=0.1, help="Time-window width as a fraction of the horizon")
+    parser.add_argument("--seed", type=int, default=0, help="Instance and solver seed")
+    parser.add_argument("--ants", type=int, default=10, help="Number of ACO ants")
+    parser.add_argument("--gens", type=int, default=50, help="Number of GA generations")
+    parser.add_argument("--steps", type=int, default=50, help="Number of Tabu steps")
+    parser.add_argument("--improvement", choices=("tabu", "alns", "tabu+alns"), default="tabu",
+                        help="Improvement stage(s) run after the GA")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Per-stage allocation peaks with tracemalloc (slower, but not cumulative like RSS)")
+    parser.add_argument("--bend", type=float, default=0.5, help="Exponent increase that counts as a bend")
+    parser.add_argument("--csv", type=str, default=None, help="Write the raw measurements to this CSV file")
+    args = parser.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(",") if s.strip())
+    config = HybridConfig(
+        aco=ACOConfig(n_ants=args.ants),
+        ga=GAConfig(generations=args.gens),
+        tabu=TabuConfig(max_steps=args.steps),
+        improvement=args.improvement,
+        instrumentation=InstrumentationConfig(enabled=True, trace_memory=args.trace_memory),
+    )
+    rows = run(sizes, args.kind, args.seed, config, args.tw_width)
+    print()
+    print(summary(rows, args.bend))
+    if args.csv:
+        write_csv(rows, args.csv)
+        print(f"\nMeasurements written to {args.csv}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Distance matrices that are shared between processes instead of copied.
+
+- MappedMatrix: a read-only memory-mapped .npy file (e.g. a precomputed,
+  possibly asymmetric road-network matrix exported by a routing engine).
+  The OS page cache holds one physical copy for all processes.
+- SharedMatrix: a multiprocessing.shared_memory block created by a parent
+  process; workers attach to it by name.
+
+Both are handles: CVRPTWInstance keeps the NumPy view in `distance_matrix`
+(so solvers index it as matrix[i][j], row = from, column = to) and pickles
+only the handle, so sending an instance to a worker never copies the matrix.
+NumPy is imported lazily.
+"""
+import sys
+from typing import Optional, Tuple
+
+
+def _numpy():
+    import numpy as np
+    return np
+
+
+def save_matrix(matrix, path: str, dtype: str = "float64"):
+    """Writes a (square, possibly asymmetric) matrix to a .npy file usable by MappedMatrix."""
+    np = _numpy()
+    arr = np.asarray(matrix, dtype=dtype)
+    if arr.ndim != 2 or arr.shape[0] != arr.shape[1]:
+        raise ValueError(f"distance matrix must be square, got shape {arr.shape}")
+    np.save(path, arr)
+
+
+class MatrixHandle:
+    """Base class: `array` is the NumPy view, pickling transfers only the handle."""
+    array = None
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.array.shape
+
+    def __len__(self) -> int:
+        return self.array.shape[0]
+
+    def __getitem__(self, idx):
+        return self.array[idx]
+
+    def close(self):
+        pass
+
+
+class MappedMatrix(MatrixHandle):
+    def __init__(self, path: str, expected_size: Optional[int] = None):
+        np = _numpy()
+        self.path = str(path)
+        self.array = np.load(self.path, mmap_mode="r")
+        if self.array.ndim != 2 or self.array.shape[0] != self.array.shape[1]:
+            raise ValueError(f"{self.path}: distance matrix must be square, got shape {self.array.shape}")
+        if self.array.dtype not in (np.float32, np.float64):
+            raise ValueError(f"{self.path}: expected float32 or float64, got {self.array.dtype}")
+        if expected_size is not None and self.array.shape[0] != expected_size:
+            raise ValueError(f"{self.path}: matrix has {self.array.shape[0]} rows, instance has {expected_size} nodes")
+
+    def __reduce__(self):
+        return (MappedMatrix, (self.path,))
+
+
+class SharedMatrix(MatrixHandle):
+    """
+    Matrix in a multiprocessing.shared_memory block.
+    The creating process owns the block and must call unlink() when all workers are done
+    (or use it as a context manager).
+    """
+
+    def __init__(self, shm, shape: Tuple[int, int], dtype: str, owner: bool):
+        np = _numpy()
+        self._shm = shm
+        self.name = shm.name
+        self.dtype = dtype
+        self.owner = owner
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        if not owner:
+            self.array.flags.writeable = False
+
+    @classmethod
+    def create(cls, matrix, dtype: str = "float64") -> "SharedMatrix":
+        from multiprocessing import shared_memory
+        np = _numpy()
+        src = np.asarray(matrix, dtype=dtype)
+        if src.ndim != 2 or src.shape[0] != src.shape[1]:
+            raise ValueError(f"distance matrix must be square, got shape {src.shape}")
+        shm = shared_memory.SharedMemory(create=True, size=max(1, src.nbytes))
+        handle = cls(shm, src.shape, dtype, owner=True)
+        handle.array[:] = src
+        return handle
+
+    @classmethod
+    def attach(cls, name: str, shape: Tuple[int, int], dtype: str) -> "SharedMatrix":
+        from multiprocessing import shared_memory
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            # Before 3.13 attaching registers the block with the resource tracker, which
+            # would unlink it when a spawned worker exits; only the owner should track it
+            from multiprocessing import resource_tracker
+            register = resource_tracker.register
+            resource_tracker.register = lambda *args, **kwargs: None
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        return cls(shm, tuple(shape), dtype, owner=False)
+
+    def __reduce__(self):
+        return (SharedMatrix.attach, (self.name, tuple(self.array.shape), self.dtype))
+
+    def close(self):
+        self.array = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # An instance still holds a view; the mapping goes away with the process
+            pass
+
+    def unlink(self):
+        self.close()
+        if self.owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.unlink()
@@ -1,84 +1,92 @@
-from typing import List, Tuple
+from typing import Iterable, List, Tuple
 from src.core.models import Node, CVRPTWInstance
 
 def load_solomon_txt(path: str) -> Tuple[List[Node], float]:
+    """Reads a Solomon / Gehring-Homberger file (see parse_solomon)."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return parse_solomon(f, source=path)
+
+
+def parse_solomon_text(text: str) -> Tuple[List[Node], float]:
+    """Same as load_solomon_txt, for file contents already in memory (e.g. an upload)."""
+    return parse_solomon(text.splitlines(), source="<text>")
+
+
+def parse_solomon(lines: Iterable[str], source: str = "<text>") -> Tuple[List[Node], float]:
     """
-    Solomon format (classic):
-    - first relevant numeric line for depot then customers:
+    Solomon format (classic) and Gehring-Homberger extended format (200-1000 customers):
+    - a "NUMBER  CAPACITY" header followed by <numVehicles> <capacity>
+    - a customer table header then one row per node:
       CUST NO.  XCOORD  YCOORD  DEMAND  READY TIME  DUE DATE  SERVICE TIME
+    The file is parsed in a single streaming pass.
     Returns (nodes, vehicle_capacity)
     Node id must start at 0 for depot.
     """
-    lines = []
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                lines.append(line)
-
-    # Find the line that starts the table (contains "CUST NO")
-    start_idx = None
-    for i, line in enumerate(lines):
-        if "CUST" in line and "NO" in line and "XCOORD" in line:
-            start_idx = i + 1
-            break
-    if start_idx is None:
-        raise ValueError("Could not find customer table header in Solomon file.")
-
-    # Vehicle capacity is usually given in a section above (e.g. "NUMBER     CAPACITY")
-    # We'll search for a line with two integers after a header containing "CAPACITY"
     capacity = None
-    for i, line in enumerate(lines[:start_idx]):
-        if "CAPACITY" in line.upper():
-            # next non-empty line often has: <numVehicles> <capacity>
-            for j in range(i+1, min(i+6, start_idx)):
-                parts = lines[j].split()
-                if len(parts) >= 2 and parts[0].isdigit():
-                    try:
-                        capacity = float(parts[1])
-                        break
-                    except:
-                        pass
-        if capacity is not None:
-            break
-    if capacity is None:
-        # fallback if not found
-        capacity = 200.0
-
+    expect_capacity = False
+    in_table = False
     nodes: List[Node] = []
-    # Parse numeric rows: id x y demand ready due service
-    for line in lines[start_idx:]:
+
+    for line_no, line in enumerate(lines, start=1):
         parts = line.split()
-        if len(parts) < 7:
+        if not parts:
             continue
-        try:
-            cid = int(parts[0])
-            x = float(parts[1]); y = float(parts[2])
-            demand = float(parts[3])
-            ready = float(parts[4]); due = float(parts[5])
-            service = float(parts[6])
-            nodes.append(Node(cid, x, y, demand, ready, due, service))
-        except:
-            # ignore non-data lines
+
+        if in_table:
+            # Parse numeric rows: id x y demand ready due service
+            try:
+                if len(parts) != 7:
+                    raise ValueError
+                nodes.append(Node(int(parts[0]), float(parts[1]), float(parts[2]), float(parts[3]),
+                                  float(parts[4]), float(parts[5]), float(parts[6])))
+            except ValueError:
+                raise ValueError(f"{source}:{line_no}: malformed customer row: {line.strip()!r}")
             continue
 
+        head = parts[0].upper()
+        if head == "CUST" or (head.startswith("CUST") and "XCOORD" in line.upper()):
+            in_table = True
+        elif "CAPACITY" in line.upper():
+            # next numeric line has: <numVehicles> <capacity>
+            expect_capacity = True
+        elif expect_capacity and len(parts) >= 2 and parts[0].isdigit():
+            capacity = float(parts[1])
+            expect_capacity = False
+
+    if not in_table:
+        raise ValueError("Could not find customer table header in Solomon file.")
+    if not nodes:
+        raise ValueError("Solomon file contains no customer rows.")
+    if capacity is None:
+        # fallback if not found
+        capacity = 200.0
+
     # Ensure depot id is 0
     # In Solomon, depot is customer 0 already.
-    nodes = sorted(nodes, key=lambda n: n.id)
+    nodes.sort(key=lambda n: n.id)
     if nodes[0].id != 0:
         raise ValueError("Solomon file does not contain depot with id 0.")
+    # The distance matrix is indexed by node id
+    if [n.id for n in nodes] != list(range(len(nodes))):
+        raise ValueError("Solomon file node ids must be contiguous from 0.")
 
     return nodes, capacity
 
 
-def instance_from_solomon(path: str) -> CVRPTWInstance:
+def instance_from_solomon(path: str, use_cache: bool = False, cache_dir: str = None,
+                          mmap_matrix: bool = False) -> CVRPTWInstance:
+    """
+    Loads an instance file. With use_cache=True the parsed nodes and the distance
+    matrix are kept in a binary on-disk cache (see src.utils.instance_cache), so
+    reloading the same file skips parsing and the O(n^2) matrix construction.
+    """
+    if use_cache:
+        from src.utils.instance_cache import load_cached_instance
+        return load_cached_instance(path, cache_dir=cache_dir, mmap_matrix=mmap_matrix)
     nodes, cap = load_solomon_txt(path)
-    inst = CVRPTWInstance(num_customers=len(nodes)-1, vehicle_capacity=cap)
-    # override random-generated instance
-    inst.nodes = nodes
-    size = len(nodes)
-    inst.distance_matrix = [[0.0]*size for _ in range(size)]
-    for i in range(size):
-        for j in range(size):
-            inst.distance_matrix[i][j] = nodes[i].distance_to(nodes[j])
-    return inst
+    return build_instance(nodes, cap)
+
+
+def build_instance(nodes: List[Node], cap: float, distance_matrix=None) -> CVRPTWInstance:
+    """Builds the instance from parsed nodes (one matrix construction, none if a matrix is given)."""
+    return CVRPTWInstance.from_nodes(nodes, cap, distance_matrix=distance_matrix)
@@ -0,0 +1,100 @@
+import json
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+# Tracer of the current process, or None when tracing is off.
+# Solvers check `trace.active is not None` before building any event.
+active: Optional["Tracer"] = None
+
+_STOP = None
+
+
+class Tracer:
+    """
+    Producer side of the event trace. Events are plain dicts pushed to a queue;
+    serialization and disk I/O happen in the TraceWriter thread of the parent process.
+    """
+
+    def __init__(self, event_queue, sample_every: int = 1, source: Optional[str] = None):
+        self.queue = event_queue
+        self.sample_every = max(1, int(sample_every))
+        self.source = source if source is not None else str(os.getpid())
+
+    def sampled(self, step: int) -> bool:
+        return step % self.sample_every == 0
+
+    def emit(self, event: str, **fields):
+        fields["ev"] = event
+        fields["t"] = round(time.time(), 6)
+        fields["src"] = self.source
+        self.queue.put_nowait(fields)
+
+
+class TraceWriter:
+    """
+    Consumer side: a background thread drains the queue into a compact JSONL file.
+    With multiprocess=True the queue is a multiprocessing.Queue, so worker processes
+    that call attach(writer.queue, ...) all end up in the same merged trace file.
+    """
+
+    def __init__(self, path: str, multiprocess: bool = False, flush_every: float = 1.0):
+        self.path = path
+        self.flush_every = flush_every
+        if multiprocess:
+            import multiprocessing
+            # A spawn-context queue can be handed to both forked and spawned workers
+            self.queue = multiprocessing.get_context("spawn").Queue()
+        else:
+            self.queue = queue.SimpleQueue()
+        self._file = open(path, "w", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="cvrptw-trace", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                record = self.queue.get(timeout=self.flush_every)
+            except queue.Empty:
+                record = False
+            if record is _STOP:
+                break
+            if record:
+                self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            now = time.monotonic()
+            if now - last_flush >= self.flush_every:
+                self._file.flush()
+                last_flush = now
+        self._file.flush()
+
+    def close(self):
+        self.queue.put(_STOP)
+        self._thread.join()
+        self._file.close()
+
+
+def attach(event_queue, sample_every: int = 1, source: Optional[str] = None) -> Tracer:
+    """Installs a tracer for this process (e.g. from a worker pool initializer)."""
+    global active
+    active = Tracer(event_queue, sample_every, source)
+    return active
+
+
+def detach():
+    global active
+    active = None
+
+
+def start(path: str, sample_every: int = 1, multiprocess: bool = False) -> TraceWriter:
+    """Opens a trace file and attaches the current process to it. Call close() when done."""
+    writer = TraceWriter(path, multiprocess=multiprocess)
+    attach(writer.queue, sample_every, source="main")
+    return writer
+
+
+def stop(writer: TraceWriter):
+    detach()
+    writer.close()
@@ -0,0 +1,304 @@
+"""
+Racing-based parameter tuning (F-race, Birattari et al. 2002).
+
+Candidate HybridConfigs (the defaults plus random samples of PARAM_SPACE) are
+raced over blocks, where a block is one (Solomon instance, seed) pair. In
+every block each surviving candidate solves the instance under the same
+wall-clock budget (HybridConfig.time_limit). The runs of a block execute in
+parallel on a process pool, and the workers keep parsed instances in memory.
+After `min_blocks` blocks, a Friedman test runs on the per-block cost ranks.
+If it rejects "all candidates are equivalent", every candidate whose rank sum
+is significantly worse than the best one (Conover's post-hoc test) is dropped.
+The race ends when one candidate is left, when blocks run out or when the
+experiment budget is spent. The surviving candidate with the best mean rank is
+written as a JSON preset, which config_from_dict (and `src.cli --preset`) loads.
+
+Usage: python -m src.utils.tuning --time-limit 10 --candidates 32 --seeds 5 --workers 8 --out tuned.json
+
+Runs are timed in wall-clock seconds, so use at most one worker per physical
+core to keep the budgets comparable.
+"""
+import argparse
+import dataclasses
+import json
+import math
+import multiprocessing as mp
+import random
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.config import HybridConfig, config_from_dict
+from src.utils.logger import logger, setup_logger
+
+# Tuned parameters: dotted HybridConfig path -> ("int" | "float" | "logfloat", low, high) or ("choice", options)
+PARAM_SPACE = {
+    "aco.n_ants": ("int", 5, 40),
+    "aco.iterations": ("int", 2, 30),
+    "aco.alpha": ("float", 0.5, 3.0),
+    "aco.beta": ("float", 1.0, 5.0),
+    "aco.rho": ("float", 0.02, 0.5),
+    "ga.population_size": ("int", 20, 120),
+    "ga.generations": ("int", 10, 400),
+    "ga.mutation_rate": ("logfloat", 0.01, 0.5),
+    "tabu.max_steps": ("int", 20, 1000),
+    "tabu.tabu_tenure": ("int", 5, 40),
+    "tabu.neighborhood_size": ("int", 20, 300),
+    "tabu.allow_infeasible": ("choice", (False, True)),
+    "alns.iterations": ("int", 100, 5000),
+    "improvement": ("choice", ("tabu", "alns", "tabu+alns")),
+}
+
+
+def default_instances() -> List[Path]:
+    return sorted((Path(__file__).resolve().parents[1] / "data" / "solomon").glob("*.txt"))
+
+
+def sample_config(base: HybridConfig, rng: random.Random, space: Dict[str, tuple] = PARAM_SPACE) -> HybridConfig:
+    data = dataclasses.asdict(base)
+    for path, spec in space.items():
+        if spec[0] == "int":
+            value = rng.randint(spec[1], spec[2])
+        elif spec[0] == "float":
+            value = round(rng.uniform(spec[1], spec[2]), 4)
+        elif spec[0] == "logfloat":
+            value = round(math.exp(rng.uniform(math.log(spec[1]), math.log(spec[2]))), 4)
+        else:
+            value = rng.choice(spec[1])
+        *parents, leaf = path.split(".")
+        node = data
+        for key in parents:
+            node = node[key]
+        node[leaf] = value
+    return config_from_dict(data)
+
+
+# --- statistics (no SciPy dependency) ---
+
+def _gammainc_upper(a: float, x: float) -> float:
+    """Regularized upper incomplete gamma Q(a, x) (Numerical Recipes gser / gcf)."""
+    if x <= 0:
+        return 1.0
+    gln = math.lgamma(a)
+    if x < a + 1:
+        term = total = 1.0 / a
+        ap = a
+        for _ in range(500):
+            ap += 1
+            term *= x / ap
+            total += term
+            if abs(term) < abs(total) * 1e-12:
+                break
+        return 1.0 - total * math.exp(-x + a * math.log(x) - gln)
+    b = x + 1 - a
+    c, d = 1e300, 1.0 / b
+    h = d
+    for i in range(1, 500):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = 1e-300 if abs(d) < 1e-300 else d
+        c = b + an / c
+        c = 1e-300 if abs(c) < 1e-300 else c
+        d = 1.0 / d
+        h *= d * c
+        if abs(d * c - 1) < 1e-12:
+            break
+    return math.exp(-x + a * math.log(x) - gln) * h
+
+
+def _betainc(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta I_x(a, b) (continued fraction)."""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    if x > (a + 1) / (a + b + 2):
+        return 1.0 - _betainc(b, a, 1 - x)
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1 - x)) / a
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (1e-300 if abs(d) < 1e-300 else d)
+    h = d
+    for m in range(1, 500):
+        for num in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                    -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + num * d
+            d = 1.0 / (1e-300 if abs(d) < 1e-300 else d)
+            c = 1.0 + num / c
+            c = 1e-300 if abs(c) < 1e-300 else c
+            h *= d * c
+        if abs(d * c - 1) < 1e-12:
+            break
+    return front * h
+
+
+def chi2_sf(x: float, dof: int) -> float:
+    return _gammainc_upper(dof / 2.0, x / 2.0)
+
+
+def t_quantile(p: float, dof: float) -> float:
+    """Quantile of Student's t for p > 0.5 (bisection on the CDF)."""
+    def cdf(t):
+        return 1.0 - 0.5 * _betainc(dof / 2.0, 0.5, dof / (dof + t * t))
+    lo, hi = 0.0, 1.0
+    while cdf(hi) < p:
+        hi *= 2
+    for _ in range(100):
+        mid = (lo + hi) / 2
+        lo, hi = (mid, hi) if cdf(mid) < p else (lo, mid)
+    return (lo + hi) / 2
+
+
+def rank_block(costs: Sequence[float]) -> List[float]:
+    """Ranks 1..k (average ranks for ties; infeasible runs, cost inf, tie for last)."""
+    order = sorted(range(len(costs)), key=lambda i: costs[i])
+    ranks = [0.0] * len(costs)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and costs[order[j + 1]] == costs[order[i]]:
+            j += 1
+        for t in range(i, j + 1):
+            ranks[order[t]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def friedman_eliminate(ranks: List[List[float]], alpha: float = 0.05) -> Tuple[float, List[int]]:
+    """
+    Friedman test on a blocks x candidates rank matrix. Returns (p-value, indices
+    of candidates to drop): those whose rank sum differs from the best one by
+    more than Conover's critical difference. Nothing is dropped unless p < alpha.
+    """
+    b, k = len(ranks), len(ranks[0])
+    if b < 2 or k < 2:
+        return 1.0, []
+    sums = [sum(row[j] for row in ranks) for j in range(k)]
+    a_term = sum(r * r for row in ranks for r in row)
+    c_term = b * k * (k + 1) ** 2 / 4.0
+    if a_term - c_term <= 1e-12:
+        return 1.0, []  # every block tied
+    stat = (k - 1) * sum((s - b * (k + 1) / 2.0) ** 2 for s in sums) / (a_term - c_term)
+    p_value = chi2_sf(stat, k - 1)
+    if p_value >= alpha:
+        return p_value, []
+    dof = (b - 1) * (k - 1)
+    diff = t_quantile(1 - alpha / 2, dof) * math.sqrt(
+        max(0.0, 2 * b * (1 - stat / (b * (k - 1))) * (a_term - c_term) / dof))
+    best = min(sums)
+    return p_value, [j for j in range(k) if sums[j] - best > diff]
+
+
+# --- racing ---
+
+_instances: Dict[str, object] = {}
+
+
+def _evaluate(config: HybridConfig, path: str, seed: int) -> float:
+    from src.solvers.hybrid import HybridSolver
+    from src.utils.solomon_loader import instance_from_solomon
+    instance = _instances.get(path)
+    if instance is None:
+        instance = _instances[path] = instance_from_solomon(path)
+    return HybridSolver(instance, config).solve(seed=seed).fitness()
+
+
+@dataclasses.dataclass
+class RaceResult:
+    best: HybridConfig
+    survivors: List[int]
+    candidates: List[HybridConfig]
+    mean_ranks: Dict[int, float]
+    blocks: int
+    experiments: int
+
+
+def race(candidates: List[HybridConfig], blocks: List[Tuple[str, int]], workers: Optional[int] = None,
+         min_blocks: int = 5, alpha: float = 0.05, max_experiments: Optional[int] = None) -> RaceResult:
+    alive = list(range(len(candidates)))
+    costs: List[Dict[int, float]] = []  # per block: candidate -> cost
+    experiments = 0
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+        for block_no, (path, seed) in enumerate(blocks, 1):
+            if len(alive) == 1 or (max_experiments is not None and experiments + len(alive) > max_experiments):
+                break
+            futures = {c: pool.submit(_evaluate, candidates[c], path, seed) for c in alive}
+            costs.append({c: f.result() for c, f in futures.items()})
+            experiments += len(alive)
+            # Every block has a cost for each survivor; re-rank them among the survivors only
+            ranks = [rank_block([block[c] for c in alive]) for block in costs]
+            mean = {c: sum(r[j] for r in ranks) / len(ranks) for j, c in enumerate(alive)}
+            logger.info("Block %d (%s, seed %d): %d alive, best mean rank %.2f", block_no, Path(path).name, seed,
+                        len(alive), min(mean.values()))
+            if block_no >= min_blocks:
+                p_value, dropped = friedman_eliminate(ranks, alpha)
+                if dropped:
+                    alive = [c for j, c in enumerate(alive) if j not in dropped]
+                    logger.info("Friedman p=%.4f: dropped %d, %d left", p_value, len(dropped), len(alive))
+    ranks = [rank_block([block[c] for c in alive]) for block in costs]
+    mean = {c: sum(r[j] for r in ranks) / max(1, len(ranks)) for j, c in enumerate(alive)}
+    best = min(alive, key=lambda c: mean[c])
+    return RaceResult(candidates[best], alive, candidates, mean, len(costs), experiments)
+
+
+def write_preset(config: HybridConfig, path: str, meta: Optional[dict] = None):
+    data = dataclasses.asdict(config)
+    data.pop("instrumentation", None)
+    data["seed"] = None
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+    if meta:
+        with open(str(path) + ".race.json", "w") as f:
+            json.dump(meta, f, indent=2)
+
+
+def load_preset(path: str) -> HybridConfig:
+    with open(path) as f:
+        return config_from_dict(json.load(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="F-race tuning of the hybrid solver over Solomon instances")
+    parser.add_argument("--instances", nargs="*", default=None,
+                        help="Instance files (default: the bundled Solomon set)")
+    parser.add_argument("--time-limit", type=float, default=10.0, help="Seconds per run (the tuning objective)")
+    parser.add_argument("--candidates", type=int, default=32, help="Configurations raced, the defaults included")
+    parser.add_argument("--seeds", type=int, default=5, help="Seeds per instance (blocks = instances x seeds)")
+    parser.add_argument("--min-blocks", type=int, default=5, help="Blocks before the first elimination test")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level of the Friedman test")
+    parser.add_argument("--max-experiments", type=int, default=None, help="Cap on the total number of runs")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel runs (default: all cores)")
+    parser.add_argument("--base", type=str, default=None, help="Preset to sample around instead of the defaults")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the candidate sampling and block order")
+    parser.add_argument("--out", type=str, default="tuned_config.json", help="Preset file to write")
+    parser.add_argument("--log-file", type=str, default="tuning.log", help="Log file ('' to disable)")
+    args = parser.parse_args()
+    setup_logger(log_file=args.log_file)
+
+    rng = random.Random(args.seed)
+    base = load_preset(args.base) if args.base else HybridConfig()
+    base = dataclasses.replace(base, time_limit=args.time_limit, seed=None)
+    candidates = [base] + [sample_config(base, rng) for _ in range(max(0, args.candidates - 1))]
+    paths = [str(p) for p in (args.instances or default_instances())]
+    if not paths:
+        parser.error("no instance files found")
+    blocks = [(p, s) for s in range(args.seeds) for p in paths]
+    rng.shuffle(blocks)
+
+    result = race(candidates, blocks, args.workers, args.min_blocks, args.alpha, args.max_experiments)
+    meta = {
+        "time_limit": args.time_limit,
+        "blocks": result.blocks,
+        "experiments": result.experiments,
+        "survivors": [{"candidate": c, "mean_rank": result.mean_ranks[c],
+                       "config": dataclasses.asdict(result.candidates[c])} for c in result.survivors],
+    }
+    write_preset(result.best, args.out, meta)
+    print(f"{result.blocks} blocks, {result.experiments} runs, {len(result.survivors)} survivor(s)")
+    for c in sorted(result.survivors, key=lambda c: result.mean_ranks[c]):
+        print(f"  candidate {c:>3}{' (defaults)' if c == 0 else '':<11} mean rank {result.mean_ranks[c]:.2f}")
+    print(f"Preset written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Randomized checks of the O(1) route evaluations (segments, RouteState) against
+a full Route.calculate_metrics / Route.is_feasible recomputation.
+"""
+import math
+import random
+
+import pytest
+
+from src.core import segments
+from src.core.models import CVRPTWInstance, Route
+from src.core.route_state import INF, InstanceData, RouteState, route_penalty
+
+TOL = 1e-6
+
+
+def _instance(seed: int) -> CVRPTWInstance:
+    # Tight windows and capacity so that both feasible and infeasible routes come up
+    return CVRPTWInstance(num_customers=25, vehicle_capacity=40, time_horizon=150, tw_width_ratio=0.25, seed=seed)
+
+
+def _route(instance: CVRPTWInstance, ids):
+    depot = instance.get_depot()
+    route = Route(nodes=[depot] + [instance.nodes[i] for i in ids] + [depot])
+    route.calculate_metrics(instance.distance_matrix)
+    return route, route.is_feasible(instance.vehicle_capacity, instance.distance_matrix)
+
+
+def _random_ids(rng: random.Random, instance: CVRPTWInstance, max_len: int = 8):
+    return rng.sample(range(1, instance.num_customers + 1), rng.randint(0, max_len))
+
+
+def _seg_feasible(seg, capacity: float) -> bool:
+    return seg.time_warp <= TOL and seg.load <= capacity + TOL
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sequence_matches_full_recomputation(seed):
+    instance = _instance(seed)
+    data = InstanceData(instance)
+    rng = random.Random(seed)
+    for _ in range(200):
+        ids = _random_ids(rng, instance)
+        route, feasible = _route(instance, ids)
+        seg = segments.sequence(data, ids)
+        assert seg.distance == pytest.approx(route.total_distance, abs=TOL)
+        assert seg.load == pytest.approx(route.total_load, abs=TOL)
+        assert _seg_feasible(seg, instance.vehicle_capacity) == feasible
+        excess, warp = route_penalty(data, ids)
+        assert (excess == 0 and warp == 0) == feasible
+        assert warp == pytest.approx(seg.time_warp, abs=TOL)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_concat_of_prefix_and_suffix_matches_recomputation(seed):
+    instance = _instance(seed)
+    data = InstanceData(instance)
+    rng = random.Random(100 + seed)
+    concat, single = segments.concat, segments.single
+    for _ in range(200):
+        ids = _random_ids(rng, instance)
+        if not ids:
+            continue
+        prefix, suffix = segments.prefix_suffix(data, ids)
+        # Split point k of path = [0] + ids + [0]
+        k = rng.randrange(len(ids) + 1)
+        whole = concat(data, prefix[k], suffix[k + 1])
+        route, feasible = _route(instance, ids)
+        assert whole.distance == pytest.approx(route.total_distance, abs=TOL)
+        assert _seg_feasible(whole, instance.vehicle_capacity) == feasible
+
+        # Remove the customer at path index k (1..len(ids)) in O(1)
+        k = rng.randint(1, len(ids))
+        removed = concat(data, prefix[k - 1], suffix[k + 1])
+        route, feasible = _route(instance, ids[:k - 1] + ids[k:])
+        assert removed.distance == pytest.approx(route.total_distance, abs=TOL)
+        assert _seg_feasible(removed, instance.vehicle_capacity) == feasible
+
+        # Insert an outside customer before path index k in O(1)
+        outside = [u for u in range(1, instance.num_customers + 1) if u not in ids]
+        u = rng.choice(outside)
+        inserted = concat(data, concat(data, prefix[k - 1], single(data, u)), suffix[k])
+        route, feasible = _route(instance, ids[:k - 1] + [u] + ids[k - 1:])
+        assert inserted.distance == pytest.approx(route.total_distance, abs=TOL)
+        assert _seg_feasible(inserted, instance.vehicle_capacity) == feasible
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_best_insertion_matches_exhaustive_recomputation(seed):
+    instance = _instance(seed)
+    data = InstanceData(instance)
+    rng = random.Random(200 + seed)
+    checked = 0
+    while checked < 100:
+        ids = _random_ids(rng, instance, max_len=6)
+        state = RouteState(list(ids))
+        if not state.update(data):
+            continue
+        base, _ = _route(instance, ids)
+        u = rng.choice([v for v in range(1, instance.num_customers + 1) if v not in ids])
+        expected = INF
+        for pos in range(len(ids) + 1):
+            route, feasible = _route(instance, ids[:pos] + [u] + ids[pos:])
+            if feasible:
+                expected = min(expected, route.total_distance - base.total_distance)
+        delta, pos = state.best_insertion(data, u)
+        if math.isinf(expected):
+            assert math.isinf(delta) and pos == -1
+        else:
+            assert delta == pytest.approx(expected, abs=TOL)
+            route, feasible = _route(instance, ids[:pos] + [u] + ids[pos:])
+            assert feasible
+            assert route.total_distance - base.total_distance == pytest.approx(delta, abs=TOL)
+        checked += 1